@@ -0,0 +1,142 @@
+# coding=utf-8
+"""
+..
+   kodi_library.py
+
+A local stand-in for the Kodi video library, answering JSON-RPC requests like ``xbmc.executeJSONRPC``.
+
+Patch ``xbmc.executeJSONRPC`` with ``KodiLibrary().execute`` to test library lookups offline. Batch arrays, ``limits``
+paging and ``properties`` projection are supported, and every round trip is counted.
+"""
+# standard imports
+import json
+import threading
+import time
+
+# the details methods, by method: (kind, id parameter, details key)
+details_methods = {
+    'VideoLibrary.GetMovieDetails': ('movies', 'movieid', 'moviedetails'),
+    'VideoLibrary.GetTVShowDetails': ('tvshows', 'tvshowid', 'tvshowdetails'),
+    'VideoLibrary.GetMovieSetDetails': ('sets', 'setid', 'setdetails'),
+}
+# the listing methods, by method: kind, which is also the key of the items in the result
+listing_methods = {
+    'VideoLibrary.GetMovies': 'movies',
+    'VideoLibrary.GetTVShows': 'tvshows',
+    'VideoLibrary.GetMovieSets': 'sets',
+}
+id_fields = {'movies': 'movieid', 'tvshows': 'tvshowid', 'sets': 'setid'}
+
+
+def error(request_id, code, message):
+    # type: (int, int, str) -> dict
+    """Get a JSON-RPC error response."""
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+class KodiLibrary:
+    """
+    A stand-in for the Kodi video library.
+
+    Movies ``1`` to ``movies`` have the TMDb id of their number and an IMDb id such as ``tt0000001``, like the items of
+    the ThemerrDB stand-in, and belong to movie sets of ``set_size`` movies. TV shows ``1`` to ``tv_shows`` have the
+    TMDb id of their number.
+
+    :param movies: int - number of movies
+    :param tv_shows: int - number of TV shows
+    :param set_size: int - number of movies in each movie set
+    :param latency: float - seconds taken by each round trip
+    """
+
+    def __init__(self, movies=1000, tv_shows=100, set_size=3, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.requests = 0
+
+        self.items = {
+            'movies': {
+                number: {
+                    'movieid': number,
+                    'label': f'Movie {number}',
+                    'title': f'Movie {number}',
+                    'setid': (number + set_size - 1) // set_size,
+                    'uniqueid': {'tmdb': str(number), 'imdb': f'tt{number:07d}'},
+                } for number in range(1, movies + 1)
+            },
+            'tvshows': {
+                number: {
+                    'tvshowid': number,
+                    'label': f'TV Show {number}',
+                    'title': f'TV Show {number}',
+                    'uniqueid': {'tmdb': str(number)},
+                } for number in range(1, tv_shows + 1)
+            },
+        }
+        self.items['sets'] = {
+            number: {'setid': number, 'label': f'Set {number}', 'title': f'Set {number}'}
+            for number in range(1, (movies + set_size - 1) // set_size + 1)
+        }
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def project(item, kind, properties):
+        # type: (dict, str, list) -> dict
+        """Get the id, the label and the requested properties of an item."""
+        projected = {id_fields[kind]: item[id_fields[kind]], 'label': item['label']}
+        projected.update({key: item[key] for key in properties or () if key in item})
+        return projected
+
+    def answer(self, request):
+        # type: (dict) -> dict
+        """Answer a single JSON-RPC request."""
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        if method in details_methods:
+            kind, id_field, key = details_methods[method]
+            item = self.items[kind].get(params.get(id_field))
+            if item is None:
+                return error(request_id=request_id, code=-32602, message='Invalid params.')
+
+            details = self.project(item=item, kind=kind, properties=params.get('properties'))
+            if kind == 'sets' and 'movies' in params:
+                movies = [movie for movie in self.items['movies'].values() if movie['setid'] == item['setid']]
+                details['movies'] = [self.project(item=movie, kind='movies',
+                                                  properties=params['movies'].get('properties')) for movie in movies]
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': {key: details}}
+
+        if method in listing_methods:
+            kind = listing_methods[method]
+            items = list(self.items[kind].values())
+            limits = params.get('limits') or {}
+            start = limits.get('start', 0)
+            end = min(limits.get('end', len(items)), len(items))
+            result = {
+                kind: [self.project(item=item, kind=kind, properties=params.get('properties'))
+                       for item in items[start:end]],
+                'limits': {'start': start, 'end': end, 'total': len(items)},
+            }
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+        return error(request_id=request_id, code=-32601, message='Method not found.')
+
+    def execute(self, command):
+        # type: (str) -> str
+        """Answer a JSON-RPC request or batch array, like ``xbmc.executeJSONRPC``."""
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        try:
+            request = json.loads(command)
+        except ValueError:
+            return json.dumps(error(request_id=None, code=-32700, message='Parse error.'))
+
+        batch = request if isinstance(request, list) else [request]
+        with self._lock:
+            self.requests += len(batch)
+        responses = [self.answer(request=item) for item in batch]
+        return json.dumps(responses if isinstance(request, list) else responses[0])
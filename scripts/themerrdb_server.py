@@ -0,0 +1,223 @@
+# coding=utf-8
+"""
+..
+   themerrdb_server.py
+
+A local stand-in for ThemerrDB, serving generated data with configurable latency and faults.
+
+Run with ``python -m scripts.themerrdb_server --port 8787``, then set the ThemerrDB URL setting of the addon to
+``http://<host>:8787``. With ``--write <directory>``, the items are written to the directory instead, to test a local
+ThemerrDB directory.
+"""
+# standard imports
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# the databases served for each database type, matching the paths used by the addon
+databases = {
+    'movies': ('themoviedb', 'imdb'),
+    'movie_collections': ('themoviedb',),
+    'tv_shows': ('themoviedb',),
+}
+
+path_pattern = re.compile(r'^/(?P<db_type>\w+)/(?P<db>\w+)/(?P<db_id>\w+)\.json$')
+
+
+def youtube_id(db_type, db, db_id):
+    # type: (str, str, str) -> str
+    """Get a stable, fake YouTube video id for an item."""
+    digest = hashlib.sha1(f'{db_type}/{db}/{db_id}'.encode('utf-8')).hexdigest()
+    return digest[:11]
+
+
+def item_number(db, db_id):
+    # type: (str, str) -> int
+    """Get the number of an item from its id, ``0`` if it is not a valid id for the database."""
+    if db == 'imdb':
+        match = re.match(r'^tt(\d+)$', db_id)
+        return int(match.group(1)) if match else 0
+    return int(db_id) if db_id.isdigit() else 0
+
+
+def generate_item(db_type, db, db_id):
+    # type: (str, str, str) -> dict
+    """Generate a ThemerrDB-shaped item. Movies belong to a collection, three movies per collection."""
+    video_id = youtube_id(db_type=db_type, db=db, db_id=db_id)
+    item = {
+        'id': db_id,
+        'title': f'{db_type} {db_id}',
+        'youtube_theme_url': f'https://www.youtube.com/watch?v={video_id}',
+        'youtube_theme_added': '2023-01-01T00:00:00Z',
+        'youtube_theme_edited': '2023-01-01T00:00:00Z',
+    }
+    if db_type == 'movies':
+        collection_id = (item_number(db=db, db_id=db_id) + 2) // 3
+        item['belongs_to_collection'] = {'id': collection_id, 'name': f'movie_collections {collection_id}'}
+    return item
+
+
+def write_items(directory, count):
+    # type: (str, int) -> int
+    """Write the generated items to a directory, in the ThemerrDB layout. Returns the number of files written."""
+    written = 0
+    for db_type, dbs in databases.items():
+        for db in dbs:
+            os.makedirs(os.path.join(directory, db_type, db), exist_ok=True)
+            for number in range(1, count + 1):
+                db_id = f'tt{number:07d}' if db == 'imdb' else str(number)
+                with open(os.path.join(directory, db_type, db, f'{db_id}.json'), 'w') as f:
+                    json.dump(generate_item(db_type=db_type, db=db, db_id=db_id), f)
+                written += 1
+    return written
+
+
+class ThemerrDBRequestHandler(BaseHTTPRequestHandler):
+    """Serves generated items, injecting the faults configured on the server."""
+    server: 'ThemerrDBServer'
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+
+        delay = server.latency + server.random.uniform(0, server.jitter) if server.jitter else server.latency
+        if delay:
+            time.sleep(delay)
+
+        match = path_pattern.match(self.path.split('?')[0])
+        if not match:
+            self.send_error(404)
+            return
+
+        db_type, db, db_id = match.group('db_type'), match.group('db'), match.group('db_id')
+        number = item_number(db=db, db_id=db_id)
+        if db not in databases.get(db_type, ()) or not 0 < number <= server.count:
+            self.send_error(404)
+            return
+
+        roll = server.random.random()
+        if roll < server.error_rate:
+            self.send_error(500)
+            return
+        if roll < server.error_rate + server.not_found_rate:
+            self.send_error(404)
+            return
+
+        body = json.dumps(generate_item(db_type=db_type, db=db, db_id=db_id)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if not server.slow_body:
+            self.wfile.write(body)
+            return
+
+        # dribble the body out over slow_body seconds
+        chunk_size = max(1, len(body) // 10)
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        for chunk in chunks:
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(server.slow_body / len(chunks))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ThemerrDBServer(ThreadingHTTPServer):
+    """
+    A local stand-in for ThemerrDB.
+
+    Items with ids from 1 to ``count`` exist for every database, e.g. ``/movies/themoviedb/1.json`` or
+    ``/movies/imdb/tt0000001.json``. The fault settings are attributes, and can be changed while the server runs.
+
+    :param port: int - port to listen on, ``0`` picks a free port
+    :param host: str - address to bind to
+    :param count: int - number of items in each database
+    :param latency: float - seconds to wait before each response
+    :param jitter: float - maximum random seconds added to the latency
+    :param error_rate: float - ratio of existing items answered with a 500 error
+    :param not_found_rate: float - ratio of existing items answered with a 404 error
+    :param slow_body: float - seconds taken to send each response body
+    :param seed: int - seed for the random faults
+    :param verbose: bool - log each request to stderr
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, host='127.0.0.1', count=10000, latency=0.0, jitter=0.0, error_rate=0.0,
+                 not_found_rate=0.0, slow_body=0.0, seed=None, verbose=False):
+        super().__init__((host, port), ThemerrDBRequestHandler)
+        self.count = count
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.slow_body = slow_body
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.requests = 0
+
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        # type: () -> str
+        """The base URL of the server."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count_request(self):
+        """Count a received request."""
+        with self._lock:
+            self.requests += 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve generated ThemerrDB data, with optional faults.')
+
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind to.')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on.')
+    parser.add_argument('--count', type=int, default=10000, help='Number of items in each database.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added to the latency.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Ratio of responses with a 500 error.')
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help='Ratio of responses with a 404 error.')
+    parser.add_argument('--slow-body', type=float, default=0.0, help='Seconds taken to send each response body.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random faults.')
+    parser.add_argument('--quiet', action='store_true', help='Do not log each request.')
+    parser.add_argument('--write', metavar='DIRECTORY', help='Write the items to a directory instead of serving them.')
+
+    args = parser.parse_args()
+
+    if args.write:
+        files = write_items(directory=args.write, count=args.count)
+        print(f'Wrote {files} ThemerrDB items to {args.write}')
+        raise SystemExit(0)
+
+    themerrdb_server = ThemerrDBServer(
+        port=args.port,
+        host=args.host,
+        count=args.count,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate,
+        slow_body=args.slow_body,
+        seed=args.seed,
+        verbose=not args.quiet,
+    )
+    print(f'Serving ThemerrDB stand-in at {themerrdb_server.url}')
+    try:
+        themerrdb_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        themerrdb_server.server_close()
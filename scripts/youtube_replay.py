@@ -0,0 +1,137 @@
+# coding=utf-8
+"""
+..
+   youtube_replay.py
+
+Record ``YoutubeDL.extract_info`` results, and replay them without network access.
+
+Record a corpus entry with ``python -m scripts.youtube_replay --name <name> <url>``. Entries are trimmed to the fields
+used by the addon, and format URLs are replaced, as they expire and contain the address of the recording machine.
+"""
+# standard imports
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(script_dir)
+corpus_dir = os.path.join(root_dir, 'tests', 'data', 'youtube')
+
+# the fields kept when recording
+info_fields = ('id', 'title', 'webpage_url', 'extractor', 'duration')
+format_fields = ('format_id', 'format', 'ext', 'acodec', 'vcodec', 'abr', 'tbr', 'height', 'filesize',
+                 'filesize_approx')
+
+
+def trim_info(info):
+    # type: (dict) -> dict
+    """Trim an info dict to the fields used by the addon."""
+    trimmed = {key: info[key] for key in info_fields if key in info}
+
+    if 'entries' in info:
+        trimmed['entries'] = [trim_info(entry) for entry in info['entries'] if entry]
+        return trimmed
+
+    trimmed['formats'] = []
+    for fmt in info.get('formats', []):
+        trimmed_fmt = {key: fmt[key] for key in format_fields if key in fmt}
+        trimmed_fmt['url'] = f"https://rr.googlevideo.com/videoplayback?id={info.get('id')}&itag={fmt.get('format_id')}"
+        trimmed['formats'].append(trimmed_fmt)
+
+    return trimmed
+
+
+def load_corpus(directory=corpus_dir):
+    # type: (str) -> dict
+    """Load the corpus entries, by name.
+
+    Each entry has the recorded ``url``, and either the ``info`` returned by ``extract_info`` or the ``error`` it
+    raised, and the ``expected`` audio URL selected by the addon.
+    """
+    corpus = {}
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith('.json'):
+            with open(os.path.join(directory, file_name)) as f:
+                corpus[file_name[:-len('.json')]] = json.load(f)
+
+    return corpus
+
+
+class ReplayExtractor:
+    """
+    Replays recorded ``extract_info`` results by URL.
+
+    URLs which are not in the corpus fail like an unavailable video. Errors are raised as a ``DownloadError`` wrapping
+    the ``ExtractorError`` of the extractor, as ``YoutubeDL.extract_info`` does.
+
+    :param corpus: dict - corpus entries, as returned by ``load_corpus``
+    :param delay: float - seconds to wait before each result
+    :param jitter: float - maximum random seconds added to the delay
+    :param seed: int - seed for the random jitter
+    """
+    def __init__(self, corpus, delay=0.0, jitter=0.0, seed=None):
+        self.entries = {entry['url']: entry for entry in corpus.values()}
+        self.delay = delay
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls = 0
+
+        self._lock = threading.Lock()
+
+    def extract_info(self, url, download=True, **kwargs):
+        # type: (str, bool, ...) -> dict
+        """Replay the recorded result for a URL, with the same signature as ``YoutubeDL.extract_info``."""
+        # import here, as youtube_dl is not available to the scripts outside of tests
+        from src.themerr.youtube import youtube_dl
+
+        with self._lock:
+            self.calls += 1
+            delay = self.delay + self.random.uniform(0, self.jitter) if self.jitter else self.delay
+
+        if delay:
+            time.sleep(delay)
+
+        entry = self.entries.get(url)
+        if entry is None or 'error' in entry:
+            message = f'{url}: Video unavailable' if entry is None else entry['error']
+            try:
+                raise youtube_dl.utils.ExtractorError(message, expected=True)
+            except youtube_dl.utils.ExtractorError as e:
+                # extract_info reports extractor errors, which raises a DownloadError with the original exc_info
+                raise youtube_dl.utils.DownloadError(f'ERROR: {e}', sys.exc_info())
+
+        return copy.deepcopy(entry['info'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record an extract_info result into the replay corpus.')
+
+    parser.add_argument('--name', required=True, help='Name of the corpus entry, e.g. opus_only.')
+    parser.add_argument('url', help='URL of the YouTube video or playlist.')
+
+    args = parser.parse_args()
+
+    # the kodi modules must be bootstrapped before the addon can be imported
+    from scripts.bootstrap_kodi import bootstrap_modules
+    bootstrap_modules()
+
+    from src.themerr import youtube
+
+    with youtube.youtube_dl.YoutubeDL(params=dict(youtube_include_dash_manifest=False)) as ydl:
+        recorded = trim_info(ydl.extract_info(url=args.url, download=False))
+
+    corpus_entry = dict(
+        url=args.url,
+        info=recorded,
+        expected=youtube.select_audio_url(result=recorded),
+    )
+    with open(os.path.join(corpus_dir, f'{args.name}.json'), 'w') as f:
+        json.dump(corpus_entry, f, indent=2)
+        f.write('\n')
+
+    print(f"Recorded {args.name}, expected audio URL: {corpus_entry['expected']}")
@@ -0,0 +1,25 @@
+"""
+Script entry point for Themerr.
+"""
+# standard imports
+import sys
+
+# lib imports
+from themerr import actions
+
+
+def main():
+    """
+    Script entry point for Themerr.
+
+    Runs the action given in the script arguments, e.g. ``RunScript(service.themerr,metrics)``.
+
+    Examples
+    --------
+    >>> main()
+    """
+    actions.run(argv=sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()  # pragma: no cover
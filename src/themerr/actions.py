@@ -0,0 +1,106 @@
+# standard imports
+from typing import List
+
+# kodi imports
+import xbmc
+import xbmcgui
+
+# local imports
+from . import constants
+from . import logger
+from . import metrics
+from . import settings
+from . import tracing
+
+log = logger.log
+
+
+def show_metrics():
+    """
+    Show the metrics published by the service in a text viewer dialog.
+
+    The metrics are read from the snapshot the service publishes to the Kodi home window.
+
+    Examples
+    --------
+    >>> show_metrics()
+    """
+    snapshot = metrics.read_published()
+    if snapshot:
+        text = metrics.format_snapshot(snapshot=snapshot)
+    else:
+        text = f"No metrics have been published yet. Is the {constants.name} service running?"
+
+    xbmcgui.Dialog().textviewer(f"{constants.name} metrics", text, usemono=True)
+
+
+def show_traces():
+    """
+    Show the time-to-theme trace report published by the service in a text viewer dialog.
+
+    The report contains percentiles of each phase between an item being selected and its theme being heard.
+
+    Examples
+    --------
+    >>> show_traces()
+    """
+    report = tracing.read_published()
+    if report:
+        text = metrics.format_snapshot(snapshot=report)
+    else:
+        text = f"No traces have been published yet. Is the {constants.name} service running?"
+
+    xbmcgui.Dialog().textviewer(f"{constants.name} traces", text, usemono=True)
+
+
+def start_profiler():
+    """
+    Ask the service to start a profiling run.
+
+    The profiler runs inside the service, so the request is sent with ``NotifyAll`` and the mode and duration are read
+    from the addon settings by the service.
+
+    Examples
+    --------
+    >>> start_profiler()
+    """
+    xbmc.executebuiltin(f'NotifyAll({constants.addon_id},profile)')
+
+    duration = settings.settings.profile_duration()
+    xbmcgui.Dialog().notification(
+        heading=f"{constants.name} profiler",
+        message=f"Profiling for {duration} seconds, the output is written to the addon profile directory",
+        icon=xbmcgui.NOTIFICATION_INFO,
+    )
+
+
+actions = {
+    'metrics': show_metrics,
+    'traces': show_traces,
+    'profile': start_profiler,
+}
+
+
+def run(argv: List[str]):
+    """
+    Run a script action.
+
+    The first argument is the name of the action to run, the metrics action is used if no arguments are given.
+
+    Parameters
+    ----------
+    argv : List[str]
+        The script arguments, excluding the script name.
+
+    Examples
+    --------
+    >>> run(argv=['metrics'])
+    """
+    action = argv[0] if argv else 'metrics'
+
+    try:
+        function = actions[action]
+    except KeyError:
+        log.error(f"Unknown script action: {action}")
+    else:
+        function()
@@ -0,0 +1,177 @@
+# standard imports
+import threading
+from typing import Dict, List, Optional
+
+# local imports
+from . import metrics
+
+
+class AliasIndex:
+    """
+    Links the unique ids of an item to one canonical id.
+
+    Kodi exposes different unique ids of the same item in different views, e.g. only the IMDb id in one skin and both
+    the TMDb and IMDb ids in another. Every id seen together is linked to the canonical id of the item, so the item is
+    cached and looked up once, whichever id is shown. The canonical id is the first id of the first ``link`` of the
+    item, so cached entries keep their id when more ids are linked. When ids which were seen apart are later seen
+    together, their items are merged into the canonical id of the first of them.
+
+    Attributes
+    ----------
+    size : metrics.Gauge
+        The number of linked ids.
+
+    Methods
+    -------
+    link(ids: List[str]) -> Optional[str]
+        Link the unique ids of an item.
+    canonical(kodi_id: str) -> str
+        Get the canonical id of an id.
+    ids(kodi_id: str) -> List[str]
+        Get all ids linked to the item of an id.
+    remove(kodi_id: str) -> List[str]
+        Remove the item of an id.
+
+    Examples
+    --------
+    >>> index = AliasIndex()
+    >>> index.link(ids=['tmdb_1', 'imdb_tt0000001'])
+    'tmdb_1'
+    >>> index.canonical(kodi_id='imdb_tt0000001')
+    'tmdb_1'
+    """
+    def __init__(self):
+        self._canonical: Dict[str, str] = {}  # id -> canonical id
+        self._ids: Dict[str, List[str]] = {}  # canonical id -> linked ids, in the order they were linked
+        self._lock = threading.Lock()
+
+        self.size = metrics.registry.gauge(
+            name='alias_index_size',
+            description='Number of unique ids linked to a canonical id',
+            function=lambda: len(self._canonical),
+        )
+
+    def link(self, ids: List[str]) -> Optional[str]:
+        """
+        Link the unique ids of an item.
+
+        The window watcher calls this with every unique id of the selected item, in the order of the supported
+        databases.
+
+        Parameters
+        ----------
+        ids : List[str]
+            The Kodi IDs of one item, e.g. ``['tmdb_1', 'imdb_tt0000001']``.
+
+        Returns
+        -------
+        Optional[str]
+            The canonical id of the item, or None if there are no ids.
+
+        Examples
+        --------
+        >>> AliasIndex().link(ids=['imdb_tt0000001'])
+        'imdb_tt0000001'
+        """
+        if not ids:
+            return None
+
+        with self._lock:
+            known = [self._canonical[kodi_id] for kodi_id in ids if kodi_id in self._canonical]
+            canonical = known[0] if known else ids[0]
+            linked = self._ids.setdefault(canonical, [canonical])
+
+            for kodi_id in ids:
+                other = self._canonical.get(kodi_id, kodi_id)
+                if other == canonical:
+                    if kodi_id not in self._canonical:
+                        self._canonical[kodi_id] = canonical
+                        if kodi_id not in linked:
+                            linked.append(kodi_id)
+                    continue
+
+                # merge the item of this id, which may have been linked to other ids before
+                for alias in self._ids.pop(other, [other]):
+                    self._canonical[alias] = canonical
+                    if alias not in linked:
+                        linked.append(alias)
+
+            self._canonical[canonical] = canonical
+            return canonical
+
+    def canonical(self, kodi_id: str) -> str:
+        """
+        Get the canonical id of an id.
+
+        Ids which were never linked are their own canonical id.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID.
+
+        Returns
+        -------
+        str
+            The canonical id.
+
+        Examples
+        --------
+        >>> AliasIndex().canonical(kodi_id='tmdb_1')
+        'tmdb_1'
+        """
+        with self._lock:
+            return self._canonical.get(kodi_id, kodi_id)
+
+    def ids(self, kodi_id: str) -> List[str]:
+        """
+        Get all ids linked to the item of an id.
+
+        The lookup uses these to fall back to the other ids of an item, when its canonical id is not in ThemerrDB.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID.
+
+        Returns
+        -------
+        List[str]
+            The linked ids, the canonical id first.
+
+        Examples
+        --------
+        >>> AliasIndex().ids(kodi_id='tmdb_1')
+        ['tmdb_1']
+        """
+        with self._lock:
+            canonical = self._canonical.get(kodi_id, kodi_id)
+            return list(self._ids.get(canonical, [canonical]))
+
+    def remove(self, kodi_id: str) -> List[str]:
+        """
+        Remove the item of an id.
+
+        Every id linked to the item is removed, e.g. when the item was removed from the library.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the item, any of its linked ids.
+
+        Returns
+        -------
+        List[str]
+            The removed ids, the canonical id first.
+
+        Examples
+        --------
+        >>> AliasIndex().remove(kodi_id='tmdb_1')
+        ['tmdb_1']
+        """
+        with self._lock:
+            canonical = self._canonical.get(kodi_id, kodi_id)
+            ids = self._ids.pop(canonical, [canonical])
+            for alias in ids:
+                self._canonical.pop(alias, None)
+            return ids
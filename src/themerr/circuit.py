@@ -0,0 +1,269 @@
+# standard imports
+import threading
+import time
+from typing import Callable
+
+# local imports
+from . import logger
+from . import metrics
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+states = (CLOSED, HALF_OPEN, OPEN)
+
+transitions = metrics.registry.counter(
+    name='circuit_transitions_total',
+    description='Circuit breaker state changes, by endpoint and new state',
+)
+rejections = metrics.registry.counter(
+    name='circuit_rejections_total',
+    description='Requests failed fast by an open circuit breaker, by endpoint',
+)
+
+
+class CircuitBreaker:
+    """
+    A thread safe circuit breaker for an endpoint.
+
+    The breaker starts closed, and requests are allowed. After ``failure_threshold`` consecutive failures it opens,
+    and requests fail fast without reaching the endpoint. Once ``reset_timeout`` seconds have passed, it is half-open,
+    and a single probe request is allowed. A successful probe closes the breaker, a failed probe opens it again.
+
+    State changes are logged, and the state is exported as the ``<name>_circuit_state`` gauge, with 0 for closed, 1
+    for half-open and 2 for open.
+
+    Parameters
+    ----------
+    name : str
+        The name of the endpoint, used in logs and metrics.
+    failure_threshold : int
+        The number of consecutive failures which open the breaker.
+    reset_timeout : float
+        The number of seconds the breaker stays open before a probe is allowed.
+    clock : Callable[[], float]
+        The clock used for the reset timeout, in seconds. Defaults to ``time.monotonic``.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    name : str
+        The name of the endpoint.
+    failure_threshold : int
+        The number of consecutive failures which open the breaker.
+    reset_timeout : float
+        The number of seconds the breaker stays open before a probe is allowed.
+    clock : Callable[[], float]
+        The clock used for the reset timeout.
+    failures : int
+        The number of consecutive failures.
+
+    Methods
+    -------
+    state() -> str
+        Get the state of the breaker.
+    healthy() -> bool
+        Check if the last request to the endpoint succeeded.
+    blocked() -> bool
+        Check if requests are being rejected, without taking the probe.
+    allow() -> bool
+        Check if a request may be made.
+    success()
+        Record a successful request.
+    failure()
+        Record a failed request.
+    reset()
+        Close the breaker and forget the failures.
+
+    Examples
+    --------
+    >>> breaker = CircuitBreaker(name='example')
+    >>> if breaker.allow():
+    ...     breaker.success()
+    """
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.log = logger.log
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_at = None  # the clock value when the running probe was allowed
+        self._lock = threading.Lock()
+
+        metrics.registry.gauge(
+            name=f'{name}_circuit_state',
+            description=f'State of the {name} circuit breaker (0 closed, 1 half-open, 2 open)',
+            function=lambda: states.index(self._state),
+        )
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        self._state = state
+        transitions.inc(labels=dict(endpoint=self.name, state=state))
+
+        if state == OPEN:
+            self.log.warning(f"{self.name} circuit breaker opened after {self.failures} failures, failing fast for "
+                             f"{self.reset_timeout:g} seconds")
+        elif state == HALF_OPEN:
+            self.log.info(f"{self.name} circuit breaker half-open, probing")
+        else:
+            self.log.info(f"{self.name} circuit breaker closed")
+
+    def state(self) -> str:
+        """
+        Get the state of the breaker.
+
+        An open breaker is reported as half-open once the reset timeout has passed, even before the probe is made.
+
+        Returns
+        -------
+        str
+            ``closed``, ``half_open`` or ``open``.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').state()
+        'closed'
+        """
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def healthy(self) -> bool:
+        """
+        Check if the last request to the endpoint succeeded.
+
+        Callers use this to tell a missing result from an unreachable endpoint, e.g. to avoid caching the result of a
+        failed request for long.
+
+        Returns
+        -------
+        bool
+            True if the breaker is closed without failures, otherwise False.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').healthy()
+        True
+        """
+        with self._lock:
+            return self._state == CLOSED and self.failures == 0
+
+    def blocked(self) -> bool:
+        """
+        Check if requests are being rejected, without taking the probe.
+
+        Callers use this before waiting for a rate limit token, so no token is spent on a request which ``allow``
+        would reject. Unlike ``allow``, the probe of a half-open breaker is left for the request itself.
+
+        Returns
+        -------
+        bool
+            True if the breaker is open, or half-open with a probe in progress, otherwise False.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').blocked()
+        False
+        """
+        with self._lock:
+            now = self.clock()
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN:
+                return now - self._opened_at < self.reset_timeout
+            return self._probe_at is not None and now - self._probe_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        """
+        Check if a request may be made.
+
+        Every allowed request must be followed by ``success`` or ``failure``. Rejected requests are counted.
+
+        Returns
+        -------
+        bool
+            True if the breaker is closed, or this is the probe of a half-open breaker, otherwise False.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').allow()
+        True
+        """
+        with self._lock:
+            now = self.clock()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._transition(state=HALF_OPEN)
+
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and (self._probe_at is None or now - self._probe_at >= self.reset_timeout):
+                self._probe_at = now  # a probe which never reported is replaced after the reset timeout
+                return True
+
+            rejections.inc(labels=dict(endpoint=self.name))
+            return False
+
+    def success(self):
+        """
+        Record a successful request.
+
+        The failures are forgotten, and a half-open breaker is closed.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').success()
+        """
+        with self._lock:
+            self.failures = 0
+            self._probe_at = None
+            self._transition(state=CLOSED)
+
+    def failure(self):
+        """
+        Record a failed request.
+
+        The breaker opens once the failure threshold is reached, or immediately if the request was the probe.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').failure()
+        """
+        with self._lock:
+            self.failures += 1
+            self._probe_at = None
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                self._transition(state=OPEN)
+
+    def reset(self):
+        """
+        Close the breaker and forget the failures.
+
+        The state change is logged and counted like any other.
+
+        Examples
+        --------
+        >>> CircuitBreaker(name='example').reset()
+        """
+        with self._lock:
+            self.failures = 0
+            self._probe_at = None
+            self._transition(state=CLOSED)
+
+
+themerrdb = CircuitBreaker(name='themerrdb')
+youtube = CircuitBreaker(name='youtube')
@@ -1,3 +1,4 @@
 name = "Themerr"
 addon_type = "service"
 addon_id = f"{addon_type}.{name.lower()}"
+themerrdb_url = "https://app.lizardbyte.dev/ThemerrDB"
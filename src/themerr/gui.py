@@ -1,7 +1,10 @@
 # standard imports
+from concurrent import futures
 from datetime import datetime
-import json
-from typing import List, Optional, Set, Union
+import random
+import threading
+import time
+from typing import List, Optional, Set, Tuple, Union
 
 # lib imports
 import requests
@@ -10,10 +13,65 @@ import requests
 import xbmc
 
 # local imports
+from . import aliases
+from . import circuit
+from . import jsonrpc
+from . import library
 from . import logger
+from . import metrics
 from . import monitor
 from . import player
+from . import prefetch
+from . import profiler
+from . import ratelimit
+from . import recorder
+from . import scheduler
 from . import settings
+from . import sources
+from . import throttle
+from . import tracing
+from . import watchdog
+
+# cached YouTube URLs are refreshed after the ttl, less up to the jitter ratio so entries cached together are spread out
+cache_ttl = 3600
+cache_ttl_jitter = 0.1
+# stale URLs are kept when a refresh fails, for up to this many seconds since they were fetched
+cache_max_stale = 86400
+cache_retry = 300
+
+tick_duration = metrics.registry.histogram(
+    name='watcher_tick_seconds',
+    description='Duration of a window watcher tick, excluding the sleep',
+)
+cache_lookups = metrics.registry.counter(
+    name='cache_lookups_total',
+    description='Cache lookups of newly selected items, by result (hit, miss, stale)',
+)
+metrics.registry.gauge(
+    name='cache_hit_ratio',
+    description='Ratio of cache lookups which were fresh hits',
+    function=lambda: cache_lookups.get(labels=dict(result='hit')) / max(1, cache_lookups.total()),
+)
+themerrdb_latency = metrics.registry.histogram(
+    name='themerrdb_request_seconds',
+    description='Latency of ThemerrDB requests',
+)
+themerrdb_requests = metrics.registry.counter(
+    name='themerrdb_requests_total',
+    description='ThemerrDB requests, by status code',
+)
+cache_refreshes = metrics.registry.counter(
+    name='cache_refreshes_total',
+    description='Refreshes of stale cache entries, by result (updated, kept_stale)',
+)
+alias_fallbacks = metrics.registry.counter(
+    name='alias_fallbacks_total',
+    description='Lookups of the other unique ids of an item not found by its first id, by result (found, missed)',
+)
+focus_to_play = metrics.registry.histogram(
+    name='focus_to_play_seconds',
+    description='Time from an item being selected to its theme starting',
+)
 
 
 class Window:
@@ -26,6 +84,9 @@ class Window:
     ----------
     player_instance : Optional[player.Player]
         A player instance to use for testing purposes.
+    monitor_instance : Optional[monitor.ThemerrMonitor]
+        The monitor of the service, which then also applies library changes to this window. A new monitor is created
+        if not provided.
 
     Attributes
     ----------
@@ -35,6 +96,18 @@ class Window:
         The monitor object.
     player : player.Player
         The player object.
+    watchdog : watchdog.Watchdog
+        The watchdog for slow window watcher ticks.
+    recorder : recorder.NavigationRecorder
+        The opt-in recorder for focus changes.
+    scheduler : scheduler.LookupScheduler
+        The priority queue for ThemerrDB lookups.
+    throttle : throttle.DwellThrottle
+        Delays lookups of items which are only focused while scrolling.
+    prefetcher : prefetch.Prefetcher
+        Predicts the items to prefetch from the movement of the focus.
+    aliases : aliases.AliasIndex
+        Links the unique ids of an item, so it is cached under one Kodi ID.
     item_selected_for : int
         The number of seconds the current item has been selected for.
     playing_item_not_selected_for : int
@@ -42,22 +115,57 @@ class Window:
     current_selected_item_id : Optional[int]
         The current selected item ID.
     last_selected_item_id : Optional[int]
-        The last selected item ID.
+        The item ID selected during the previous tick.
+    item_focused_at : float
+        The ``time.monotonic()`` value when the current item was selected.
+    lookup_submitted : bool
+        Whether the lookups for the current item, and the items ahead of it, were submitted.
     uuid_mapping : dict
         A mapping of uuids to YouTube URLs.
         The UUID will be the database type and the database ID, separated by an underscore. e.g. `tmdb_1`
-        This is used to cache the YouTube URLs for faster lookups.
+        Items are cached under their canonical id in the alias index, whichever of their ids is shown.
+        Reads and writes hold a lock, as the window watcher, the lookup workers and the monitor share the cache.
+        This is used to cache the YouTube URLs for faster lookups. Each entry has the ``youtube_url``, the
+        ``timestamp`` it was fetched at, and the jittered ``refresh_at`` timestamp after which it is stale.
 
     Methods
     -------
     window_watcher()
         The main method that watches for changes to the Kodi window.
+    tick(timeout: float)
+        Run a single iteration of the window watcher.
+    cache_status(kodi_id: str) -> str
+        Get the status of the cached YouTube URL for a Kodi ID.
+    container_type() -> str
+        Get the type of the current container.
     pre_checks()
         Perform pre-checks before starting/stopping the theme.
+    database_type() -> Optional[str]
+        Get the ThemerrDB database type of the current container.
+    list_item_ids(prefix: str) -> List[str]
+        Get the Kodi IDs of the unique ids of a list item.
+    link_ids(ids: List[str]) -> Optional[str]
+        Link the unique ids of an item, and get its Kodi ID.
+    tv_show_id() -> Optional[str]
+        Get the Kodi ID of the TV show of the selected season or episode.
+    movie_set_id(prefix: str) -> Optional[str]
+        Get the Kodi ID of a movie set without unique ids.
+    item_id(offset: int) -> Optional[str]
+        Get the Kodi ID of an item relative to the selected item.
+    remember_library_item(prefix: str, ids: List[str])
+        Remember the library item of a list item.
+    prefetch()
+        Queue lookups for the items ahead of the scroll.
+    library_changed(changes: List[Tuple[str, str, int]])
+        Update the cache for changes of the video library.
+    lookup(kodi_id: str, db_type: Optional[str], lane: int = scheduler.FOCUSED)
+        Look up and cache the YouTube URL of a Kodi ID.
     process_kodi_id(kodi_id: str)
         Process the Kodi ID and return a YouTube URL.
     process_movie(kodi_id: int)
         Process the Kodi ID and return a dictionary of IDs.
+    find_aliased_youtube_url(kodi_id: str, db_type: str, interactive: bool = True) -> Optional[str]
+        Find the YouTube URL of an item by any of its unique ids.
     find_youtube_url(kodi_id: str, db_type: str)
         Find the YouTube URL from the IDs.
     any_true(check: Optional[bool] = None, checks: Optional[Union[List[bool], Set[bool]]] = ())
@@ -83,19 +191,32 @@ class Window:
     >>> window = Window(player_instance=player.Player())
     >>> window.window_watcher()
     """
-    def __init__(self, player_instance=None):
+    def __init__(self, player_instance=None, monitor_instance=None):
         self.log = logger.log
-        self.monitor = monitor.ThemerrMonitor()
+
+        # share the monitor of the service, so each notification is only handled once
+        self.monitor = monitor_instance if monitor_instance else monitor.ThemerrMonitor()
+        self.monitor.library_handler = self.library_changed
 
         # allow providing a player for test purposes
         self.player = player_instance if player_instance else player.Player()
 
+        self.watchdog = watchdog.Watchdog(monitor=self.monitor)
+        self.recorder = recorder.NavigationRecorder()
+        self.scheduler = scheduler.LookupScheduler(handler=self.lookup, monitor=self.monitor)
+        self.throttle = throttle.DwellThrottle()
+        self.prefetcher = prefetch.Prefetcher()
+        self.aliases = aliases.AliasIndex()
+
         self.item_selected_for = 0
         self.playing_item_not_selected_for = 0
         self.current_selected_item_id = None
         self.last_selected_item_id = None
+        self.item_focused_at = time.monotonic()
         self.uuid_mapping = {}
+        self._cache_lock = threading.Lock()  # the cache is shared by the watcher, the lookup workers and the monitor
         self.last_selected_show_id = None
+        self.lookup_submitted = False
 
         self._kodi_db_map = {
             'tmdb': 'themoviedb',
@@ -119,7 +240,8 @@ class Window:
         """
         Watch the Kodi window for changes.
 
-        This method is the main method that watches for changes to the Kodi window.
+        This method is the main method that watches for changes to the Kodi window. Errors raised by a tick are logged,
+        so the watcher keeps running.
 
         Examples
         --------
@@ -135,68 +257,185 @@ class Window:
             timeout_factor = settings.settings.theme_timeout()
             timeout = timeout_factor * (1000 / sleep_time)
 
-            selected_title = xbmc.getInfoLabel("ListItem.Label")  # this is only used for logging
+            self.watchdog.tick_started()
+            try:
+                with tick_duration.time(), profiler.profiler.profile():
+                    self.tick(timeout=timeout)
+            except Exception as e:
+                # an error in one tick must not stop themes for the rest of the session
+                self.log.error(f"Window watcher tick failed: {e}")
+            finally:
+                self.watchdog.tick_finished()
 
-            kodi_id = None
+            # this is used for our timeout counter
+            xbmc.sleep(sleep_time)
 
-            if self.is_seasons() or self.is_episodes():
-                kodi_id = self.last_selected_show_id
+        self.log.debug("Window watcher stopped")
 
-            if not kodi_id:
-                for db in self._dbs:
-                    db_id = xbmc.getInfoLabel(f'ListItem.UniqueID({db})')
-                    if db_id:
-                        kodi_id = f"{db}_{db_id}"
+    def tick(self, timeout: float):
+        """
+        Run a single iteration of the window watcher.
 
-                        if self.is_tv_shows():
-                            # TheMovieDB TV Shows addon does not set uniqueID properly for seasons and episodes.
-                            # So we will use the last selected TV show ID instead.
-                            # See: https://github.com/xbmc/metadata.tvshows.themoviedb.org.python/issues/119
-                            self.last_selected_show_id = kodi_id
-                        break  # break on the first supported db
+        The selected item is checked, its YouTube URL is prefetched, and the theme is started or stopped as needed.
+        Uncached items are only looked up once they have been focused for the dwell time of the throttle, then the items
+        ahead of the scroll are prefetched. Stale items are played from the cache, and refreshed in the warmup lane.
+        Lookups are queued in the scheduler, and run on this thread if no lookup worker is running.
 
-            # prefetch the YouTube url (if not already cached or cache is greater than 1 hour)
-            if kodi_id and (kodi_id not in list(self.uuid_mapping.keys())
-                            or (datetime.now().timestamp() - self.uuid_mapping[kodi_id]['timestamp']) > 3600):
-                self.uuid_mapping[kodi_id] = {
-                    'timestamp': datetime.now().timestamp(),
-                    'youtube_url': self.process_kodi_id(kodi_id=kodi_id)
-                }
+        Parameters
+        ----------
+        timeout : float
+            The number of ticks an item must be selected, or not selected, before the theme is started or stopped.
 
-            # this is used for our timeout counter
-            xbmc.sleep(sleep_time)
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.tick(timeout=60)
+        """
+        selected_title = xbmc.getInfoLabel("ListItem.Label")  # this is only used for logging
+
+        kodi_id = None
+        ids = []
+
+        if self.is_seasons() or self.is_episodes():
+            kodi_id = self.tv_show_id() or self.last_selected_show_id
+
+        if not kodi_id:
+            ids = self.list_item_ids(prefix='ListItem')
+            kodi_id = self.link_ids(ids=ids) or self.movie_set_id(prefix='ListItem')
+
+            if kodi_id and self.is_tv_shows():
+                # TheMovieDB TV Shows addon does not set uniqueID properly for seasons and episodes.
+                # So we will use the last selected TV show ID instead.
+                # See: https://github.com/xbmc/metadata.tvshows.themoviedb.org.python/issues/119
+                self.last_selected_show_id = kodi_id
+
+        if kodi_id != self.last_selected_item_id:
+            if self.last_selected_item_id and not self.lookup_submitted \
+                    and self.cache_status(kodi_id=self.last_selected_item_id) != 'hit':
+                throttle.throttled_lookups.inc()
+            self.last_selected_item_id = kodi_id
+            self.item_focused_at = time.monotonic()
+            self.lookup_submitted = False
+            position = int(xbmc.getInfoLabel('Container.CurrentItem') or 0)
+            self.throttle.focus_changed(at=self.item_focused_at)
+            self.prefetcher.moved(position=position, at=self.item_focused_at)
+            self.scheduler.focus(kodi_id=kodi_id)
+            if ids:
+                self.remember_library_item(prefix='ListItem', ids=ids)
+            if kodi_id:
+                tracing.tracer.start(kodi_id=kodi_id)
+                cache_lookups.inc(labels=dict(result=self.cache_status(kodi_id=kodi_id)))
+                self.prefetcher.selected(kodi_id=kodi_id)
+            if self.recorder.enabled():
+                self.recorder.record(container=self.container_type(), index=position, kodi_id=kodi_id)
+            else:
+                self.recorder.close()
+
+        # prefetch the YouTube url (if not already cached or cache is greater than 1 hour)
+        if kodi_id and not self.lookup_submitted \
+                and self.throttle.ready(focused_at=self.item_focused_at, now=time.monotonic()):
+            status = self.cache_status(kodi_id=kodi_id)
+            if status != 'hit':
+                lane = scheduler.FOCUSED if status == 'miss' else scheduler.WARMUP
+                self.scheduler.submit(kodi_id=kodi_id, db_type=self.database_type(), lane=lane)
+            self.prefetch()
+            self.lookup_submitted = True
+        if not self.scheduler.running():
+            self.scheduler.run_next()
+
+        if not self.pre_checks():
+            return
+
+        if kodi_id == self.current_selected_item_id:
+            self.item_selected_for += 1
+        else:
+            self.item_selected_for = 0
+            self.current_selected_item_id = kodi_id
+
+        # Logic for stopping theme and potentially starting a new one
+        if self.player.theme_is_playing:
+            if self.player.theme_playing_kodi_id != kodi_id:
+                self.playing_item_not_selected_for += 1
+                if self.playing_item_not_selected_for >= timeout:
+                    self.log.debug(f"Stopping theme due to {timeout} seconds of non-selection")
+                    self.player.stop()
+                    self.playing_item_not_selected_for = 0
+            else:
+                self.playing_item_not_selected_for = 0
+        if not self.player.theme_is_playing and self.item_selected_for >= timeout:
+            with self._cache_lock:
+                entry = self.uuid_mapping.get(kodi_id)
+            youtube_url = entry.get('youtube_url') if entry else None
+            if not youtube_url:
+                return
+            self.log.debug(f"Playing theme for {selected_title}, ID: {kodi_id}")
+            self.player.play_url(
+                url=youtube_url,
+                kodi_id=kodi_id,
+            )
+            if self.player.theme_is_playing:
+                focus_to_play.observe(time.monotonic() - self.item_focused_at)
 
-            if not self.pre_checks():
-                continue
+    def cache_status(self, kodi_id: str) -> str:
+        """
+        Get the status of the cached YouTube URL for a Kodi ID.
 
-            if kodi_id == self.current_selected_item_id:
-                self.item_selected_for += 1
-            else:
-                self.item_selected_for = 0
-                self.current_selected_item_id = kodi_id
+        Cached URLs are considered stale after their ``refresh_at`` timestamp, which is jittered between 54 and 60
+        minutes after they were fetched.
 
-            # Logic for stopping theme and potentially starting a new one
-            if self.player.theme_is_playing:
-                if self.player.theme_playing_kodi_id != kodi_id:
-                    self.playing_item_not_selected_for += 1
-                    if self.playing_item_not_selected_for >= timeout:
-                        self.log.debug(f"Stopping theme due to {timeout} seconds of non-selection")
-                        self.player.stop()
-                        self.playing_item_not_selected_for = 0
-                else:
-                    self.playing_item_not_selected_for = 0
-            if not self.player.theme_is_playing and self.item_selected_for >= timeout:
-                if not self.uuid_mapping.get(kodi_id):
-                    continue
-                if not self.uuid_mapping[kodi_id].get('youtube_url'):
-                    continue
-                self.log.debug(f"Playing theme for {selected_title}, ID: {kodi_id}")
-                self.player.play_url(
-                    url=self.uuid_mapping[kodi_id]['youtube_url'],
-                    kodi_id=kodi_id,
-                )
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID to check.
 
-        self.log.debug("Window watcher stopped")
+        Returns
+        -------
+        str
+            ``hit`` if the cached URL is fresh, ``stale`` if it should be refreshed, otherwise ``miss``.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.cache_status(kodi_id='tmdb_1')
+        'miss'
+        """
+        with self._cache_lock:
+            entry = self.uuid_mapping.get(kodi_id)
+        if entry is None:
+            return 'miss'
+        if datetime.now().timestamp() > entry.get('refresh_at', entry['timestamp'] + cache_ttl):
+            return 'stale'
+        return 'hit'
+
+    def container_type(self) -> str:
+        """
+        Get the type of the current container.
+
+        The type is one of ``home``, ``sets``, ``movies``, ``tvshows``, ``seasons``, ``episodes`` or ``other``.
+
+        Returns
+        -------
+        str
+            The container type.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.container_type()
+        'other'
+        """
+        checks = (
+            ('home', self.is_home),
+            ('sets', self.is_movie_set),  # movie sets are shown in movie containers
+            ('movies', self.is_movies),
+            ('tvshows', self.is_tv_shows),
+            ('seasons', self.is_seasons),
+            ('episodes', self.is_episodes),
+        )
+        for container, check in checks:
+            if check():
+                return container
+        return 'other'
 
     def pre_checks(self) -> bool:
         """
@@ -236,6 +475,363 @@ class Window:
         self.log.debug("pre-checks passed")
         return True
 
+    def database_type(self) -> Optional[str]:
+        """
+        Get the ThemerrDB database type of the current container.
+
+        The type is read on the window watcher thread, as the container may have changed by the time a queued lookup
+        runs.
+
+        Returns
+        -------
+        Optional[str]
+            ``movies``, ``movie_collections`` or ``tv_shows``, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.database_type()
+        """
+        if self.is_movie_set():  # movie sets are shown in movie containers
+            return 'movie_collections'
+        elif self.is_movies():
+            return 'movies'
+        elif self.is_tv_shows():
+            return 'tv_shows'
+        elif self.is_episodes():
+            return 'tv_shows'
+        elif self.is_seasons():
+            return 'tv_shows'
+
+    def list_item_ids(self, prefix: str) -> List[str]:
+        """
+        Get the Kodi IDs of the unique ids of a list item.
+
+        Every supported unique id of the item is read, in the order of the databases.
+
+        Parameters
+        ----------
+        prefix : str
+            The info label of the list item, e.g. ``ListItem`` or ``Container.ListItem(1)``.
+
+        Returns
+        -------
+        List[str]
+            The Kodi IDs, e.g. ``['tmdb_1', 'imdb_tt0000001']``.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.list_item_ids(prefix='ListItem')
+        []
+        """
+        ids = []
+        for db in self._dbs:
+            db_id = xbmc.getInfoLabel(f'{prefix}.UniqueID({db})')
+            if db_id:
+                ids.append(f"{db}_{db_id}")
+        return ids
+
+    def link_ids(self, ids: List[str]) -> Optional[str]:
+        """
+        Link the unique ids of an item, and get its Kodi ID.
+
+        The ids are linked in the alias index, so the item has the same Kodi ID in every view, whichever of its ids
+        the view exposes. When ids which were cached apart are linked, the entry with a YouTube URL is kept under the
+        canonical id.
+
+        Parameters
+        ----------
+        ids : List[str]
+            The Kodi IDs of the unique ids of the item, in the order of the databases.
+
+        Returns
+        -------
+        Optional[str]
+            The canonical Kodi ID of the item, e.g. ``tmdb_1``, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.link_ids(ids=['tmdb_1', 'imdb_tt0000001'])
+        'tmdb_1'
+        """
+        kodi_id = self.aliases.link(ids=ids)
+        with self._cache_lock:
+            for alias in ids:
+                entry = self.uuid_mapping.pop(alias, None) if alias != kodi_id else None
+                if entry is None:
+                    continue  # not cached before the ids were linked
+                if not (self.uuid_mapping.get(kodi_id) or {}).get('youtube_url'):
+                    self.uuid_mapping[kodi_id] = entry
+        return kodi_id
+
+    def item_id(self, offset: int) -> Optional[str]:
+        """
+        Get the Kodi ID of an item relative to the selected item.
+
+        This links the unique IDs of ``Container.ListItem(offset)``, like the ones of the selected item, and remembers
+        its library item.
+
+        Parameters
+        ----------
+        offset : int
+            The position of the item, relative to the selected item.
+
+        Returns
+        -------
+        Optional[str]
+            The Kodi ID, e.g. ``tmdb_1``, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.item_id(offset=1)
+        """
+        prefix = f'Container.ListItem({offset})'
+        ids = self.list_item_ids(prefix=prefix)
+        self.remember_library_item(prefix=prefix, ids=ids)
+        return self.link_ids(ids=ids)
+
+    def remember_library_item(self, prefix: str, ids: List[str]):
+        """
+        Remember the library item of a list item.
+
+        The unique ids shown by the item are stored in the library resolver of its kind, by its database id, so the
+        cached entry of the item can be dropped when the item is removed from the library. Only items which are
+        selected or prefetched are remembered, as only those are cached, and the resolvers keep their size.
+
+        Parameters
+        ----------
+        prefix : str
+            The info label of the list item, e.g. ``ListItem``.
+        ids : List[str]
+            The Kodi IDs of the unique ids of the item.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.remember_library_item(prefix='ListItem', ids=['tmdb_1'])
+        """
+        resolver = dict(movie=library.movies, tvshow=library.tv_shows).get(xbmc.getInfoLabel(f'{prefix}.DBTYPE'))
+        dbid = xbmc.getInfoLabel(f'{prefix}.DBID')
+        if resolver and ids and dbid.isdigit():
+            resolver.update(items={int(dbid): dict(kodi_id.split('_', 1) for kodi_id in ids)})
+
+    def tv_show_id(self) -> Optional[str]:
+        """
+        Get the Kodi ID of the TV show of the selected season or episode.
+
+        Seasons and episodes do not have the unique ids of their TV show, so the show is resolved from
+        ``ListItem.TvShowDBID`` with JSON-RPC. The unique ids are cached by the library resolver, so this only calls
+        JSON-RPC the first time a show is seen, and a show which failed to resolve is only retried after a while. This
+        also works when a season is opened directly, e.g. from a widget or a search.
+
+        Returns
+        -------
+        Optional[str]
+            The canonical Kodi ID of the TV show, e.g. ``tmdb_1399``, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.tv_show_id()
+        """
+        tvshow_id = xbmc.getInfoLabel('ListItem.TvShowDBID')
+        if not tvshow_id.isdigit():
+            return None
+
+        unique_ids = library.tv_shows.unique_ids(dbid=int(tvshow_id))
+        return self.link_ids(ids=self._kodi_ids(unique_ids=unique_ids))
+
+    def movie_set_id(self, prefix: str) -> Optional[str]:
+        """
+        Get the Kodi ID of a movie set without unique ids.
+
+        Movie sets often have no TMDb unique id, so they are identified by their library id, e.g. ``set_1``, and their
+        collection is resolved when they are looked up. Once resolved, the collection id is linked to the set in the
+        alias index.
+
+        Parameters
+        ----------
+        prefix : str
+            The info label of the list item, e.g. ``ListItem``.
+
+        Returns
+        -------
+        Optional[str]
+            The canonical Kodi ID of the movie set, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.movie_set_id(prefix='ListItem')
+        """
+        if xbmc.getInfoLabel(f'{prefix}.DBTYPE') != 'set':
+            return None
+
+        set_id = xbmc.getInfoLabel(f'{prefix}.SetID') or xbmc.getInfoLabel(f'{prefix}.DBID')
+        if not set_id.isdigit():
+            return None
+        return self.link_ids(ids=[f"set_{set_id}"])
+
+    def _kodi_ids(self, unique_ids: dict) -> List[str]:
+        return [f"{db}_{unique_ids[db]}" for db in self._dbs if unique_ids.get(db)]
+
+    def prefetch(self):
+        """
+        Queue lookups for the items ahead of the scroll.
+
+        The items are chosen by the prefetcher, up to the prefetch lookahead setting, and queued in the neighbor lane
+        while the scheduler accepts them. Cached items are skipped, even if stale. Seasons and episodes share the theme
+        of their TV show, so they are not prefetched.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.prefetch()
+        """
+        if self.is_seasons() or self.is_episodes():
+            return
+
+        db_type = self.database_type()
+        if not db_type:
+            return
+
+        for offset in self.prefetcher.offsets(max_lookahead=settings.settings.prefetch_lookahead()):
+            if not self.scheduler.accepting(lane=scheduler.NEIGHBOR):
+                break
+            kodi_id = self.item_id(offset=offset)
+            if not kodi_id or self.cache_status(kodi_id=kodi_id) != 'miss' or self.scheduler.pending(kodi_id=kodi_id):
+                continue
+            if self.scheduler.submit(kodi_id=kodi_id, db_type=db_type, lane=scheduler.NEIGHBOR):
+                self.prefetcher.prefetched(kodi_id=kodi_id)
+
+    def library_changed(self, changes: List[Tuple[str, str, int]]):
+        """
+        Update the cache for changes of the video library.
+
+        This is the library handler of the monitor, so the cost is in the number of changes, not the size of the
+        library. The unique ids of added and updated movies and TV shows are resolved in one JSON-RPC batch per kind,
+        and linked. Uncached added items are queued in the warmup lane, so their theme is ready when they are first
+        selected, while updated items are only looked up again once selected. The cached entries of removed items,
+        and of items whose unique ids changed, are dropped. The unique ids of removed items are known from their
+        resolution, or from the list item when they were selected or prefetched, as only those items are cached. Movie
+        sets are resolved again when they are selected.
+
+        Parameters
+        ----------
+        changes : List[Tuple[str, str, int]]
+            The event (``added``, ``updated`` or ``removed``), the kind (``movie``, ``tvshow`` or ``set``) and the
+            database id of each changed item.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.library_changed(changes=[('added', 'movie', 1), ('removed', 'tvshow', 2)])
+        """
+        resolvers = dict(movie=library.movies, tvshow=library.tv_shows, set=library.movie_sets)
+        db_types = dict(movie='movies', tvshow='tv_shows', set='movie_collections')
+        jsonrpc.client.clear()
+
+        stale = []  # Kodi IDs of the items to drop from the cache
+        changed = {}  # kind -> [(event, database id, previous Kodi IDs)]
+        for event, kind, dbid in changes:
+            previous = self._kodi_ids(unique_ids=resolvers[kind].forget(dbid=dbid) or {})
+            if kind == 'set':
+                stale.extend([f"set_{dbid}"] + previous)
+            elif event == 'removed':
+                stale.extend(previous)
+            else:
+                changed.setdefault(kind, []).append((event, dbid, previous))
+
+        linked = []  # (Kodi IDs, database type, whether the item was added) of the added and updated items
+        for kind, items in changed.items():
+            resolved = resolvers[kind].resolve(dbids=[dbid for _, dbid, _ in items])
+            for event, dbid, previous in items:
+                ids = self._kodi_ids(unique_ids=resolved[dbid])
+                if set(previous) - set(ids):
+                    stale.extend(previous)  # e.g. the item was scraped again with another id
+                if ids:
+                    linked.append((ids, db_types[kind], event == 'added'))
+
+        for kodi_id in stale:
+            removed = self.aliases.remove(kodi_id=kodi_id)
+            with self._cache_lock:
+                for alias in removed:
+                    self.uuid_mapping.pop(alias, None)
+
+        accepting = True  # once the queue is full, the other items are looked up when they are selected
+        for ids, db_type, added in linked:
+            kodi_id = self.link_ids(ids=ids)
+            if accepting and added and self.cache_status(kodi_id=kodi_id) == 'miss' \
+                    and not self.scheduler.pending(kodi_id=kodi_id):
+                accepting = self.scheduler.submit(kodi_id=kodi_id, db_type=db_type, lane=scheduler.WARMUP)
+
+    def lookup(self, kodi_id: str, db_type: Optional[str], lane: int = scheduler.FOCUSED):
+        """
+        Look up and cache the YouTube URL of a Kodi ID.
+
+        This is the handler of the lookup scheduler, so it may run on a lookup worker thread. Items without a database
+        type are cached without a URL. The refresh time of the entry is jittered, so entries cached together do not
+        expire together.
+
+        Lookups of the focused item wait for the ThemerrDB rate limit, other lookups are skipped when it is reached.
+        Skipped lookups leave the cache unchanged, so they are queued again later. Lookups in a local ThemerrDB
+        directory, and lookups while the ThemerrDB circuit breaker is open, do not take a token.
+
+        When no URL is found because ThemerrDB is unavailable, as reported by its circuit breaker, the lookup is retried
+        after about 5 minutes. A stale URL is kept meanwhile, until it is a day old.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID to look up.
+        db_type : Optional[str]
+            The ThemerrDB database type.
+        lane : int
+            The scheduler lane of the lookup.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.lookup(kodi_id='tmdb_1', db_type='movies')
+        """
+        interactive = lane == scheduler.FOCUSED
+        # while the breaker is open the lookup fails fast, so it does not wait for a token
+        if db_type and sources.themerrdb().remote and not circuit.themerrdb.blocked() \
+                and not ratelimit.themerrdb.acquire(interactive=interactive):
+            self.log.debug(f"ThemerrDB rate limit reached, skipping the lookup of {kodi_id}")
+            return
+
+        with self._cache_lock:
+            previous = self.uuid_mapping.get(kodi_id)
+        youtube_url = self.find_aliased_youtube_url(
+            kodi_id=kodi_id, db_type=db_type, interactive=interactive) if db_type else None
+        now = datetime.now().timestamp()
+
+        # without a healthy ThemerrDB, a missing URL may only mean the request failed
+        unavailable = bool(db_type) and not youtube_url and not circuit.themerrdb.healthy()
+
+        if previous is not None:
+            if unavailable and previous.get('youtube_url') and now - previous['timestamp'] < cache_max_stale:
+                cache_refreshes.inc(labels=dict(result='kept_stale'))
+                with self._cache_lock:
+                    self.uuid_mapping[kodi_id] = dict(
+                        previous,
+                        refresh_at=now + cache_retry * (1 - random.uniform(0, cache_ttl_jitter)),
+                    )
+                return
+            cache_refreshes.inc(labels=dict(result='updated'))
+
+        ttl = cache_retry if unavailable else cache_ttl
+        with self._cache_lock:
+            self.uuid_mapping[kodi_id] = {
+                'timestamp': now,
+                'youtube_url': youtube_url,
+                'refresh_at': now + ttl * (1 - random.uniform(0, cache_ttl_jitter)),
+            }
+
     def process_kodi_id(self, kodi_id: str) -> Optional[str]:
         """
         Generate YouTube URL from a given Kodi ID.
@@ -257,17 +853,7 @@ class Window:
         >>> window = Window()
         >>> window.process_kodi_id(kodi_id='tmdb_1')
         """
-        database_type = None
-        if self.is_movies():
-            database_type = 'movies'
-        elif self.is_movie_set():
-            database_type = 'movie_collections'
-        elif self.is_tv_shows():
-            database_type = 'tv_shows'
-        elif self.is_episodes():
-            database_type = 'tv_shows'
-        elif self.is_seasons():
-            database_type = 'tv_shows'
+        database_type = self.database_type()
 
         if database_type:
             youtube_url = self.find_youtube_url(
@@ -277,11 +863,79 @@ class Window:
 
             return youtube_url
 
+    def _supported(self, kodi_id: str, db_type: str) -> bool:
+        db = self._kodi_db_map.get(kodi_id.split('_')[0])
+        return db in self._supported_dbs.get(db_type, [])
+
+    def find_aliased_youtube_url(self, kodi_id: str, db_type: str, interactive: bool = True) -> Optional[str]:
+        """
+        Find the YouTube URL of an item by any of its unique ids.
+
+        Movie sets without unique ids are resolved to their collection first, see ``movie_set_id``.
+
+        The item is looked up by its first id supported by the database type. Only if ThemerrDB answered without a URL
+        for it, the other ids linked in the alias index are looked up, in parallel if there are several. The URL of the
+        first id in database order is used. Each fallback request takes a ThemerrDB rate limit token, fallbacks which
+        do not get one are skipped.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the item.
+        db_type : str
+            The database type.
+        interactive : bool
+            Whether the lookup is for the focused item, which may wait for the rate limit.
+
+        Returns
+        -------
+        Optional[str]
+            A YouTube URL if found, otherwise None.
+
+        Examples
+        --------
+        >>> window = Window()
+        >>> window.find_aliased_youtube_url(kodi_id='tmdb_1', db_type='movies')
+        """
+        if db_type == 'movie_collections':
+            for alias in self.aliases.ids(kodi_id=kodi_id):
+                if alias.startswith('set_'):
+                    unique_ids = library.movie_sets.unique_ids(dbid=int(alias.split('_')[1]))
+                    self.link_ids(ids=[alias] + self._kodi_ids(unique_ids=unique_ids))
+
+        ids = [alias for alias in self.aliases.ids(kodi_id=kodi_id) if self._supported(kodi_id=alias, db_type=db_type)]
+        if not ids:
+            return None
+
+        youtube_url = self.find_youtube_url(kodi_id=ids[0], db_type=db_type)
+        # a failed request is not a missing item, so the other ids are not tried
+        if youtube_url or len(ids) == 1 or not circuit.themerrdb.healthy():
+            return youtube_url
+
+        remote = sources.themerrdb().remote
+        fallbacks = [alias for alias in ids[1:] if not remote or ratelimit.themerrdb.acquire(interactive=interactive)]
+        if len(fallbacks) <= 1:
+            urls = [self.find_youtube_url(kodi_id=alias, db_type=db_type) for alias in fallbacks]
+        else:
+            with futures.ThreadPoolExecutor(max_workers=len(fallbacks), thread_name_prefix='ThemerrAlias') as executor:
+                urls = list(executor.map(lambda alias: self.find_youtube_url(kodi_id=alias, db_type=db_type),
+                                         fallbacks))
+
+        youtube_url = next((url for url in urls if url), None)
+        if fallbacks:
+            alias_fallbacks.inc(labels=dict(result='found' if youtube_url else 'missed'))
+            self.log.debug(f"{'Found' if youtube_url else 'No'} YouTube URL for {kodi_id} by {', '.join(fallbacks)}")
+        return youtube_url
+
     def find_youtube_url(self, kodi_id: str, db_type: str) -> Optional[str]:
         """
         Find YouTube URL from the Dictionary of IDs.
 
-        Given a dictionary of IDs, this method will query the Themerr DB to find the YouTube URL.
+        Given a dictionary of IDs, this method will query the Themerr DB to find the YouTube URL. The ThemerrDB source
+        is chosen by the ThemerrDB URL setting, a directory is read locally. With mirrors configured, slow requests are
+        hedged on another mirror, and failed requests are retried on it. Request errors and server errors from every
+        mirror, and unavailable directories, are recorded on the ThemerrDB circuit breaker, while it is open no request
+        is made.
 
         Parameters
         ----------
@@ -309,17 +963,36 @@ class Window:
         db_id = split_id[1]
 
         self.log.debug(f"{db.upper()}_ID: {db_id}")
-        themerr_db_url = f"https://app.lizardbyte.dev/ThemerrDB/{db_type}/{db}/{db_id}.json"
-        self.log.debug(f"Themerr DB URL: {themerr_db_url}")
+        themerr_db_path = f"{db_type}/{db}/{db_id}.json"
+        self.log.debug(f"Themerr DB path: {themerr_db_path}")
 
+        if not circuit.themerrdb.allow():
+            themerrdb_requests.inc(labels=dict(status='circuit_open'))
+            self.log.debug(f"ThemerrDB circuit breaker is open, skipping {themerr_db_path}")
+            return None
+
+        # traces are recorded under the canonical id, which is the id of the selected item, e.g. ``set_1``
+        trace_id = self.aliases.canonical(kodi_id=kodi_id)
+        tracing.tracer.mark(kodi_id=trace_id, name='lookup_start')
         try:
-            response_data = requests.get(
-                url=themerr_db_url,
-            ).json()
-        except requests.exceptions.RequestException as e:
-            self.log.debug(f"Exception getting data from {themerr_db_url}: {e}")
-        except json.decoder.JSONDecodeError:
-            self.log.debug(f"Exception decoding JSON from {themerr_db_url}")
+            with themerrdb_latency.time():
+                status_code, response_data = sources.themerrdb().get(path=themerr_db_path)
+        except (requests.exceptions.RequestException, OSError) as e:
+            circuit.themerrdb.failure()
+            themerrdb_requests.inc(labels=dict(status='error'))
+            self.log.debug(f"Exception getting data for {themerr_db_path}: {e}")
+            return None
+        finally:
+            tracing.tracer.mark(kodi_id=trace_id, name='lookup_end')
+
+        themerrdb_requests.inc(labels=dict(status=str(status_code)))
+        if status_code >= 500:
+            circuit.themerrdb.failure()
+        else:
+            circuit.themerrdb.success()
+
+        if response_data is None:
+            self.log.debug(f"No JSON data for {themerr_db_path}, status code: {status_code}")
         else:
             youtube_theme_url = response_data['youtube_theme_url']
             self.log.debug(f"Youtube theme URL: {youtube_theme_url}")
@@ -0,0 +1,292 @@
+# standard imports
+from collections import OrderedDict
+import json
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+# kodi imports
+import xbmc
+
+# local imports
+from . import logger
+from . import metrics
+
+calls = metrics.registry.counter(
+    name='jsonrpc_calls_total',
+    description='Round trips through the Kodi JSON-RPC API, a batch is one round trip',
+)
+methods = metrics.registry.counter(
+    name='jsonrpc_requests_total',
+    description='JSON-RPC requests, by method and result (ok, error, cached)',
+)
+
+# the properties requested when listing library items, only the unique ids are needed to find themes
+unique_id_properties = ('uniqueid',)
+
+
+class Client:
+    """
+    A client for the Kodi JSON-RPC API.
+
+    Every call to ``xbmc.executeJSONRPC`` is a round trip through the Kodi core, so requests are sent in batches,
+    listings are paged, and results may be cached. Batches are JSON-RPC 2.0 batch arrays, with up to ``max_batch``
+    requests each, and their responses are matched to the requests by id.
+
+    Parameters
+    ----------
+    execute : Callable[[str], str]
+        Send a JSON-RPC request, and get the response. Defaults to ``xbmc.executeJSONRPC``.
+    max_batch : int
+        The maximum number of requests in one round trip.
+    page_size : int
+        The number of items requested per page of a listing.
+    cache_ttl : float
+        The number of seconds cached results are used for.
+    cache_size : int
+        The maximum number of cached results.
+    clock : Callable[[], float]
+        The clock used for the cache, in seconds. Defaults to ``time.monotonic``.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    execute : Callable[[str], str]
+        Send a JSON-RPC request, and get the response.
+    max_batch : int
+        The maximum number of requests in one round trip.
+    page_size : int
+        The number of items requested per page of a listing.
+    cache_ttl : float
+        The number of seconds cached results are used for.
+    cache_size : int
+        The maximum number of cached results.
+    clock : Callable[[], float]
+        The clock used for the cache.
+
+    Methods
+    -------
+    call(method: str, params: Optional[dict] = None, cache: bool = False) -> Optional[dict]
+        Call a method.
+    batch(requests: Sequence[Tuple[str, dict]], cache: bool = False) -> List[Optional[dict]]
+        Call several methods in as few round trips as possible.
+    pages(method: str, key: str, params: Optional[dict] = None, ...) -> Iterator[dict]
+        Get every item of a listing, one page at a time.
+    clear()
+        Remove every cached result.
+
+    Examples
+    --------
+    >>> client = Client()
+    >>> client.call(method='VideoLibrary.GetTVShowDetails', params=dict(tvshowid=1, properties=['uniqueid']))
+    {...}
+    """
+    def __init__(
+            self,
+            execute: Callable[[str], str] = xbmc.executeJSONRPC,
+            max_batch: int = 50,
+            page_size: int = 500,
+            cache_ttl: float = 300.0,
+            cache_size: int = 256,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.log = logger.log
+        self.execute = execute
+        self.max_batch = max_batch
+        self.page_size = page_size
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.clock = clock
+
+        self._cache = OrderedDict()  # (method, params as JSON) -> (clock value, result)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(method: str, params: dict) -> Tuple[str, str]:
+        return method, json.dumps(params, sort_keys=True)
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[dict]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry[0] >= self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _store(self, key: Tuple[str, str], result: dict):
+        with self._lock:
+            self._cache[key] = (self.clock(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _send(self, requests: List[Tuple[str, dict]]) -> List[Optional[dict]]:
+        payload = [dict(jsonrpc='2.0', id=index, method=method, params=params)
+                   for index, (method, params) in enumerate(requests)]
+        calls.inc()
+        try:
+            # a single request is sent on its own, not as a batch of one
+            response = json.loads(self.execute(json.dumps(payload if len(payload) > 1 else payload[0])))
+        except (TypeError, ValueError) as e:
+            self.log.debug(f"Invalid JSON-RPC response for {', '.join(method for method, _ in requests)}: {e}")
+            response = []
+
+        responses = {}
+        for item in response if isinstance(response, list) else [response]:
+            if isinstance(item, dict) and isinstance(item.get('id'), int):
+                responses[item['id']] = item
+
+        results = []
+        for index, (method, _) in enumerate(requests):
+            item = responses.get(index, {})
+            if 'result' in item:
+                methods.inc(labels=dict(method=method, result='ok'))
+                results.append(item['result'])
+            else:
+                methods.inc(labels=dict(method=method, result='error'))
+                self.log.debug(f"JSON-RPC error for {method}: {item.get('error', 'no response')}")
+                results.append(None)
+        return results
+
+    def batch(self, requests: Sequence[Tuple[str, dict]], cache: bool = False) -> List[Optional[dict]]:
+        """
+        Call several methods in as few round trips as possible.
+
+        Requests are sent in batches of up to ``max_batch``. With ``cache``, cached results are used without a round
+        trip, and new results are cached. Failed requests are never cached.
+
+        Parameters
+        ----------
+        requests : Sequence[Tuple[str, dict]]
+            The method and the parameters of each request.
+        cache : bool
+            Whether to use and store cached results.
+
+        Returns
+        -------
+        List[Optional[dict]]
+            The result of each request, in the order of the requests, None if it failed.
+
+        Examples
+        --------
+        >>> Client().batch(requests=[('VideoLibrary.GetTVShowDetails', dict(tvshowid=1)),
+        ...                          ('VideoLibrary.GetTVShowDetails', dict(tvshowid=2))])
+        [{...}, {...}]
+        """
+        results: List[Optional[dict]] = [None] * len(requests)
+        pending = []  # indexes of the requests to send
+        for index, (method, params) in enumerate(requests):
+            result = self._cached(key=self._key(method=method, params=params)) if cache else None
+            if result is None:
+                pending.append(index)
+            else:
+                methods.inc(labels=dict(method=method, result='cached'))
+                results[index] = result
+
+        for start in range(0, len(pending), self.max_batch):
+            indexes = pending[start:start + self.max_batch]
+            for index, result in zip(indexes, self._send(requests=[requests[index] for index in indexes])):
+                results[index] = result
+                if cache and result is not None:
+                    self._store(key=self._key(*requests[index]), result=result)
+        return results
+
+    def call(self, method: str, params: Optional[dict] = None, cache: bool = False) -> Optional[dict]:
+        """
+        Call a method.
+
+        Errors are logged, so callers only need to handle a missing result.
+
+        Parameters
+        ----------
+        method : str
+            The method, e.g. ``VideoLibrary.GetTVShowDetails``.
+        params : Optional[dict]
+            The parameters of the method.
+        cache : bool
+            Whether to use and store a cached result.
+
+        Returns
+        -------
+        Optional[dict]
+            The result of the call, or None if the call failed.
+
+        Examples
+        --------
+        >>> Client().call(method='VideoLibrary.GetTVShowDetails', params=dict(tvshowid=1, properties=['uniqueid']))
+        {...}
+        """
+        return self.batch(requests=[(method, params or {})], cache=cache)[0]
+
+    def pages(
+            self,
+            method: str,
+            key: str,
+            params: Optional[dict] = None,
+            properties: Sequence[str] = unique_id_properties,
+            cache: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Get every item of a listing, one page at a time.
+
+        Pages of ``page_size`` items are requested with the ``limits`` parameter, until the total reported by Kodi is
+        reached. Only the ``properties`` of the items are requested, the unique ids by default, which keeps the
+        responses small. A failed page ends the listing.
+
+        Parameters
+        ----------
+        method : str
+            The listing method, e.g. ``VideoLibrary.GetMovies``.
+        key : str
+            The key of the items in the result, e.g. ``movies``.
+        params : Optional[dict]
+            Other parameters of the method, e.g. a ``filter``.
+        properties : Sequence[str]
+            The properties of the items to request.
+        cache : bool
+            Whether to use and store cached pages.
+
+        Yields
+        ------
+        dict
+            The items of the listing.
+
+        Examples
+        --------
+        >>> list(Client().pages(method='VideoLibrary.GetMovies', key='movies'))
+        [{'movieid': 1, 'label': 'Big Buck Bunny', 'uniqueid': {'tmdb': '10378'}}, ...]
+        """
+        start = 0
+        while True:
+            page_params = dict(params or {}, properties=list(properties),
+                               limits=dict(start=start, end=start + self.page_size))
+            result = self.call(method=method, params=page_params, cache=cache)
+            if result is None:
+                return
+
+            items = result.get(key) or []
+            yield from items
+
+            start += len(items)
+            if not items or start >= result.get('limits', {}).get('total', 0):
+                return
+
+    def clear(self):
+        """
+        Remove every cached result.
+
+        This is used when the library changed, so listings and details are requested again.
+
+        Examples
+        --------
+        >>> Client().clear()
+        """
+        with self._lock:
+            self._cache.clear()
+
+
+client = Client(execute=lambda request: xbmc.executeJSONRPC(request))
@@ -0,0 +1,380 @@
+# standard imports
+from collections import OrderedDict
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+# lib imports
+import requests
+
+# local imports
+from . import circuit
+from . import jsonrpc
+from . import logger
+from . import metrics
+from . import ratelimit
+from . import sources
+
+log = logger.log
+
+# the number of movies of a set looked up in ThemerrDB for the collection of the set
+movie_set_samples = 3
+
+resolutions = metrics.registry.counter(
+    name='library_resolutions_total',
+    description='Unique id resolutions of library items, by kind and result (hit, miss, error, retry_later)',
+)
+
+
+# the JSON-RPC methods of each kind of library item, for its details and for the listing of every item
+_methods = {
+    'movie': dict(details='VideoLibrary.GetMovieDetails', id='movieid', key='moviedetails',
+                  listing='VideoLibrary.GetMovies', items='movies'),
+    'tvshow': dict(details='VideoLibrary.GetTVShowDetails', id='tvshowid', key='tvshowdetails',
+                   listing='VideoLibrary.GetTVShows', items='tvshows'),
+}
+
+
+def fetch_unique_ids(kind: str, dbids: Sequence[int]) -> Dict[int, Optional[Dict[str, str]]]:
+    """
+    Get the unique ids of library items by their database ids.
+
+    The details of the items are requested in JSON-RPC batches, with only the ``uniqueid`` property.
+
+    Parameters
+    ----------
+    kind : str
+        The kind of the items, ``movie`` or ``tvshow``.
+    dbids : Sequence[int]
+        The database ids of the items, e.g. from ``ListItem.TvShowDBID``.
+
+    Returns
+    -------
+    Dict[int, Optional[Dict[str, str]]]
+        The unique ids of each item by database, e.g. ``{'tmdb': '1399', 'imdb': 'tt0944947'}``, or None if the
+        request for the item failed.
+
+    Examples
+    --------
+    >>> fetch_unique_ids(kind='tvshow', dbids=[1])
+    {1: {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}}
+    """
+    methods = _methods[kind]
+    properties = list(jsonrpc.unique_id_properties)
+    results = jsonrpc.client.batch(requests=[
+        (methods['details'], {methods['id']: dbid, 'properties': properties}) for dbid in dbids])
+    return {
+        dbid: None if result is None else dict(result.get(methods['key'], {}).get('uniqueid') or {})
+        for dbid, result in zip(dbids, results)
+    }
+
+
+def list_unique_ids(kind: str) -> Dict[int, Dict[str, str]]:
+    """
+    Get the unique ids of every library item of a kind.
+
+    The items are listed in pages, with only the ``uniqueid`` property, so a large library takes a few calls.
+
+    Parameters
+    ----------
+    kind : str
+        The kind of the items, ``movie`` or ``tvshow``.
+
+    Returns
+    -------
+    Dict[int, Dict[str, str]]
+        The unique ids of each item by database, by the database id of the item.
+
+    Examples
+    --------
+    >>> list_unique_ids(kind='tvshow')
+    {1: {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}, ...}
+    """
+    methods = _methods[kind]
+    return {
+        item[methods['id']]: dict(item.get('uniqueid') or {})
+        for item in jsonrpc.client.pages(method=methods['listing'], key=methods['items'])
+    }
+
+
+def movie_set_unique_ids(set_id: int) -> Optional[Dict[str, str]]:
+    """
+    Get the unique ids of a movie set in the library.
+
+    Kodi does not keep the TMDb collection id of movie sets, so the collection is read from the ThemerrDB items of the
+    movies in the set, which have the ``belongs_to_collection`` of the movie on TMDb. Up to ``movie_set_samples``
+    movies are looked up, until one is found in ThemerrDB. Like theme lookups, each request to a remote ThemerrDB takes
+    a ThemerrDB rate limit token, and the requests are recorded on the ThemerrDB circuit breaker.
+
+    Parameters
+    ----------
+    set_id : int
+        The database id of the movie set, e.g. from ``ListItem.SetID``.
+
+    Returns
+    -------
+    Optional[Dict[str, str]]
+        The unique ids by database, e.g. ``{'tmdb': '645'}``, or None if a call or request failed, or was skipped by
+        the rate limit or the circuit breaker.
+
+    Examples
+    --------
+    >>> movie_set_unique_ids(set_id=1)
+    {'tmdb': '645'}
+    """
+    params = dict(setid=set_id, movies=dict(properties=['uniqueid']))
+    result = jsonrpc.client.call(method='VideoLibrary.GetMovieSetDetails', params=params)
+    if result is None:
+        return None
+
+    movies = result.get('setdetails', {}).get('movies') or []
+    tmdb_ids = [movie['uniqueid']['tmdb'] for movie in movies if (movie.get('uniqueid') or {}).get('tmdb')]
+    for tmdb_id in tmdb_ids[:movie_set_samples]:
+        if circuit.themerrdb.blocked():
+            return None
+        if sources.themerrdb().remote and not ratelimit.themerrdb.acquire():
+            log.debug(f"ThemerrDB rate limit reached, skipping the collection of movie set {set_id}")
+            return None
+        if not circuit.themerrdb.allow():
+            return None
+        try:
+            status_code, item = sources.themerrdb().get(path=f'movies/themoviedb/{tmdb_id}.json')
+        except (requests.exceptions.RequestException, OSError) as e:
+            circuit.themerrdb.failure()
+            log.debug(f"Exception getting the collection of movie set {set_id}: {e}")
+            return None
+        if status_code >= 500:
+            circuit.themerrdb.failure()
+            return None
+        circuit.themerrdb.success()
+
+        if item is not None:
+            collection = item.get('belongs_to_collection') or {}
+            return {'tmdb': str(collection['id'])} if collection.get('id') else {}
+    return {}
+
+
+class Resolver:
+    """
+    Resolves the unique ids of library items by their database id.
+
+    The unique ids of library items only change when the library is updated, so they are cached in memory and every
+    item is only fetched once. Items which are not cached are fetched together, e.g. in one JSON-RPC batch. Failed
+    fetches are not cached, but are only retried after ``retry_after`` seconds, so an item which cannot be resolved
+    does not cost a fetch on every window watcher tick.
+
+    Parameters
+    ----------
+    kind : str
+        The kind of the items, used in logs and metrics.
+    fetch : Callable[[List[int]], Dict[int, Optional[Dict[str, str]]]]
+        Get the unique ids of items by their database ids, None for items which failed.
+    max_size : int
+        The maximum number of cached items.
+    retry_after : float
+        The number of seconds before a failed item is fetched again.
+    clock : Callable[[], float]
+        The clock used for retries, in seconds. Defaults to ``time.monotonic``.
+
+    Attributes
+    ----------
+    kind : str
+        The kind of the items.
+    fetch : Callable[[List[int]], Dict[int, Optional[Dict[str, str]]]]
+        Get the unique ids of items by their database ids.
+    max_size : int
+        The maximum number of cached items.
+    retry_after : float
+        The number of seconds before a failed item is fetched again.
+    clock : Callable[[], float]
+        The clock used for retries.
+
+    Methods
+    -------
+    resolve(dbids: Sequence[int]) -> Dict[int, Dict[str, str]]
+        Get the unique ids of several items.
+    unique_ids(dbid: int) -> Dict[str, str]
+        Get the unique ids of an item.
+    update(items: Dict[int, Dict[str, str]])
+        Cache the unique ids of items fetched elsewhere.
+    forget(dbid: int) -> Optional[Dict[str, str]]
+        Remove an item from the cache.
+    clear()
+        Remove every item from the cache.
+
+    Examples
+    --------
+    >>> resolver = Resolver(kind='tvshow', fetch=lambda dbids: fetch_unique_ids(kind='tvshow', dbids=dbids))
+    >>> resolver.unique_ids(dbid=1)
+    {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}
+    """
+    def __init__(
+            self,
+            kind: str,
+            fetch: Callable[[List[int]], Dict[int, Optional[Dict[str, str]]]],
+            max_size: int = 1024,
+            retry_after: float = 30.0,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.kind = kind
+        self.fetch = fetch
+        self.max_size = max_size
+        self.retry_after = retry_after
+        self.clock = clock
+
+        self._items = OrderedDict()  # database id -> unique ids
+        self._failed = OrderedDict()  # database id -> clock value of the failed fetch
+        self._lock = threading.Lock()
+
+    def resolve(self, dbids: Sequence[int]) -> Dict[int, Dict[str, str]]:
+        """
+        Get the unique ids of several items.
+
+        Cached items are returned without fetching them, the others are fetched with a single call to ``fetch``.
+        Items which failed less than ``retry_after`` seconds ago are not fetched, and have no unique ids.
+
+        Parameters
+        ----------
+        dbids : Sequence[int]
+            The database ids of the items.
+
+        Returns
+        -------
+        Dict[int, Dict[str, str]]
+            The unique ids of each item by database, empty if the item has none or the fetch failed.
+
+        Examples
+        --------
+        >>> tv_shows.resolve(dbids=[1, 2])
+        {1: {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}, 2: {...}}
+        """
+        resolved = {}
+        missing = []
+        retry_later = 0
+        with self._lock:
+            now = self.clock()
+            for dbid in dict.fromkeys(dbids):
+                if dbid in self._items:
+                    self._items.move_to_end(dbid)
+                    resolved[dbid] = self._items[dbid]
+                elif dbid in self._failed and now - self._failed[dbid] < self.retry_after:
+                    resolved[dbid] = {}
+                    retry_later += 1
+                else:
+                    missing.append(dbid)
+        hits = len(resolved) - retry_later
+        if hits:
+            resolutions.inc(labels=dict(kind=self.kind, result='hit'), value=hits)
+        if retry_later:
+            resolutions.inc(labels=dict(kind=self.kind, result='retry_later'), value=retry_later)
+        if not missing:
+            return resolved
+
+        fetched = self.fetch(missing)
+        failed = [dbid for dbid in missing if fetched.get(dbid) is None]
+        if failed:
+            resolutions.inc(labels=dict(kind=self.kind, result='error'), value=len(failed))
+        if len(failed) < len(missing):
+            resolutions.inc(labels=dict(kind=self.kind, result='miss'), value=len(missing) - len(failed))
+
+        self.update(items={dbid: fetched[dbid] for dbid in missing if dbid not in failed})
+        with self._lock:
+            now = self.clock()
+            for dbid in failed:
+                self._failed[dbid] = now
+                self._failed.move_to_end(dbid)
+            while len(self._failed) > self.max_size:
+                self._failed.popitem(last=False)
+        for dbid in missing:
+            resolved[dbid] = fetched.get(dbid) or {}
+        return resolved
+
+    def unique_ids(self, dbid: int) -> Dict[str, str]:
+        """
+        Get the unique ids of an item.
+
+        Cached items are returned without fetching them.
+
+        Parameters
+        ----------
+        dbid : int
+            The database id of the item.
+
+        Returns
+        -------
+        Dict[str, str]
+            The unique ids by database, empty if the item has none or the fetch failed.
+
+        Examples
+        --------
+        >>> tv_shows.unique_ids(dbid=1)
+        {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}
+        """
+        return self.resolve(dbids=[dbid])[dbid]
+
+    def update(self, items: Dict[int, Dict[str, str]]):
+        """
+        Cache the unique ids of items fetched elsewhere.
+
+        This seeds the cache from a listing of the library, so the items are not fetched one by one.
+
+        Parameters
+        ----------
+        items : Dict[int, Dict[str, str]]
+            The unique ids of each item by database, by the database id of the item.
+
+        Examples
+        --------
+        >>> tv_shows.update(items=list_unique_ids(kind='tvshow'))
+        """
+        with self._lock:
+            for dbid, unique_ids in items.items():
+                self._items[dbid] = unique_ids
+                self._items.move_to_end(dbid)
+                self._failed.pop(dbid, None)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def forget(self, dbid: int) -> Optional[Dict[str, str]]:
+        """
+        Remove an item from the cache.
+
+        The next resolution of the item fetches it again, e.g. after the item was updated.
+
+        Parameters
+        ----------
+        dbid : int
+            The database id of the item.
+
+        Returns
+        -------
+        Optional[Dict[str, str]]
+            The cached unique ids of the item, or None if it was not cached.
+
+        Examples
+        --------
+        >>> tv_shows.forget(dbid=1)
+        {'tmdb': '1399', 'imdb': 'tt0944947', 'tvdb': '121361'}
+        """
+        with self._lock:
+            self._failed.pop(dbid, None)
+            return self._items.pop(dbid, None)
+
+    def clear(self):
+        """
+        Remove every item from the cache.
+
+        Every item is fetched again afterwards.
+
+        Examples
+        --------
+        >>> tv_shows.clear()
+        """
+        with self._lock:
+            self._items.clear()
+            self._failed.clear()
+
+
+movies = Resolver(kind='movie', fetch=lambda dbids: fetch_unique_ids(kind='movie', dbids=dbids))
+tv_shows = Resolver(kind='tvshow', fetch=lambda dbids: fetch_unique_ids(kind='tvshow', dbids=dbids))
+movie_sets = Resolver(kind='set', fetch=lambda dbids: {dbid: movie_set_unique_ids(set_id=dbid) for dbid in dbids})
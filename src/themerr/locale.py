@@ -74,6 +74,52 @@ class Locale:
             31003: pgettext("#31003", "Time to wait before playing or switching themes (in seconds)"),
             31004: pgettext("#31004", "Dev mode"),
             31005: pgettext("#31005", "Display log messages in Kodi's notification area"),
+            31006: pgettext("#31006", "Diagnostics"),
+            31007: pgettext("#31007", "Show metrics"),
+            31008: pgettext("#31008", "Show counters and latencies recorded by the service"),
+            31009: pgettext("#31009", "Status endpoint"),
+            31010: pgettext("#31010", "Serve metrics in Prometheus format over HTTP (requires restart)"),
+            31011: pgettext("#31011", "Status port"),
+            31012: pgettext("#31012", "Port to serve the status endpoint on (requires restart)"),
+            31013: pgettext("#31013", "Show trace report"),
+            31014: pgettext("#31014", "Show where time is spent between selecting an item and hearing its theme"),
+            31015: pgettext("#31015", "Slow tick threshold"),
+            31016: pgettext("#31016", "Log the stack of the window watcher when a tick takes longer than this "
+                                      "(in milliseconds, 0 to disable)"),
+            31017: pgettext("#31017", "Profile service"),
+            31018: pgettext("#31018", "Profile the window watcher for the profile duration, the output is written to "
+                                      "the addon profile directory"),
+            31019: pgettext("#31019", "Profile mode"),
+            31020: pgettext("#31020", "cProfile records every call, sampling has a lower overhead"),
+            31021: pgettext("#31021", "cProfile"),
+            31022: pgettext("#31022", "Sampling"),
+            31023: pgettext("#31023", "Profile duration"),
+            31024: pgettext("#31024", "The number of seconds to profile for"),
+            31025: pgettext("#31025", "Memory snapshot interval"),
+            31026: pgettext("#31026", "In dev mode, log the allocation sites which grew the most every this many "
+                                      "seconds"),
+            31027: pgettext("#31027", "Memory traceback depth"),
+            31028: pgettext("#31028", "The number of frames stored for each memory allocation, higher values use "
+                                      "more memory"),
+            31029: pgettext("#31029", "ThemerrDB URL"),
+            31030: pgettext("#31030", "The base URL of ThemerrDB, change this to use a mirror or a local stand-in, or "
+                                      "a directory with a copy of ThemerrDB"),
+            31031: pgettext("#31031", "Record navigation"),
+            31032: pgettext("#31032", "Record anonymized focus changes to the addon profile directory, to tune "
+                                      "prefetching and timeouts"),
+            31033: pgettext("#31033", "Lookup delay"),
+            31034: pgettext("#31034", "Wait this long (in milliseconds) on an item before looking up its theme, "
+                                      "longer while scrolling"),
+            31035: pgettext("#31035", "Prefetch lookahead"),
+            31036: pgettext("#31036", "The maximum number of items ahead of the scroll to look up, 0 to disable"),
+            31037: pgettext("#31037", "ThemerrDB rate limit"),
+            31038: pgettext("#31038", "The maximum number of ThemerrDB requests per minute, shared with prefetching "
+                                      "(0 for no limit)"),
+            31039: pgettext("#31039", "YouTube rate limit"),
+            31040: pgettext("#31040", "The maximum number of YouTube extractions per minute (0 for no limit)"),
+            31041: pgettext("#31041", "ThemerrDB mirrors"),
+            31042: pgettext("#31042", "Comma separated base URLs of ThemerrDB mirrors, slow lookups are also sent to "
+                                      "a mirror and the first answer is used"),
         }
 
         return strings
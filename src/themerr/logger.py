@@ -4,6 +4,7 @@ import xbmcgui
 
 # local imports
 from . import constants
+from . import metrics
 from . import notifier
 from . import settings
 
@@ -22,6 +23,8 @@ class Logger(object):
         A dictionary mapping log levels to notification icons.
     level_mapper : dict
         A dictionary mapping log levels to strings.
+    messages : metrics.Counter
+        A counter of logged warnings, errors and fatal errors.
 
     Methods
     -------
@@ -58,6 +61,10 @@ class Logger(object):
             xbmc.LOGERROR: "ERROR",
             xbmc.LOGFATAL: "FATAL",
         }
+        self.messages = metrics.registry.counter(
+            name='log_messages_total',
+            description='Logged warnings, errors and fatal errors, by level',
+        )
 
     def log(self, msg: str, level: int = xbmc.LOGDEBUG):
         """
@@ -84,10 +91,14 @@ class Logger(object):
             level=xbmc.LOGDEBUG if level < xbmc.LOGDEBUG else level,  # kodi doesn't want us to log below debug
         )
 
+        if level >= xbmc.LOGWARNING:
+            self.messages.inc(labels=dict(level=self.level_mapper[level]))
+
         if settings.settings.dev_mode():
             self.notifier.notify(
                 message=msg,
                 icon=self.icons[level],
+                level=level,
             )
 
     def debug(self, msg: str):
@@ -0,0 +1,217 @@
+# standard imports
+import time
+import tracemalloc
+from typing import List
+
+# local imports
+from . import logger
+from . import metrics
+from . import settings
+
+traced_memory = metrics.registry.gauge(
+    name='memory_traced_bytes',
+    description='Memory allocated by Python, only tracked in dev mode',
+    function=lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+)
+
+# allocations made by tracemalloc itself and the import system are not interesting
+_filters = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def format_size(size: int) -> str:
+    """
+    Format a number of bytes for display.
+
+    The size is shown in KiB, with a sign so growth and shrinkage can be told apart.
+
+    Parameters
+    ----------
+    size : int
+        The number of bytes.
+
+    Returns
+    -------
+    str
+        The formatted size.
+
+    Examples
+    --------
+    >>> format_size(size=2048)
+    '+2.0 KiB'
+    """
+    return f'{size / 1024:+.1f} KiB'
+
+
+def format_growth(stats: List[tracemalloc.StatisticDiff]) -> str:
+    """
+    Format the growing allocation sites of a snapshot comparison.
+
+    Each site is shown with its growth in size and blocks, followed by its frames with the most recent call first.
+
+    Parameters
+    ----------
+    stats : List[tracemalloc.StatisticDiff]
+        The allocation sites to format.
+
+    Returns
+    -------
+    str
+        The formatted allocation sites, one per line.
+
+    Examples
+    --------
+    >>> format_growth(stats=[])
+    ''
+    """
+    lines = []
+    for stat in stats:
+        frames = ' <- '.join(f'{frame.filename}:{frame.lineno}' for frame in reversed(stat.traceback))
+        lines.append(f'{format_size(size=stat.size_diff)} ({stat.count_diff:+d} blocks) {frames}')
+
+    return '\n'.join(lines)
+
+
+class MemoryTracker:
+    """
+    Track memory growth with periodic tracemalloc snapshots.
+
+    While dev mode is enabled, tracemalloc is started with the configured traceback depth and a snapshot is taken every
+    memory snapshot interval. Each snapshot is compared to the previous one, and the allocation sites which grew the
+    most are logged. Tracing is stopped when dev mode is disabled, as it slows down every allocation.
+
+    Parameters
+    ----------
+    top : int
+        The number of growing allocation sites to log.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    top : int
+        The number of growing allocation sites to log.
+    depth : Optional[int]
+        The traceback depth tracemalloc was started with, None if not tracing.
+    snapshot : Optional[tracemalloc.Snapshot]
+        The most recent snapshot.
+    taken_at : Optional[float]
+        The ``time.monotonic()`` value when the most recent snapshot was taken.
+
+    Methods
+    -------
+    check() -> bool
+        Take and compare a snapshot if the interval has elapsed.
+    compare(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot) -> List[tracemalloc.StatisticDiff]
+        Get the allocation sites which grew the most between two snapshots.
+    stop()
+        Stop tracing memory allocations.
+
+    Examples
+    --------
+    >>> tracker = MemoryTracker()
+    >>> tracker.check()
+    False
+    """
+    def __init__(self, top: int = 10):
+        self.log = logger.log
+        self.top = top
+        self.depth = None
+        self.snapshot = None
+        self.taken_at = None
+
+    def _take_snapshot(self):
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(_filters)
+        self.taken_at = time.monotonic()
+
+    def check(self) -> bool:
+        """
+        Take and compare a snapshot if the interval has elapsed.
+
+        Tracing is started, restarted if the depth setting has changed, or stopped if dev mode is disabled. The first
+        snapshot after starting is only used as the baseline.
+
+        Returns
+        -------
+        bool
+            True if a snapshot was compared and logged, otherwise False.
+
+        Examples
+        --------
+        >>> MemoryTracker().check()
+        False
+        """
+        if not settings.settings.dev_mode():
+            self.stop()
+            return False
+
+        depth = max(1, settings.settings.memory_depth())
+        if depth != self.depth:
+            self.stop()
+            tracemalloc.start(depth)
+            self.depth = depth
+            self._take_snapshot()
+            self.log.debug(f"Tracing memory allocations with a traceback depth of {depth}")
+            return False
+
+        if time.monotonic() - self.taken_at < settings.settings.memory_interval():
+            return False
+
+        old = self.snapshot
+        self._take_snapshot()
+        stats = self.compare(old=old, new=self.snapshot)
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.log.info(f"Memory traced: {current / 1024 ** 2:.1f} MiB, peak: {peak / 1024 ** 2:.1f} MiB, "
+                      f"top growing allocation sites:\n{format_growth(stats=stats) or 'none'}")
+        return True
+
+    def compare(self, old: tracemalloc.Snapshot, new: tracemalloc.Snapshot) -> List[tracemalloc.StatisticDiff]:
+        """
+        Get the allocation sites which grew the most between two snapshots.
+
+        Sites are grouped by their full traceback when the depth is greater than 1, otherwise by line.
+
+        Parameters
+        ----------
+        old : tracemalloc.Snapshot
+            The earlier snapshot.
+        new : tracemalloc.Snapshot
+            The later snapshot.
+
+        Returns
+        -------
+        List[tracemalloc.StatisticDiff]
+            Up to ``top`` allocation sites which grew, largest growth first.
+
+        Examples
+        --------
+        >>> tracker = MemoryTracker()
+        >>> tracker.compare(old=old_snapshot, new=new_snapshot)
+        [...]
+        """
+        key_type = 'traceback' if self.depth and self.depth > 1 else 'lineno'
+        stats = new.compare_to(old, key_type)
+        return [stat for stat in stats if stat.size_diff > 0][:self.top]
+
+    def stop(self):
+        """
+        Stop tracing memory allocations.
+
+        Only tracing started by this tracker is stopped.
+
+        Examples
+        --------
+        >>> MemoryTracker().stop()
+        """
+        if self.depth is None:
+            return
+
+        tracemalloc.stop()
+        self.depth = None
+        self.snapshot = None
+        self.taken_at = None
@@ -0,0 +1,830 @@
+# standard imports
+from collections import deque
+from contextlib import contextmanager
+import json
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# kodi imports
+import xbmcgui
+
+# local imports
+from . import constants
+
+# the home window is used to share data between the service and the script entry point
+HOME_WINDOW_ID = 10000
+PROPERTY_NAME = f'{constants.addon_id}.metrics'
+
+
+def _labels_key(labels: Optional[dict]) -> tuple:
+    # dictionaries can't be used as keys, so convert labels to a sorted tuple
+    return tuple(sorted((labels or {}).items()))
+
+
+class Metric:
+    """
+    Base class for all metrics.
+
+    Subclasses extend the ``snapshot`` method, and override the ``reset`` method, for the values of their type of
+    metric.
+
+    Parameters
+    ----------
+    name : str
+        The name of the metric.
+    description : str
+        A short description of the metric.
+
+    Attributes
+    ----------
+    name : str
+        The name of the metric.
+    description : str
+        A short description of the metric.
+    metric_type : str
+        The type of the metric.
+
+    Methods
+    -------
+    snapshot() -> dict
+        Get a JSON serializable snapshot of the metric.
+    reset()
+        Reset the metric.
+
+    Examples
+    --------
+    >>> class MyMetric(Metric):
+    ...     pass
+    """
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serializable snapshot of the metric.
+
+        The base snapshot contains the type and description of the metric.
+
+        Returns
+        -------
+        dict
+            The snapshot of the metric.
+
+        Examples
+        --------
+        >>> Metric(name='my_metric', description='My metric').snapshot()
+        {'type': 'untyped', 'description': 'My metric'}
+        """
+        return dict(
+            type=self.metric_type,
+            description=self.description,
+        )
+
+    def reset(self):
+        """
+        Reset the metric.
+
+        The base metric has no values, so there is nothing to reset. Subclasses reset their values.
+
+        Examples
+        --------
+        >>> Metric(name='my_metric', description='My metric').reset()
+        """
+
+
+class Counter(Metric):
+    """
+    A counter which only goes up.
+
+    Counters can optionally be split by labels, e.g. by status code.
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter.
+    description : str
+        A short description of the counter.
+
+    Attributes
+    ----------
+    values : Dict[tuple, float]
+        A mapping of label keys to counter values.
+
+    Methods
+    -------
+    inc(value: float = 1, labels: Optional[dict] = None)
+        Increment the counter.
+    get(labels: Optional[dict] = None) -> float
+        Get the value of the counter.
+    total() -> float
+        Get the sum of the counter over all labels.
+
+    Examples
+    --------
+    >>> counter = Counter(name='requests_total', description='Number of requests')
+    >>> counter.inc(labels=dict(status='200'))
+    >>> counter.get(labels=dict(status='200'))
+    1
+    """
+    metric_type = 'counter'
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name=name, description=description)
+        self.values = {}
+
+    def inc(self, value: float = 1, labels: Optional[dict] = None):
+        """
+        Increment the counter.
+
+        Each unique set of labels is counted separately.
+
+        Parameters
+        ----------
+        value : float
+            The amount to increment the counter by.
+        labels : Optional[dict]
+            The labels of the counter value to increment.
+
+        Examples
+        --------
+        >>> counter = Counter(name='requests_total', description='Number of requests')
+        >>> counter.inc(labels=dict(status='200'))
+        """
+        key = _labels_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def get(self, labels: Optional[dict] = None) -> float:
+        """
+        Get the value of the counter.
+
+        Only the value for the exact set of labels is returned.
+
+        Parameters
+        ----------
+        labels : Optional[dict]
+            The labels of the counter value to get.
+
+        Returns
+        -------
+        float
+            The value of the counter.
+
+        Examples
+        --------
+        >>> counter = Counter(name='requests_total', description='Number of requests')
+        >>> counter.get(labels=dict(status='200'))
+        0
+        """
+        return self.values.get(_labels_key(labels), 0)
+
+    def total(self) -> float:
+        """
+        Get the sum of the counter over all labels.
+
+        The values of every set of labels are added together.
+
+        Returns
+        -------
+        float
+            The sum of the counter.
+
+        Examples
+        --------
+        >>> counter = Counter(name='requests_total', description='Number of requests')
+        >>> counter.total()
+        0
+        """
+        with self._lock:
+            return sum(self.values.values())
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serializable snapshot of the counter.
+
+        The snapshot contains a list of values, each with its labels.
+
+        Returns
+        -------
+        dict
+            The snapshot of the counter.
+
+        Examples
+        --------
+        >>> Counter(name='requests_total', description='Number of requests').snapshot()
+        {'type': 'counter', 'description': 'Number of requests', 'values': []}
+        """
+        snapshot = super().snapshot()
+        with self._lock:
+            snapshot['values'] = [dict(labels=dict(key), value=value) for key, value in self.values.items()]
+        return snapshot
+
+    def reset(self):
+        """
+        Reset the counter.
+
+        All labelled values are removed.
+
+        Examples
+        --------
+        >>> Counter(name='requests_total', description='Number of requests').reset()
+        """
+        with self._lock:
+            self.values = {}
+
+
+class Gauge(Metric):
+    """
+    A gauge which can go up and down.
+
+    The value can either be set directly, or read from a function each time the gauge is read. Using a function keeps
+    the cost out of the code being measured, since it is only called when a snapshot is taken.
+
+    Parameters
+    ----------
+    name : str
+        The name of the gauge.
+    description : str
+        A short description of the gauge.
+    function : Optional[Callable[[], float]]
+        A function returning the current value of the gauge.
+
+    Attributes
+    ----------
+    function : Optional[Callable[[], float]]
+        A function returning the current value of the gauge.
+
+    Methods
+    -------
+    set(value: float)
+        Set the value of the gauge.
+    value() -> float
+        Get the value of the gauge.
+
+    Examples
+    --------
+    >>> gauge = Gauge(name='cache_entries', description='Number of cache entries', function=lambda: 5)
+    >>> gauge.value()
+    5
+    """
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, description: str, function: Optional[Callable[[], float]] = None):
+        super().__init__(name=name, description=description)
+        self.function = function
+        self._value = 0
+
+    def set(self, value: float):
+        """
+        Set the value of the gauge.
+
+        The value is ignored if the gauge has a function.
+
+        Parameters
+        ----------
+        value : float
+            The new value of the gauge.
+
+        Examples
+        --------
+        >>> Gauge(name='cache_entries', description='Number of cache entries').set(value=5)
+        """
+        self._value = value
+
+    def value(self) -> float:
+        """
+        Get the value of the gauge.
+
+        If the gauge has a function, it is called to get the value.
+
+        Returns
+        -------
+        float
+            The value of the gauge.
+
+        Examples
+        --------
+        >>> Gauge(name='cache_entries', description='Number of cache entries').value()
+        0
+        """
+        if self.function:
+            return self.function()
+        return self._value
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serializable snapshot of the gauge.
+
+        The snapshot contains the current value of the gauge.
+
+        Returns
+        -------
+        dict
+            The snapshot of the gauge.
+
+        Examples
+        --------
+        >>> Gauge(name='cache_entries', description='Number of cache entries').snapshot()
+        {'type': 'gauge', 'description': 'Number of cache entries', 'value': 0}
+        """
+        snapshot = super().snapshot()
+        snapshot['value'] = self.value()
+        return snapshot
+
+    def reset(self):
+        """
+        Reset the gauge.
+
+        The value is set back to zero, the function is kept.
+
+        Examples
+        --------
+        >>> Gauge(name='cache_entries', description='Number of cache entries').reset()
+        """
+        self._value = 0
+
+
+class Histogram(Metric):
+    """
+    A histogram of observed values, e.g. durations in seconds.
+
+    The total count and sum are tracked for all observations, percentiles are calculated from a bounded window of the
+    most recent observations.
+
+    Parameters
+    ----------
+    name : str
+        The name of the histogram.
+    description : str
+        A short description of the histogram.
+    size : int
+        The number of recent observations to keep for percentiles.
+
+    Attributes
+    ----------
+    samples : deque
+        The most recent observations.
+    count : int
+        The total number of observations.
+    sum : float
+        The sum of all observations.
+
+    Methods
+    -------
+    observe(value: float)
+        Record an observation.
+    time()
+        Context manager to observe the duration of a block of code.
+    percentile(percent: float) -> Optional[float]
+        Get a percentile of the recent observations.
+
+    Examples
+    --------
+    >>> histogram = Histogram(name='tick_seconds', description='Tick duration')
+    >>> with histogram.time():
+    ...     pass
+    >>> histogram.count
+    1
+    """
+    metric_type = 'histogram'
+    percentiles = (50, 90, 99)
+
+    def __init__(self, name: str, description: str, size: int = 1024):
+        super().__init__(name=name, description=description)
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Record an observation.
+
+        The oldest observation is dropped from the percentile window if it is full.
+
+        Parameters
+        ----------
+        value : float
+            The observed value.
+
+        Examples
+        --------
+        >>> Histogram(name='tick_seconds', description='Tick duration').observe(value=0.01)
+        """
+        with self._lock:
+            self.samples.append(value)
+            self.count += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """
+        Context manager to observe the duration of a block of code.
+
+        The duration is observed in seconds, even if the block raises an exception.
+
+        Yields
+        ------
+        None
+            Control is returned to the block being timed.
+
+        Examples
+        --------
+        >>> histogram = Histogram(name='tick_seconds', description='Tick duration')
+        >>> with histogram.time():
+        ...     pass
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Get a percentile of the recent observations.
+
+        The nearest-rank method is used.
+
+        Parameters
+        ----------
+        percent : float
+            The percentile to get, between 0 and 100.
+
+        Returns
+        -------
+        Optional[float]
+            The percentile, or None if there are no observations.
+
+        Examples
+        --------
+        >>> Histogram(name='tick_seconds', description='Tick duration').percentile(percent=90)
+        """
+        return self._percentile(samples=self._sorted_samples(), percent=percent)
+
+    def _sorted_samples(self) -> list:
+        # copy under the lock, but sort outside of it so observers are not blocked
+        with self._lock:
+            samples = list(self.samples)
+        samples.sort()
+        return samples
+
+    @staticmethod
+    def _percentile(samples: list, percent: float) -> Optional[float]:
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(percent / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serializable snapshot of the histogram.
+
+        The snapshot contains the count, sum, percentiles and maximum of the histogram.
+
+        Returns
+        -------
+        dict
+            The snapshot of the histogram.
+
+        Examples
+        --------
+        >>> Histogram(name='tick_seconds', description='Tick duration').snapshot()
+        {'type': 'histogram', 'description': 'Tick duration', 'count': 0, 'sum': 0.0, ...}
+        """
+        snapshot = super().snapshot()
+        samples = self._sorted_samples()
+        snapshot['count'] = self.count
+        snapshot['sum'] = self.sum
+        for percent in self.percentiles:
+            snapshot[f'p{percent}'] = self._percentile(samples=samples, percent=percent)
+        snapshot['max'] = samples[-1] if samples else None
+        return snapshot
+
+    def reset(self):
+        """
+        Reset the histogram.
+
+        All observations, the count and the sum are cleared.
+
+        Examples
+        --------
+        >>> Histogram(name='tick_seconds', description='Tick duration').reset()
+        """
+        with self._lock:
+            self.samples.clear()
+            self.count = 0
+            self.sum = 0.0
+
+
+class Registry:
+    """
+    A registry of metrics.
+
+    Metrics are created on first use and shared afterward, so any module can record to the same metric by name.
+
+    Attributes
+    ----------
+    metrics : Dict[str, Metric]
+        A mapping of metric names to metrics.
+
+    Methods
+    -------
+    counter(name: str, description: str = '') -> Counter
+        Get or create a counter.
+    gauge(name: str, description: str = '', function: Optional[Callable[[], float]] = None) -> Gauge
+        Get or create a gauge.
+    histogram(name: str, description: str = '') -> Histogram
+        Get or create a histogram.
+    snapshot() -> dict
+        Get a JSON serializable snapshot of all metrics.
+    reset()
+        Reset all metrics.
+    publish()
+        Publish a snapshot of all metrics to the Kodi home window.
+
+    Examples
+    --------
+    >>> metrics = Registry()
+    >>> metrics.counter(name='requests_total', description='Number of requests').inc()
+    """
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = cls(name=name, **kwargs)
+                self.metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise TypeError(f"Metric {name} is already registered as a {metric.metric_type}")
+            return metric
+
+    def counter(self, name: str, description: str = '') -> Counter:
+        """
+        Get or create a counter.
+
+        If a counter with the same name exists, it is returned instead.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter.
+        description : str
+            A short description of the counter.
+
+        Returns
+        -------
+        Counter
+            The counter.
+
+        Examples
+        --------
+        >>> Registry().counter(name='requests_total', description='Number of requests')
+        <...Counter object at 0x...>
+        """
+        return self._get_or_create(cls=Counter, name=name, description=description)
+
+    def gauge(self, name: str, description: str = '', function: Optional[Callable[[], float]] = None) -> Gauge:
+        """
+        Get or create a gauge.
+
+        If a gauge with the same name exists, it is returned instead.
+
+        Parameters
+        ----------
+        name : str
+            The name of the gauge.
+        description : str
+            A short description of the gauge.
+        function : Optional[Callable[[], float]]
+            A function returning the current value of the gauge. Replaces the function of an existing gauge.
+
+        Returns
+        -------
+        Gauge
+            The gauge.
+
+        Examples
+        --------
+        >>> Registry().gauge(name='cache_entries', description='Number of cache entries', function=lambda: 5)
+        <...Gauge object at 0x...>
+        """
+        gauge = self._get_or_create(cls=Gauge, name=name, description=description)
+        if function:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, description: str = '') -> Histogram:
+        """
+        Get or create a histogram.
+
+        If a histogram with the same name exists, it is returned instead.
+
+        Parameters
+        ----------
+        name : str
+            The name of the histogram.
+        description : str
+            A short description of the histogram.
+
+        Returns
+        -------
+        Histogram
+            The histogram.
+
+        Examples
+        --------
+        >>> Registry().histogram(name='tick_seconds', description='Tick duration')
+        <...Histogram object at 0x...>
+        """
+        return self._get_or_create(cls=Histogram, name=name, description=description)
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serializable snapshot of all metrics.
+
+        Each metric is locked only while its own snapshot is taken.
+
+        Returns
+        -------
+        dict
+            A mapping of metric names to metric snapshots.
+
+        Examples
+        --------
+        >>> Registry().snapshot()
+        {}
+        """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def reset(self):
+        """
+        Reset all metrics.
+
+        The metrics stay registered.
+
+        Examples
+        --------
+        >>> Registry().reset()
+        """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def publish(self):
+        """
+        Publish a snapshot of all metrics to the Kodi home window.
+
+        The script entry point runs in a different interpreter than the service, so the snapshot is shared as a
+        JSON encoded window property.
+
+        Examples
+        --------
+        >>> registry.publish()
+        """
+        xbmcgui.Window(HOME_WINDOW_ID).setProperty(PROPERTY_NAME, json.dumps(self.snapshot()))
+
+
+def read_published() -> dict:
+    """
+    Read the snapshot published by the service.
+
+    The snapshot is read from the Kodi home window property written by ``Registry.publish``.
+
+    Returns
+    -------
+    dict
+        A mapping of metric names to metric snapshots, empty if nothing has been published.
+
+    Examples
+    --------
+    >>> read_published()
+    {}
+    """
+    data = xbmcgui.Window(HOME_WINDOW_ID).getProperty(PROPERTY_NAME)
+    try:
+        return json.loads(data) if data else {}
+    except ValueError:
+        return {}
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """
+    Format a snapshot as human-readable text.
+
+    Each metric is written on its own line, followed by an indented line per value.
+
+    Parameters
+    ----------
+    snapshot : dict
+        A mapping of metric names to metric snapshots.
+
+    Returns
+    -------
+    str
+        The formatted snapshot.
+
+    Examples
+    --------
+    >>> format_snapshot(registry.snapshot())
+    '...'
+    """
+    def fmt(value) -> str:
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f'{value:.4f}'
+        return str(value)
+
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"{name}: {metric.get('description', '')}")
+        if metric['type'] == 'counter':
+            for value in metric['values']:
+                labels = ', '.join(f'{k}={v}' for k, v in sorted(value['labels'].items()))
+                lines.append(f"    {labels or 'total'}: {fmt(value['value'])}")
+        elif metric['type'] == 'gauge':
+            lines.append(f"    value: {fmt(metric['value'])}")
+        elif metric['type'] == 'histogram':
+            fields = ['count', 'sum'] + [f'p{p}' for p in Histogram.percentiles] + ['max']
+            lines.append('    ' + ' '.join(f'{field}={fmt(metric.get(field))}' for field in fields))
+
+    return '\n'.join(lines)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in sorted(labels.items())) + '}'
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return 'NaN'
+    return repr(float(value))
+
+
+def format_prometheus(snapshot: dict, prefix: str = constants.name.lower()) -> str:
+    """
+    Format a snapshot in the Prometheus text exposition format.
+
+    Histograms are exposed as summaries, with quantiles calculated from the recent observations.
+
+    Parameters
+    ----------
+    snapshot : dict
+        A mapping of metric names to metric snapshots.
+    prefix : str
+        The prefix to add to each metric name.
+
+    Returns
+    -------
+    str
+        The formatted snapshot.
+
+    Examples
+    --------
+    >>> format_prometheus(registry.snapshot())
+    '...'
+    """
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        full_name = f'{prefix}_{name}' if prefix else name
+        metric_type = 'summary' if metric['type'] == 'histogram' else metric['type']
+
+        lines.append(f"# HELP {full_name} {metric.get('description', '')}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        if metric['type'] == 'counter':
+            for value in metric['values']:
+                lines.append(f"{full_name}{_format_labels(value['labels'])} {_format_value(value['value'])}")
+        elif metric['type'] == 'gauge':
+            lines.append(f"{full_name} {_format_value(metric['value'])}")
+        elif metric['type'] == 'histogram':
+            for percent in Histogram.percentiles:
+                labels = _format_labels(dict(quantile=percent / 100))
+                lines.append(f"{full_name}{labels} {_format_value(metric.get(f'p{percent}'))}")
+            lines.append(f"{full_name}_sum {_format_value(metric['sum'])}")
+            lines.append(f"{full_name}_count {_format_value(metric['count'])}")
+
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,304 @@
+# standard imports
+from concurrent import futures
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# lib imports
+import requests
+
+# local imports
+from . import logger
+from . import metrics
+from . import settings
+
+hedges = metrics.registry.counter(
+    name='themerrdb_hedges_total',
+    description='Hedged ThemerrDB requests, by result (sent, won, lost)',
+)
+failovers = metrics.registry.counter(
+    name='themerrdb_failovers_total',
+    description='ThemerrDB requests retried on another mirror after a failure',
+)
+
+
+class MirrorPool:
+    """
+    Hedged requests across the mirrors of a static JSON API.
+
+    Every request starts on one mirror, chosen at random and weighted by the inverse of its average latency, so faster
+    mirrors take most requests while slower ones keep being measured. If that mirror has not answered within its 90th
+    percentile latency, a hedged request is sent to the next fastest mirror, and the first good answer is used. Errors
+    and server errors fail over to the next mirror immediately. With a single mirror, requests are made on the calling
+    thread without hedging.
+
+    Parameters
+    ----------
+    urls : Callable[[], List[str]]
+        Get the base URLs of the mirrors, without a trailing slash. Read on every request, so changes apply at once.
+    timeout : float
+        The number of seconds to wait for a mirror to answer.
+    default_delay : float
+        The hedge delay, in seconds, until a mirror has ``min_samples`` latency samples.
+    min_delay : float
+        The minimum hedge delay, in seconds, so fast mirrors are not hedged on jitter.
+    min_samples : int
+        The number of latency samples needed to use the 90th percentile as the hedge delay.
+    smoothing : float
+        The weight of the latest latency in the moving average used for the mirror selection.
+    failure_penalty : float
+        The latency, in seconds, recorded for a failed request.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    urls : Callable[[], List[str]]
+        Get the base URLs of the mirrors.
+    timeout : float
+        The number of seconds to wait for a mirror to answer.
+    default_delay : float
+        The hedge delay until a mirror has enough latency samples.
+    min_delay : float
+        The minimum hedge delay.
+    min_samples : int
+        The number of latency samples needed to use the 90th percentile as the hedge delay.
+    smoothing : float
+        The weight of the latest latency in the moving average.
+    failure_penalty : float
+        The latency recorded for a failed request.
+
+    Methods
+    -------
+    latency(url: str) -> Optional[float]
+        Get the average latency of a mirror.
+    hedge_delay(url: str) -> float
+        Get the time to wait for a mirror before hedging.
+    order() -> List[str]
+        Get the mirrors in the order they are tried.
+    get(path: str) -> requests.Response
+        Get a path from the mirrors.
+
+    Examples
+    --------
+    >>> pool = MirrorPool(urls=lambda: ['https://app.lizardbyte.dev/ThemerrDB'])
+    >>> pool.order()
+    ['https://app.lizardbyte.dev/ThemerrDB']
+    """
+    def __init__(
+            self,
+            urls: Callable[[], List[str]],
+            timeout: float = 10.0,
+            default_delay: float = 0.5,
+            min_delay: float = 0.05,
+            min_samples: int = 10,
+            smoothing: float = 0.2,
+            failure_penalty: float = 5.0,
+    ):
+        self.log = logger.log
+        self.urls = urls
+        self.timeout = timeout
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self.failure_penalty = failure_penalty
+
+        self._latency = {}  # url -> moving average of the latency
+        self._samples: Dict[str, metrics.Histogram] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def latency(self, url: str) -> Optional[float]:
+        """
+        Get the average latency of a mirror.
+
+        Failed requests count as ``failure_penalty`` seconds.
+
+        Parameters
+        ----------
+        url : str
+            The base URL of the mirror.
+
+        Returns
+        -------
+        Optional[float]
+            The moving average of the latency in seconds, or None if the mirror was not requested yet.
+
+        Examples
+        --------
+        >>> MirrorPool(urls=lambda: []).latency(url='https://app.lizardbyte.dev/ThemerrDB')
+        """
+        with self._lock:
+            return self._latency.get(url)
+
+    def hedge_delay(self, url: str) -> float:
+        """
+        Get the time to wait for a mirror before hedging.
+
+        Requests which take longer than the 90th percentile of the recent latencies of the mirror are hedged, so about
+        1 in 10 requests is sent twice.
+
+        Parameters
+        ----------
+        url : str
+            The base URL of the mirror.
+
+        Returns
+        -------
+        float
+            The hedge delay in seconds.
+
+        Examples
+        --------
+        >>> MirrorPool(urls=lambda: []).hedge_delay(url='https://app.lizardbyte.dev/ThemerrDB')
+        0.5
+        """
+        with self._lock:
+            samples = self._samples.get(url)
+        if samples is None or len(samples.samples) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, samples.percentile(percent=90))
+
+    def order(self) -> List[str]:
+        """
+        Get the mirrors in the order they are tried.
+
+        The first mirror is chosen at random, weighted by the inverse of the average latency. Mirrors which were not
+        requested yet are weighted like the fastest mirror, so they are measured. The other mirrors follow, fastest
+        first.
+
+        Returns
+        -------
+        List[str]
+            The base URLs of the mirrors.
+
+        Examples
+        --------
+        >>> MirrorPool(urls=lambda: ['https://app.lizardbyte.dev/ThemerrDB']).order()
+        ['https://app.lizardbyte.dev/ThemerrDB']
+        """
+        urls = list(dict.fromkeys(self.urls()))  # without duplicates, in the configured order
+        if len(urls) <= 1:
+            return urls
+
+        with self._lock:
+            known = {url: self._latency[url] for url in urls if url in self._latency}
+        fastest = min(known.values()) if known else 1.0
+        latencies = {url: known.get(url, fastest) for url in urls}
+
+        first = random.choices(urls, weights=[1 / max(latencies[url], 1e-3) for url in urls])[0]
+        rest = sorted((url for url in urls if url != first), key=latencies.get)
+        return [first] + rest
+
+    def _record(self, url: str, seconds: float):
+        with self._lock:
+            previous = self._latency.get(url)
+            self._latency[url] = seconds if previous is None else (
+                self.smoothing * seconds + (1 - self.smoothing) * previous)
+            if url not in self._samples:
+                self._samples[url] = metrics.Histogram(name='mirror_seconds', description=url, size=128)
+        self._samples[url].observe(seconds)
+
+    def _request(self, url: str, path: str) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            response = requests.get(url=f"{url}/{path}", timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            self._record(url=url, seconds=self.failure_penalty)
+            raise
+
+        seconds = time.perf_counter() - start
+        self._record(url=url, seconds=seconds if response.status_code < 500 else self.failure_penalty)
+        return response
+
+    def _submit(self, url: str, path: str) -> futures.Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='ThemerrMirror')
+        return self._executor.submit(self._request, url, path)
+
+    def get(self, path: str) -> requests.Response:
+        """
+        Get a path from the mirrors.
+
+        The first response without a server error is returned, e.g. a 404 from a mirror which does not have the item.
+        Hedged requests which lose are left to finish in the background, their latency is still recorded.
+
+        Parameters
+        ----------
+        path : str
+            The path to get, relative to the base URLs.
+
+        Returns
+        -------
+        requests.Response
+            The first good response, or the last server error if every mirror failed.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            If every mirror failed without a response.
+
+        Examples
+        --------
+        >>> pool = MirrorPool(urls=lambda: ['https://app.lizardbyte.dev/ThemerrDB'])
+        >>> pool.get(path='movies/themoviedb/10378.json')
+        <Response [200]>
+        """
+        urls = self.order()
+        if len(urls) == 1:
+            return self._request(url=urls[0], path=path)
+
+        candidates = iter(urls)
+        pending = {}
+
+        def launch() -> bool:
+            url = next(candidates, None)
+            if url is None:
+                return False
+            pending[self._submit(url=url, path=path)] = url
+            return True
+
+        launch()
+        first = urls[0]
+        hedge_sent = False
+        may_hedge = True
+        last = None
+        while pending:
+            timeout = self.hedge_delay(url=first) if may_hedge else None
+            done, _ = futures.wait(pending, timeout=timeout, return_when=futures.FIRST_COMPLETED)
+            if not done:
+                may_hedge = False
+                if launch():
+                    hedge_sent = True
+                    hedges.inc(labels=dict(result='sent'))
+                    self.log.debug(f"No answer from {first} after {timeout:.3f}s, hedging {path}")
+                continue
+
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    last = e
+                    continue
+                if response.status_code >= 500:
+                    last = response
+                    continue
+
+                if hedge_sent:
+                    hedges.inc(labels=dict(result='lost' if url == first else 'won'))
+                return response
+
+            if not pending and launch():
+                may_hedge = False  # a failover is not hedged again
+                failovers.inc()
+
+        if isinstance(last, Exception):
+            raise last
+        return last
+
+
+themerrdb = MirrorPool(urls=lambda: [settings.settings.themerrdb_url()] + settings.settings.themerrdb_mirrors())
@@ -1,10 +1,26 @@
+# standard imports
+import json
+import threading
+from typing import Callable, List, Optional, Tuple
+
 # kodi imports
 import xbmc
 
 # local imports
+from . import constants
 from . import logger
+from . import metrics
+from . import profiler
 from . import settings
 
+# the kinds of library items with themes, as sent in library notifications
+library_kinds = ('movie', 'tvshow', 'set')
+
+library_changes = metrics.registry.counter(
+    name='library_changes_total',
+    description='Library changes from Kodi notifications, by kind and event (added, updated, removed)',
+)
+
 
 class ThemerrMonitor(xbmc.Monitor):
     """
@@ -12,10 +28,24 @@ class ThemerrMonitor(xbmc.Monitor):
 
     Creates a new monitor to notify addon about changes.
 
+    Video library notifications from Kodi are collected as changes of movies, TV shows and movie sets. While the
+    library is scanned or cleaned, changes are collected until it finishes, then passed to the library handler in one
+    call. Other changes are passed on at once.
+
+    Parameters
+    ----------
+    library_handler : Optional[Callable[[List[Tuple[str, str, int]]], None]]
+        The function applying library changes, called with a list of the event (``added``, ``updated`` or
+        ``removed``), the kind (``movie``, ``tvshow`` or ``set``) and the database id of each changed item.
+
     Attributes
     ----------
     log : logging.Logger
         The logger of the ThemerrMonitor class.
+    library_handler : Optional[Callable[[List[Tuple[str, str, int]]], None]]
+        The function applying library changes.
+    scanning : bool
+        Whether the library is being scanned or cleaned.
 
     Methods
     -------
@@ -23,14 +53,25 @@ class ThemerrMonitor(xbmc.Monitor):
         Check if Kodi is requesting an abort.
     onSettingsChanged()
         Check if Kodi settings have been modified.
+    onNotification(sender: str, method: str, data: str)
+        Handle notifications sent to the addon.
+    library_notification(method: str, data: str)
+        Collect a video library change.
+    flush_library_changes()
+        Hand the collected library changes to the library handler.
 
     Examples
     --------
     >>> monitor = ThemerrMonitor()
     """
-    def __init__(self):
+    def __init__(self, library_handler: Optional[Callable[[List[Tuple[str, str, int]]], None]] = None):
         super().__init__()
         self.log = logger.log
+        self.library_handler = library_handler
+        self.scanning = False
+
+        self._library_changes = {}  # (kind, database id) -> event
+        self._lock = threading.Lock()
 
     def abortRequested(self) -> bool:
         """
@@ -66,3 +107,117 @@ class ThemerrMonitor(xbmc.Monitor):
 
         # reload the settings
         settings.settings = settings.Settings()
+
+    def onNotification(self, sender: str, method: str, data: str):
+        """
+        Handle notifications sent to the addon.
+
+        The script entry point sends commands to the service with ``NotifyAll``, which Kodi delivers with the method
+        prefixed by ``Other.``. Video library notifications from Kodi are collected as library changes. Notifications
+        from other senders are ignored.
+
+        Parameters
+        ----------
+        sender : str
+            The sender of the notification.
+        method : str
+            The name of the notification.
+        data : str
+            The JSON encoded data of the notification.
+
+        Examples
+        --------
+        >>> monitor = ThemerrMonitor()
+        >>> monitor.onNotification(sender='service.themerr', method='Other.profile', data='null')
+        """
+        if sender == 'xbmc' and method.startswith('VideoLibrary.'):
+            self.library_notification(method=method, data=data)
+            return
+
+        if sender != constants.addon_id:
+            return
+
+        if method == 'Other.profile':
+            profiler.profiler.start(
+                mode=settings.settings.profile_mode(),
+                duration=settings.settings.profile_duration(),
+            )
+
+    def library_notification(self, method: str, data: str):
+        """
+        Collect a video library change.
+
+        ``VideoLibrary.OnUpdate`` is an added item when its data has ``added``, otherwise an updated item, updates of
+        the play count only are ignored. ``VideoLibrary.OnRemove`` is a removed item. Changes of the same item are
+        merged, an item added and updated is still added. Items other than movies, TV shows and movie sets are ignored,
+        as seasons and episodes have the theme of their TV show.
+
+        Parameters
+        ----------
+        method : str
+            The name of the notification, e.g. ``VideoLibrary.OnUpdate``.
+        data : str
+            The JSON encoded data of the notification, e.g. ``{"item": {"id": 1, "type": "movie"}, "added": true}``.
+
+        Examples
+        --------
+        >>> monitor = ThemerrMonitor()
+        >>> monitor.library_notification(method='VideoLibrary.OnRemove', data='{"id": 1, "type": "movie"}')
+        """
+        if method in ('VideoLibrary.OnScanStarted', 'VideoLibrary.OnCleanStarted'):
+            self.scanning = True
+            return
+        if method in ('VideoLibrary.OnScanFinished', 'VideoLibrary.OnCleanFinished'):
+            self.scanning = False
+            self.flush_library_changes()
+            return
+        if method not in ('VideoLibrary.OnUpdate', 'VideoLibrary.OnRemove'):
+            return
+
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(payload, dict):
+            return
+
+        item = payload.get('item', payload)
+        kind, dbid = item.get('type'), item.get('id')
+        if kind not in library_kinds or not isinstance(dbid, int):
+            return
+
+        if method == 'VideoLibrary.OnRemove':
+            event = 'removed'
+        elif payload.get('added'):
+            event = 'added'
+        elif 'playcount' in payload:
+            return
+        else:
+            event = 'updated'
+
+        with self._lock:
+            if not (event == 'updated' and self._library_changes.get((kind, dbid)) == 'added'):
+                self._library_changes[(kind, dbid)] = event
+        library_changes.inc(labels=dict(kind=kind, event=event))
+
+        if not self.scanning:
+            self.flush_library_changes()
+
+    def flush_library_changes(self):
+        """
+        Hand the collected library changes to the library handler.
+
+        The changes are passed in the order they were collected. Without a library handler, they are dropped.
+
+        Examples
+        --------
+        >>> monitor = ThemerrMonitor()
+        >>> monitor.flush_library_changes()
+        """
+        with self._lock:
+            changes = [(event, kind, dbid) for (kind, dbid), event in self._library_changes.items()]
+            self._library_changes.clear()
+
+        if changes and self.library_handler:
+            self.log.debug(f"ThemerrMonitor: {len(changes)} library changes")
+            self.library_handler(changes)
@@ -1,11 +1,23 @@
 # standard imports
-from typing import Optional
+from collections import deque
+import threading
+from typing import Dict, Optional, Tuple
 
 # kodi imports
+import xbmc
 import xbmcgui
 
 # local imports
 from . import constants
+from . import ratelimit
+
+# token bucket limits per log severity, as (tokens per second, burst size)
+# severities which are not listed here (i.e. errors) are never rate limited
+default_rate_limits = {
+    xbmc.LOGDEBUG: (0.5, 2),
+    xbmc.LOGINFO: (0.5, 2),
+    xbmc.LOGWARNING: (1, 3),
+}
 
 
 class Notifier:
@@ -14,6 +26,11 @@ class Notifier:
 
     A wrapper class for the ``xbmcgui.Dialog.notification`` method.
 
+    Notifications are rate limited per log severity using a token bucket. Messages which exceed the rate limit are
+    held back and merged into a single summary notification the next time a notification with the same severity is
+    allowed, or when ``flush`` is called. Error notifications, and notifications without a severity, are never rate
+    limited.
+
     Parameters
     ----------
     heading : Optional[str]
@@ -24,6 +41,10 @@ class Notifier:
         The time to show the notification dialog.
     sound : Optional[bool]
         Whether to play a sound when showing the notification dialog.
+    rate_limits : Optional[Dict[int, Tuple[float, float]]]
+        A mapping of log levels to ``(rate, capacity)`` token bucket limits. Defaults to ``default_rate_limits``.
+    max_pending : int
+        The maximum number of held back messages to keep per log level.
 
     Attributes
     ----------
@@ -37,6 +58,14 @@ class Notifier:
         The time to show the notification dialog.
     sound : Optional[bool]
         Whether to play a sound when showing the notification dialog.
+    buckets : Dict[int, ratelimit.TokenBucket]
+        A mapping of log levels to token buckets.
+    pending : Dict[int, deque]
+        A mapping of log levels to messages which have been held back by the rate limit.
+    pending_icons : Dict[int, str]
+        A mapping of log levels to the icon of their most recently held back message.
+    suppressed : Dict[int, int]
+        A mapping of log levels to the number of messages held back since the last notification.
 
     Methods
     -------
@@ -46,8 +75,11 @@ class Notifier:
         icon: Optional[str] = None,
         time: Optional[int] = None,
         sound: Optional[bool] = None,
+        level: Optional[int] = None,
     )
         Show a notification dialog.
+    flush()
+        Show a summary notification for any held back messages.
 
     Examples
     --------
@@ -59,6 +91,8 @@ class Notifier:
             icon: Optional[str] = xbmcgui.NOTIFICATION_INFO,
             time: Optional[int] = 5000,
             sound: Optional[bool] = True,
+            rate_limits: Optional[Dict[int, Tuple[float, float]]] = None,
+            max_pending: int = 50,
     ):
         self.dialog = xbmcgui.Dialog()
         self.heading = heading
@@ -66,6 +100,17 @@ class Notifier:
         self.time = time
         self.sound = sound
 
+        rate_limits = rate_limits if rate_limits is not None else default_rate_limits
+        self.buckets = {
+            level: ratelimit.TokenBucket(rate=rate, capacity=capacity)
+            for level, (rate, capacity) in rate_limits.items()
+        }
+        self.pending = {level: deque(maxlen=max_pending) for level in self.buckets}
+        self.pending_icons = {level: self.icon for level in self.buckets}
+        self.suppressed = {level: 0 for level in self.buckets}
+
+        self._lock = threading.Lock()
+
     def notify(
             self,
             message: str,
@@ -73,11 +118,14 @@ class Notifier:
             icon: Optional[str] = None,
             time: Optional[int] = None,
             sound: Optional[bool] = None,
+            level: Optional[int] = None,
     ):
         """
         Show a notification dialog.
 
         Use the ``xbmcgui.Dialog.notification`` method to show a notification dialog.
+        If the rate limit for the log level is exceeded, the message is held back and included in the next notification
+        with the same log level.
 
         Parameters
         ----------
@@ -91,11 +139,13 @@ class Notifier:
             The time to show the notification dialog.
         sound : Optional[bool]
             Whether to play a sound when showing the notification dialog.
+        level : Optional[int]
+            The log level of the message, e.g. ``xbmc.LOGDEBUG``, which selects the rate limit.
 
         Examples
         --------
         >>> notifier = Notifier()
-        >>> notifier.notify("Hello World!")
+        >>> notifier.notify("Hello World!", level=xbmc.LOGINFO)
         """
         # get default values if not provided
         heading = heading if heading is not None else self.heading
@@ -103,6 +153,16 @@ class Notifier:
         time = time if time is not None else self.time
         sound = sound if sound is not None else self.sound
 
+        bucket = self.buckets.get(level)
+        if bucket:
+            with self._lock:
+                if not bucket.consume():
+                    self.pending[level].append(message)
+                    self.pending_icons[level] = icon
+                    self.suppressed[level] += 1
+                    return
+                heading, message = self._coalesce(level=level, heading=heading, message=message)
+
         self.dialog.notification(
             heading=heading,
             message=message,
@@ -110,3 +170,44 @@ class Notifier:
             time=time,
             sound=sound,
         )
+
+    def flush(self):
+        """
+        Show a summary notification for any held back messages.
+
+        A summary notification is only shown for log levels which have messages held back and are within their rate
+        limit. The service calls this periodically, so messages held back at the end of a burst are still shown.
+
+        Examples
+        --------
+        >>> notifier = Notifier()
+        >>> notifier.flush()
+        """
+        for level, bucket in self.buckets.items():
+            with self._lock:
+                if not self.pending[level] or not bucket.consume():
+                    continue
+                icon = self.pending_icons[level]
+                message = self.pending[level].pop()
+                self.suppressed[level] -= 1
+                heading, message = self._coalesce(level=level, heading=self.heading, message=message)
+
+            self.dialog.notification(
+                heading=heading,
+                message=message,
+                icon=icon,
+                time=self.time,
+                sound=False,
+            )
+
+    def _coalesce(self, level: int, heading: str, message: str) -> Tuple[str, str]:
+        # merge held back messages into the message, the lock must be held by the caller
+        count = self.suppressed[level]
+        if not count:
+            return heading, message
+
+        messages = list(self.pending[level])[-2:] + [message]
+        self.pending[level].clear()
+        self.suppressed[level] = 0
+
+        return f"{heading} (+{count} more)", '\n'.join(messages)
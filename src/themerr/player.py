@@ -6,6 +6,7 @@ import xbmc
 
 # local imports
 from . import logger
+from . import tracing
 from . import youtube
 
 
@@ -34,6 +35,8 @@ class Player(xbmc.Player):
         Extract the audio URL from a YouTube URL.
     play_url(url: str, kodi_id: str, windowed: bool = False)
         Play a YouTube URL.
+    onAVStarted()
+        Record that the audio of a theme has started.
     stop()
         Stop playback.
     reset()
@@ -81,13 +84,31 @@ class Player(xbmc.Player):
         >>> player = Player()
         >>> player.play_url(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", kodi_id='tmdb_1')
         """
+        tracing.tracer.mark(kodi_id=kodi_id, name='extract_start')
         playable_url = self.ytdl_extract_url(url=url)
+        tracing.tracer.mark(kodi_id=kodi_id, name='extract_end')
         if playable_url:
+            tracing.tracer.mark(kodi_id=kodi_id, name='play')
             self.play(item=playable_url, windowed=windowed)
             self.theme_is_playing = True
             self.theme_playing_kodi_id = kodi_id
             self.theme_playing_url = playable_url
 
+    def onAVStarted(self):
+        """
+        Record that the audio of a theme has started.
+
+        This method is automatically called by Kodi when playback has started. It is ignored unless a theme is
+        playing.
+
+        Examples
+        --------
+        >>> player = Player()
+        >>> player.onAVStarted()
+        """
+        if self.theme_is_playing:
+            tracing.tracer.mark(kodi_id=self.theme_playing_kodi_id, name='av_started')
+
     def stop(self):
         """
         Stop playback.
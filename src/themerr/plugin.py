@@ -9,8 +9,12 @@ import xbmcvfs
 # local imports
 from . import constants
 from . import logger
+from . import memory
+from . import metrics
 from . import monitor
 from . import settings
+from . import status
+from . import tracing
 
 
 class Themerr:
@@ -37,11 +41,21 @@ class Themerr:
         The lib directory for the Themerr addon.
     threads : list
         A list of threads for the Themerr addon.
+    publish_interval : int
+        The number of seconds between publishing metrics and traces for the script entry point.
+    lookup_workers : int
+        The number of threads running ThemerrDB lookups.
+    status_server : Optional[status.StatusServer]
+        The status endpoint server, if enabled.
+    memory_tracker : memory.MemoryTracker
+        The tracker for memory growth, only active in dev mode.
 
     Methods
     -------
     start()
         Start the Themerr addon.
+    start_status_server()
+        Start the status endpoint server.
     terminate()
         Terminate the Themerr addon.
 
@@ -50,7 +64,7 @@ class Themerr:
     >>> Themerr().start()
     """
     def __init__(self):
-        self.log = logger.Logger()
+        self.log = logger.log
         self.monitor = monitor.ThemerrMonitor()
         self.settings = settings.Settings()
         self.gui = None
@@ -68,12 +82,18 @@ class Themerr:
             self.log.debug(f"Themerr sys.path: {p}")
 
         self.threads = []
+        self.publish_interval = 5
+        self.lookup_workers = 2
+        self.status_server = None
+        self.memory_tracker = memory.MemoryTracker()
 
     def start(self):
         """
         Start the Themerr addon.
 
-        The window watcher thread is started, then the addon waits for kodi to stop the addon.
+        The window watcher, lookup worker and watchdog threads are started, then the addon waits for kodi to stop the
+        addon. While waiting, metrics and traces are periodically published for the script entry point, notifications
+        held back by the rate limit are shown, and memory growth is checked in dev mode.
 
         Examples
         --------
@@ -81,7 +101,13 @@ class Themerr:
         """
         # this must be imported after the lib directory has been added to the python path
         from . import gui
-        self.gui = gui.Window()
+        self.gui = gui.Window(monitor_instance=self.monitor)
+
+        metrics.registry.gauge(
+            name='cache_entries',
+            description='Number of cached YouTube URLs',
+            function=lambda: len(self.gui.uuid_mapping),
+        )
 
         self.log.debug(f"Starting {constants.name} Service {self.add_on.getAddonInfo('version')}")
 
@@ -94,10 +120,62 @@ class Themerr:
         self.threads.append(window_watcher)
         window_watcher.start()
 
+        # start the lookup workers, so lookups do not block the window watcher
+        for number in range(1, self.lookup_workers + 1):
+            lookup_worker = Thread(
+                name=f'ThemerrLookupWorker{number}',
+                target=self.gui.scheduler.work,
+                daemon=True,
+            )
+            self.threads.append(lookup_worker)
+            lookup_worker.start()
+
+        # start the watchdog for slow window watcher ticks
+        watchdog = Thread(
+            name='ThemerrWatchdog',
+            target=self.gui.watchdog.watch,
+            daemon=True,
+        )
+        self.threads.append(watchdog)
+        watchdog.start()
+
+        if self.settings.status_endpoint():
+            self.start_status_server()
+
         # wait for the addon to be stopped by kodi
-        self.monitor.waitForAbort()
+        while not self.monitor.waitForAbort(timeout=self.publish_interval):
+            metrics.registry.publish()
+            tracing.publish()
+            self.log.notifier.flush()
+            self.memory_tracker.check()
         self.terminate()
 
+    def start_status_server(self):
+        """
+        Start the status endpoint server.
+
+        The server is started in its own thread, on the port from the addon settings.
+
+        Examples
+        --------
+        >>> Themerr().start_status_server()
+        """
+        port = self.settings.status_port()
+        try:
+            self.status_server = status.StatusServer(port=port, threads=self.threads)
+        except OSError as e:
+            self.log.error(f"Unable to start status endpoint on port {port}: {e}")
+            return
+
+        status_thread = Thread(
+            name='ThemerrStatusServer',
+            target=self.status_server.serve_forever,
+            daemon=True,
+        )
+        self.threads.append(status_thread)
+        status_thread.start()
+        self.log.info(f"Status endpoint listening on port {port}")
+
     def terminate(self):
         """
         Terminate the Themerr addon.
@@ -112,6 +190,12 @@ class Themerr:
 
         del self.monitor
 
+        self.memory_tracker.stop()
+
+        if self.status_server:
+            self.status_server.shutdown()
+            self.status_server.server_close()
+
         # try to terminate all threads
         for thread in self.threads:
             thread.join()
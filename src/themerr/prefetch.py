@@ -0,0 +1,194 @@
+# standard imports
+from collections import OrderedDict
+from typing import List, Optional
+
+# local imports
+from . import metrics
+
+prefetched_items = metrics.registry.counter(
+    name='prefetch_items_total',
+    description='Items ahead of the scroll queued for a lookup',
+)
+prefetch_hits = metrics.registry.counter(
+    name='prefetch_hits_total',
+    description='Prefetched items which were selected afterwards',
+)
+metrics.registry.gauge(
+    name='prefetch_hit_ratio',
+    description='Ratio of prefetched items which were selected afterwards',
+    function=lambda: prefetch_hits.total() / max(1, prefetched_items.total()),
+)
+
+
+class Prefetcher:
+    """
+    Predicts which items to prefetch from the movement of the focus.
+
+    The scroll velocity is estimated from successive container positions of the focused item, as a moving average in
+    items per second, with a sign for the direction. Items ahead of the movement are prefetched, with a lookahead
+    proportional to the velocity, so the item where the user stops is likely resolved already. Before any movement is
+    measured, the items on both sides are prefetched.
+
+    The prefetched items are remembered, so the hit rate of the prediction is reported when one of them is selected.
+
+    Parameters
+    ----------
+    horizon : float
+        The lookahead, in seconds of movement at the current velocity.
+    smoothing : float
+        The weight of the latest movement in the moving average.
+    history : int
+        The number of prefetched items remembered for the hit rate.
+
+    Attributes
+    ----------
+    horizon : float
+        The lookahead, in seconds of movement at the current velocity.
+    smoothing : float
+        The weight of the latest movement in the moving average.
+    history : int
+        The number of prefetched items remembered for the hit rate.
+    velocity : float
+        The moving average of the velocity, in items per second. Negative values are towards the start of the
+        container.
+
+    Methods
+    -------
+    moved(position: int, at: float)
+        Update the velocity for a new focus position.
+    offsets(max_lookahead: int) -> List[int]
+        Get the positions to prefetch, relative to the focused item.
+    prefetched(kodi_id: str)
+        Remember a prefetched item.
+    selected(kodi_id: Optional[str]) -> bool
+        Count a hit if a prefetched item is selected.
+
+    Examples
+    --------
+    >>> prefetcher = Prefetcher()
+    >>> prefetcher.moved(position=1, at=0.0)
+    >>> prefetcher.moved(position=2, at=0.5)
+    >>> prefetcher.offsets(max_lookahead=3)
+    [1, 2]
+    """
+    def __init__(self, horizon: float = 1.0, smoothing: float = 0.5, history: int = 256):
+        self.horizon = horizon
+        self.smoothing = smoothing
+        self.history = history
+        self.velocity = 0.0
+
+        self._last = None  # (position, time) of the previous focus
+        self._prefetched = OrderedDict()
+
+    def moved(self, position: int, at: float):
+        """
+        Update the velocity for a new focus position.
+
+        The window watcher calls this on every focus change, with the ``Container.CurrentItem`` position and the
+        ``time.monotonic()`` value of the change. Unknown positions reset the velocity.
+
+        Parameters
+        ----------
+        position : int
+            The position of the focused item in the container, 0 if unknown.
+        at : float
+            The time of the focus change, in seconds.
+
+        Examples
+        --------
+        >>> Prefetcher().moved(position=1, at=0.0)
+        """
+        last, self._last = self._last, (position, at) if position else None
+        if not position or last is None:
+            self.velocity = 0.0
+            return
+
+        last_position, last_at = last
+        elapsed = at - last_at
+        if elapsed <= 0:
+            return
+
+        velocity = (position - last_position) / elapsed
+        if not self.velocity or (velocity > 0) != (self.velocity > 0):
+            self.velocity = velocity  # the first movement, or a change of direction, starts over
+        else:
+            self.velocity = self.smoothing * velocity + (1 - self.smoothing) * self.velocity
+
+    def offsets(self, max_lookahead: int) -> List[int]:
+        """
+        Get the positions to prefetch, relative to the focused item.
+
+        The lookahead is the number of items passed in ``horizon`` seconds at the current velocity, at least 1 and at
+        most ``max_lookahead``.
+
+        Parameters
+        ----------
+        max_lookahead : int
+            The maximum number of items to prefetch.
+
+        Returns
+        -------
+        List[int]
+            The relative positions, nearest first. Without a measured velocity, the previous and next items.
+
+        Examples
+        --------
+        >>> Prefetcher().offsets(max_lookahead=3)
+        [1, -1]
+        """
+        if max_lookahead <= 0:
+            return []
+        if not self.velocity:
+            return [1, -1][:max_lookahead]
+
+        direction = 1 if self.velocity > 0 else -1
+        lookahead = min(max_lookahead, max(1, round(abs(self.velocity) * self.horizon)))
+        return [direction * offset for offset in range(1, lookahead + 1)]
+
+    def prefetched(self, kodi_id: str):
+        """
+        Remember a prefetched item.
+
+        The oldest item is forgotten once ``history`` items are remembered.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the prefetched item.
+
+        Examples
+        --------
+        >>> Prefetcher().prefetched(kodi_id='tmdb_1')
+        """
+        prefetched_items.inc()
+        self._prefetched[kodi_id] = None
+        self._prefetched.move_to_end(kodi_id)
+        while len(self._prefetched) > self.history:
+            self._prefetched.popitem(last=False)
+
+    def selected(self, kodi_id: Optional[str]) -> bool:
+        """
+        Count a hit if a prefetched item is selected.
+
+        Each prefetched item counts as a hit at most once.
+
+        Parameters
+        ----------
+        kodi_id : Optional[str]
+            The Kodi ID of the selected item.
+
+        Returns
+        -------
+        bool
+            True if the item was prefetched, otherwise False.
+
+        Examples
+        --------
+        >>> Prefetcher().selected(kodi_id='tmdb_1')
+        False
+        """
+        if kodi_id not in self._prefetched:
+            return False
+        del self._prefetched[kodi_id]
+        prefetch_hits.inc()
+        return True
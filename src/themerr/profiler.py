@@ -0,0 +1,324 @@
+# standard imports
+from collections import Counter
+from contextlib import contextmanager
+import cProfile
+from datetime import datetime
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# kodi imports
+import xbmc
+import xbmcvfs
+
+# local imports
+from . import logger
+from . import settings
+
+modes = ('cprofile', 'sampling')
+
+
+class _Session:
+    # the state of a single profiling run
+    def __init__(self, mode: str, duration: float, path: str):
+        self.mode = mode
+        self.deadline = time.monotonic() + duration
+        self.path = path
+        self.active = Counter()  # ident -> depth of the threads currently inside ``Profiler.profile``
+        self.profiles: Dict[int, cProfile.Profile] = {}  # ident -> profile of the thread, in cprofile mode
+        self.sampled = set()  # idents of the threads sampled in cprofile mode, as another profiler was active
+        self.samples = Counter()
+
+
+def output_directory() -> str:
+    """
+    Get the directory profiles are written to.
+
+    This is the addon profile directory, e.g. ``userdata/addon_data/service.themerr``.
+
+    Returns
+    -------
+    str
+        The translated path of the addon profile directory.
+
+    Examples
+    --------
+    >>> output_directory()
+    '...'
+    """
+    return xbmcvfs.translatePath(settings.settings.addon.getAddonInfo('profile'))
+
+
+def collapse_stack(frame) -> str:
+    """
+    Collapse a stack into a single line.
+
+    The frames are ordered from the outermost to the innermost and separated by semicolons, which is the format used
+    by flame graph tools.
+
+    Parameters
+    ----------
+    frame : frame
+        The innermost frame of the stack.
+
+    Returns
+    -------
+    str
+        The collapsed stack.
+
+    Examples
+    --------
+    >>> collapse_stack(frame=sys._getframe())
+    '...'
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+
+    return ';'.join(reversed(names))
+
+
+class Profiler:
+    """
+    Profile the service on demand.
+
+    Code wrapped with ``profile`` is profiled while a run is in progress, the window watcher wraps each tick, which
+    includes the playback path, and the lookup scheduler wraps each lookup, on whichever thread it runs. Two modes are
+    supported, ``cprofile`` records every call of the profiled threads, with a profile per thread, and writes their
+    combined ``pstats`` file, ``sampling`` periodically captures the stack of the profiled threads and writes a
+    collapsed stack file. In ``cprofile`` mode, threads which cannot enable their profile because another profiler is
+    active are sampled instead, and their stacks are written to a collapsed stack file next to the ``pstats`` file.
+    When no run is in progress, ``profile`` only reads an attribute.
+
+    Parameters
+    ----------
+    interval : float
+        The number of seconds between samples in sampling mode.
+    monitor : Optional[xbmc.Monitor]
+        The monitor used to wait while profiling. A new monitor is created if not provided.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    interval : float
+        The number of seconds between samples in sampling mode.
+    monitor : Optional[xbmc.Monitor]
+        The monitor used to wait while profiling.
+    thread : Optional[threading.Thread]
+        The thread of the most recent run.
+
+    Methods
+    -------
+    running() -> bool
+        Check if a run is in progress.
+    start(mode: str, duration: float, directory: Optional[str] = None) -> bool
+        Start a profiling run.
+    profile()
+        Profile the wrapped code if a run is in progress.
+
+    Examples
+    --------
+    >>> profiler = Profiler()
+    >>> profiler.start(mode='sampling', duration=30)
+    True
+    """
+    def __init__(self, interval: float = 0.01, monitor: Optional[xbmc.Monitor] = None):
+        self.log = logger.log
+        self.interval = interval
+        self.monitor = monitor
+        self.thread = None
+
+        self._session = None
+        self._condition = threading.Condition()
+
+    def running(self) -> bool:
+        """
+        Check if a run is in progress.
+
+        A run is in progress from the call to ``start`` until its output has been written.
+
+        Returns
+        -------
+        bool
+            True if a run is in progress, otherwise False.
+
+        Examples
+        --------
+        >>> Profiler().running()
+        False
+        """
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, mode: str, duration: float, directory: Optional[str] = None) -> bool:
+        """
+        Start a profiling run.
+
+        The run happens in its own thread, after the duration the output is written to the directory as
+        ``profile-<timestamp>.pstats`` or ``profile-<timestamp>.collapsed``.
+
+        Parameters
+        ----------
+        mode : str
+            The profiling mode, one of ``modes``.
+        duration : float
+            The number of seconds to profile for.
+        directory : Optional[str]
+            The directory to write the output to. Defaults to the addon profile directory.
+
+        Returns
+        -------
+        bool
+            True if the run was started, False if the mode is unknown or a run is already in progress.
+
+        Examples
+        --------
+        >>> Profiler().start(mode='cprofile', duration=30)
+        True
+        """
+        if mode not in modes:
+            self.log.error(f"Unknown profiler mode: {mode}")
+            return False
+        if self.running():
+            self.log.warning("Profiler is already running")
+            return False
+
+        directory = directory if directory else output_directory()
+        extension = 'pstats' if mode == 'cprofile' else 'collapsed'
+        path = os.path.join(directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+        session = _Session(mode=mode, duration=duration, path=path)
+        self.thread = threading.Thread(
+            name='ThemerrProfiler',
+            target=self._run,
+            args=(session,),
+            daemon=True,
+        )
+        self.thread.start()
+        self.log.info(f"Profiling in {mode} mode for {duration} seconds")
+        return True
+
+    @contextmanager
+    def profile(self):
+        """
+        Profile the wrapped code if a run is in progress.
+
+        Any number of threads may be profiled at once. Nested calls on the same thread are profiled by the outermost
+        call. From Python 3.12, cProfile is process wide and only one profile can be enabled at a time, so in
+        ``cprofile`` mode a thread whose profile cannot be enabled is sampled for the rest of the run.
+
+        Yields
+        ------
+        None
+            Control is yielded to the wrapped code.
+
+        Examples
+        --------
+        >>> with Profiler().profile():
+        ...     pass
+        """
+        if self._session is None:
+            yield
+            return
+
+        ident = threading.get_ident()
+        session = None
+        profile = None
+        try:
+            with self._condition:
+                session = self._session
+                if session is not None:
+                    session.active[ident] += 1
+                    if session.mode == 'cprofile' and session.active[ident] == 1 and ident not in session.sampled:
+                        profile = session.profiles.get(ident)
+                        if profile is None:
+                            profile = session.profiles[ident] = cProfile.Profile()
+            # enabled outside the lock, so the profile only records the wrapped code
+            if profile:
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    profile = None
+                    self.log.debug(f"Unable to enable cProfile, sampling the thread instead: {e}")
+                    with self._condition:
+                        session.sampled.add(ident)
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            if session is not None:
+                with self._condition:
+                    session.active[ident] -= 1
+                    if not session.active[ident]:
+                        del session.active[ident]
+                    self._condition.notify_all()
+
+    def _run(self, session: _Session):
+        monitor = self.monitor if self.monitor else xbmc.Monitor()
+        self._session = session
+
+        # in cprofile mode, only the threads which could not enable their profile are sampled
+        while time.monotonic() < session.deadline and not monitor.waitForAbort(self.interval):
+            self._sample(session=session)
+
+        # stop new threads from entering, then wait for the running ones to leave
+        with self._condition:
+            self._session = None
+            self._condition.wait_for(lambda: not session.active, timeout=10)
+
+        try:
+            paths = self._write(session=session)
+        except OSError as e:
+            self.log.error(f"Unable to write profile to {session.path}: {e}")
+        else:
+            for path in paths:
+                self.log.info(f"Profile written to {path}")
+            if not paths:
+                self.log.warning("Nothing was profiled, no profile written")
+
+    def _sample(self, session: _Session):
+        with self._condition:
+            idents = [ident for ident in session.active if session.mode == 'sampling' or ident in session.sampled]
+
+        frames = sys._current_frames()
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is not None:
+                session.samples[collapse_stack(frame=frame)] += 1
+
+    @staticmethod
+    def _write(session: _Session) -> List[str]:
+        paths = []
+        if session.mode == 'cprofile':
+            # combine the profiles of the threads, pstats cannot load an empty profile so those are skipped
+            stats = None
+            for profile in session.profiles.values():
+                profile.create_stats()
+                if not profile.stats:
+                    continue
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            if stats is not None:
+                os.makedirs(os.path.dirname(session.path), exist_ok=True)
+                stats.dump_stats(session.path)
+                paths.append(session.path)
+            if not session.samples:
+                return paths
+
+        path = session.path if session.mode == 'sampling' else f'{os.path.splitext(session.path)[0]}.collapsed'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in session.samples.most_common():
+                f.write(f'{stack} {count}\n')
+        paths.append(path)
+        return paths
+
+
+profiler = Profiler()
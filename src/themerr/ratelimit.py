@@ -0,0 +1,308 @@
+# standard imports
+import threading
+import time
+from typing import Callable
+
+# local imports
+from . import metrics
+from . import settings
+
+rate_limited = metrics.registry.counter(
+    name='rate_limited_total',
+    description='Outbound requests skipped by a rate limiter, by endpoint and priority',
+)
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket.
+
+    Tokens are added to the bucket at a fixed rate, up to the capacity of the bucket. Each action consumes one or more
+    tokens, when the bucket does not have enough tokens the action should be skipped or delayed.
+
+    Parameters
+    ----------
+    rate : float
+        The number of tokens added to the bucket per second.
+    capacity : float
+        The maximum number of tokens the bucket can hold. This is the allowed burst size.
+    clock : Callable[[], float]
+        The clock used to refill the bucket, in seconds. Defaults to ``time.monotonic``.
+
+    Attributes
+    ----------
+    rate : float
+        The number of tokens added to the bucket per second.
+    capacity : float
+        The maximum number of tokens the bucket can hold.
+    clock : Callable[[], float]
+        The clock used to refill the bucket.
+    tokens : float
+        The number of tokens currently in the bucket.
+    updated_at : float
+        The clock value of the last refill.
+
+    Methods
+    -------
+    consume(tokens: float = 1, reserve: float = 0) -> bool
+        Consume tokens from the bucket.
+    wait_time(tokens: float = 1, reserve: float = 0) -> float
+        Get the number of seconds until the tokens are available.
+
+    Examples
+    --------
+    >>> bucket = TokenBucket(rate=1, capacity=5)
+    >>> bucket.consume()
+    True
+    """
+    def __init__(
+            self,
+            rate: float,
+            capacity: float,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        if now <= self.updated_at:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def consume(self, tokens: float = 1, reserve: float = 0) -> bool:
+        """
+        Consume tokens from the bucket.
+
+        The bucket is refilled, then the tokens are removed if enough are available.
+
+        Parameters
+        ----------
+        tokens : float
+            The number of tokens to consume.
+        reserve : float
+            The number of tokens which must be left in the bucket afterwards, so they stay available to other callers.
+
+        Returns
+        -------
+        bool
+            True if the tokens were consumed, otherwise False.
+
+        Examples
+        --------
+        >>> bucket = TokenBucket(rate=1, capacity=1)
+        >>> bucket.consume()
+        True
+        >>> bucket.consume()
+        False
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens + reserve:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1, reserve: float = 0) -> float:
+        """
+        Get the number of seconds until the tokens are available.
+
+        No tokens are consumed by this method.
+
+        Parameters
+        ----------
+        tokens : float
+            The number of tokens required.
+        reserve : float
+            The number of tokens which must be left in the bucket afterwards.
+
+        Returns
+        -------
+        float
+            The number of seconds to wait, ``0.0`` if the tokens are available now.
+
+        Examples
+        --------
+        >>> bucket = TokenBucket(rate=1, capacity=1)
+        >>> bucket.wait_time()
+        0.0
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens + reserve:
+                return 0.0
+            if self.rate <= 0:
+                return float('inf')
+            return (tokens + reserve - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    A rate limit for the outbound requests to one endpoint.
+
+    All callers requesting the endpoint share a token bucket, refilled at the rate of a setting in requests per minute.
+    Interactive requests, made for the item the user is waiting on, wait up to ``max_wait`` seconds for a token.
+    Background requests, such as prefetching and refreshing stale items, never wait. They are skipped while an
+    interactive request is waiting, or when taking a token would leave less than ``reserve`` tokens for interactive
+    requests.
+
+    The time interactive requests waited is exported as the ``<name>_rate_limit_wait_seconds`` histogram, and skipped
+    requests are counted.
+
+    Parameters
+    ----------
+    name : str
+        The name of the endpoint, used in metrics.
+    rate : Callable[[], float]
+        Get the allowed number of requests per minute, 0 or less for no limit.
+    capacity : float
+        The allowed burst size.
+    reserve : float
+        The number of tokens background requests leave for interactive requests.
+    max_wait : float
+        The maximum number of seconds an interactive request waits for a token.
+    clock : Callable[[], float]
+        The clock used to refill the bucket, in seconds. Defaults to ``time.monotonic``.
+    sleep : Callable[[float], None]
+        The function used to wait, in seconds. Defaults to ``time.sleep``.
+
+    Attributes
+    ----------
+    name : str
+        The name of the endpoint.
+    rate : Callable[[], float]
+        Get the allowed number of requests per minute.
+    capacity : float
+        The allowed burst size.
+    reserve : float
+        The number of tokens background requests leave for interactive requests.
+    max_wait : float
+        The maximum number of seconds an interactive request waits for a token.
+    clock : Callable[[], float]
+        The clock used to refill the bucket.
+    sleep : Callable[[float], None]
+        The function used to wait.
+    bucket : TokenBucket
+        The token bucket shared by all callers.
+    wait : metrics.Histogram
+        The time interactive requests waited for a token.
+
+    Methods
+    -------
+    acquire(interactive: bool = True) -> bool
+        Take a token for a request.
+    reset()
+        Refill the bucket.
+
+    Examples
+    --------
+    >>> limiter = RateLimiter(name='example', rate=lambda: 60, capacity=1, reserve=0)
+    >>> limiter.acquire()
+    True
+    """
+    def __init__(
+            self,
+            name: str,
+            rate: Callable[[], float],
+            capacity: float,
+            reserve: float,
+            max_wait: float = 5.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self.bucket = TokenBucket(rate=0, capacity=capacity, clock=clock)
+        self.wait = metrics.registry.histogram(
+            name=f'{name}_rate_limit_wait_seconds',
+            description=f'Time interactive {name} requests waited for the rate limit',
+        )
+
+        self._waiting = 0  # the number of interactive requests waiting for a token
+        self._lock = threading.Lock()
+
+    def acquire(self, interactive: bool = True) -> bool:
+        """
+        Take a token for a request.
+
+        The rate setting is read on every call, so changes apply without a restart.
+
+        Parameters
+        ----------
+        interactive : bool
+            True if the user is waiting on the request, False for background requests.
+
+        Returns
+        -------
+        bool
+            True if the request may be made, False if it should be skipped.
+
+        Examples
+        --------
+        >>> RateLimiter(name='example', rate=lambda: 0, capacity=1, reserve=0).acquire(interactive=False)
+        True
+        """
+        per_minute = self.rate()
+        if per_minute <= 0:
+            return True
+        self.bucket.rate = per_minute / 60
+
+        if not interactive:
+            if not self._waiting and self.bucket.consume(reserve=self.reserve):
+                return True
+            rate_limited.inc(labels=dict(endpoint=self.name, priority='background'))
+            return False
+
+        started_at = self.clock()
+        with self._lock:
+            self._waiting += 1
+        try:
+            while not self.bucket.consume():
+                waited = self.clock() - started_at
+                if waited >= self.max_wait:
+                    rate_limited.inc(labels=dict(endpoint=self.name, priority='interactive'))
+                    return False
+                self.sleep(min(self.bucket.wait_time(), self.max_wait - waited))
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        self.wait.observe(self.clock() - started_at)
+        return True
+
+    def reset(self):
+        """
+        Refill the bucket.
+
+        The bucket is replaced by a full one using the current clock, e.g. after the clock is changed.
+
+        Examples
+        --------
+        >>> RateLimiter(name='example', rate=lambda: 60, capacity=1, reserve=0).reset()
+        """
+        self.bucket = TokenBucket(rate=self.bucket.rate, capacity=self.capacity, clock=self.clock)
+
+
+themerrdb = RateLimiter(
+    name='themerrdb',
+    rate=lambda: settings.settings.themerrdb_rate_limit(),
+    capacity=10,
+    reserve=5,
+)
+youtube = RateLimiter(
+    name='youtube',
+    rate=lambda: settings.settings.youtube_rate_limit(),
+    capacity=3,
+    reserve=1,
+)
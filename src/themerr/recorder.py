@@ -0,0 +1,340 @@
+# standard imports
+import hashlib
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+import secrets
+import time
+from typing import Callable, List, Optional
+
+# local imports
+from . import logger
+from . import profiler
+from . import settings
+
+FILE_NAME = 'navigation.tsv'
+SALT_FILE_NAME = 'navigation.salt'
+
+
+class Event:
+    """
+    A recorded focus change.
+
+    Events are written as one tab separated line each, in the order of the parameters.
+
+    Parameters
+    ----------
+    at : float
+        The Unix timestamp of the focus change.
+    container : str
+        The container type, e.g. ``movies`` or ``tvshows``.
+    index : int
+        The position of the focused item in the container, 0 if unknown.
+    id_hash : str
+        The salted hash of the Kodi ID of the focused item, empty if it has no ID.
+
+    Attributes
+    ----------
+    at : float
+        The Unix timestamp of the focus change.
+    container : str
+        The container type.
+    index : int
+        The position of the focused item in the container.
+    id_hash : str
+        The salted hash of the Kodi ID of the focused item.
+
+    Methods
+    -------
+    format() -> str
+        Format the event as a line of the recording.
+    parse(line: str) -> Event
+        Parse a line of the recording.
+
+    Examples
+    --------
+    >>> Event(at=1700000000.0, container='movies', index=3, id_hash='0123456789ab')
+    Event(at=1700000000.0, container='movies', index=3, id_hash='0123456789ab')
+    """
+    __slots__ = ('at', 'container', 'index', 'id_hash')
+
+    def __init__(self, at: float, container: str, index: int, id_hash: str):
+        self.at = at
+        self.container = container
+        self.index = index
+        self.id_hash = id_hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self.format() == other.format()
+
+    def __repr__(self) -> str:
+        return f'Event(at={self.at}, container={self.container!r}, index={self.index}, id_hash={self.id_hash!r})'
+
+    def format(self) -> str:
+        """
+        Format the event as a line of the recording.
+
+        The timestamp is rounded to milliseconds.
+
+        Returns
+        -------
+        str
+            The tab separated event, without a line break.
+
+        Examples
+        --------
+        >>> Event(at=1700000000.0, container='movies', index=3, id_hash='0123456789ab').format()
+        '1700000000.000\\tmovies\\t3\\t0123456789ab'
+        """
+        return f'{self.at:.3f}\t{self.container}\t{self.index}\t{self.id_hash}'
+
+    @classmethod
+    def parse(cls, line: str) -> 'Event':
+        """
+        Parse a line of the recording.
+
+        This is the reverse of ``format``.
+
+        Parameters
+        ----------
+        line : str
+            The tab separated event.
+
+        Returns
+        -------
+        Event
+            The parsed event.
+
+        Examples
+        --------
+        >>> Event.parse('1700000000.000\\tmovies\\t3\\t0123456789ab')
+        Event(at=1700000000.0, container='movies', index=3, id_hash='0123456789ab')
+        """
+        at, container, index, id_hash = line.rstrip('\n').split('\t')
+        return cls(at=float(at), container=container, index=int(index), id_hash=id_hash)
+
+
+class _RecordingHandler(RotatingFileHandler):
+    # logging handlers catch their own errors and print them to stderr, the recorder needs them to stop recording
+    def handleError(self, record: logging.LogRecord):
+        raise
+
+
+def read_recording(directory: Optional[str] = None) -> List[Event]:
+    """
+    Read the recorded events, oldest first.
+
+    The rotated files are read before the current file.
+
+    Parameters
+    ----------
+    directory : Optional[str]
+        The directory of the recording. Defaults to the addon profile directory.
+
+    Returns
+    -------
+    List[Event]
+        The recorded events.
+
+    Examples
+    --------
+    >>> read_recording(directory='/tmp')
+    [...]
+    """
+    directory = directory if directory else profiler.output_directory()
+    path = os.path.join(directory, FILE_NAME)
+
+    # rotated files are numbered from the newest to the oldest
+    paths = [f'{path}.{number}' for number in range(99, 0, -1)] + [path]
+
+    events = []
+    for file_path in paths:
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, encoding='utf-8') as f:
+            events.extend(Event.parse(line) for line in f if line.strip())
+
+    return events
+
+
+class NavigationRecorder:
+    """
+    Records anonymized focus changes of the window watcher.
+
+    When the navigation recorder setting is enabled, each focus change is appended to a rotating file in the addon
+    profile directory. Kodi IDs are hashed with a random salt, which is kept in a separate file and never recorded,
+    so the recording can be shared. When the setting is disabled, the window watcher skips the recorder entirely.
+
+    Parameters
+    ----------
+    directory : Optional[str]
+        The directory to record to. Defaults to the addon profile directory.
+    max_bytes : int
+        The size at which the file is rotated.
+    backups : int
+        The number of rotated files to keep.
+    clock : Callable[[], float]
+        The clock used to timestamp events. Defaults to ``time.time``.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    directory : Optional[str]
+        The directory to record to.
+    max_bytes : int
+        The size at which the file is rotated.
+    backups : int
+        The number of rotated files to keep.
+    clock : Callable[[], float]
+        The clock used to timestamp events.
+
+    Methods
+    -------
+    enabled() -> bool
+        Check if recording is enabled.
+    hash_id(kodi_id: Optional[str]) -> str
+        Anonymize a Kodi ID.
+    record(container: str, index: int, kodi_id: Optional[str])
+        Record a focus change.
+    close()
+        Close the recording file.
+
+    Examples
+    --------
+    >>> recorder = NavigationRecorder()
+    >>> if recorder.enabled():
+    ...     recorder.record(container='movies', index=3, kodi_id='tmdb_1')
+    """
+    def __init__(
+            self,
+            directory: Optional[str] = None,
+            max_bytes: int = 256 * 1024,
+            backups: int = 3,
+            clock: Callable[[], float] = time.time,
+    ):
+        self.log = logger.log
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.clock = clock
+
+        self._handler = None
+        self._salt = None
+        self._failed = False
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        Check if recording is enabled.
+
+        The window watcher checks this on focus changes only, so a disabled recorder costs nothing per tick.
+
+        Returns
+        -------
+        bool
+            True if the navigation recorder setting is enabled, otherwise False.
+
+        Examples
+        --------
+        >>> NavigationRecorder.enabled()
+        False
+        """
+        return settings.settings.navigation_recorder()
+
+    def _open(self):
+        directory = self.directory if self.directory else profiler.output_directory()
+        os.makedirs(directory, exist_ok=True)
+
+        salt_path = os.path.join(directory, SALT_FILE_NAME)
+        try:
+            with open(salt_path, encoding='utf-8') as f:
+                self._salt = f.read().strip()
+        except FileNotFoundError:
+            self._salt = secrets.token_hex(16)
+            with open(salt_path, 'w', encoding='utf-8') as f:
+                f.write(self._salt)
+
+        self._handler = _RecordingHandler(
+            filename=os.path.join(directory, FILE_NAME),
+            maxBytes=self.max_bytes,
+            backupCount=self.backups,
+            encoding='utf-8',
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+    def hash_id(self, kodi_id: Optional[str]) -> str:
+        """
+        Anonymize a Kodi ID.
+
+        The ID is hashed with the salt of the recording, so the same item always has the same hash, but the hash cannot
+        be looked up without the salt.
+
+        Parameters
+        ----------
+        kodi_id : Optional[str]
+            The Kodi ID, e.g. ``tmdb_1``.
+
+        Returns
+        -------
+        str
+            The first 12 characters of the salted SHA-256 hash, empty if there is no Kodi ID.
+
+        Examples
+        --------
+        >>> NavigationRecorder().hash_id(kodi_id='tmdb_1')
+        '...'
+        """
+        if not kodi_id:
+            return ''
+        return hashlib.sha256(f'{self._salt}{kodi_id}'.encode('utf-8')).hexdigest()[:12]
+
+    def record(self, container: str, index: int, kodi_id: Optional[str]):
+        """
+        Record a focus change.
+
+        The recording file is opened on the first event. Errors opening, writing or rotating the file, e.g. a full disk,
+        are logged once, then recording is stopped until the file is closed.
+
+        Parameters
+        ----------
+        container : str
+            The container type, e.g. ``movies`` or ``tvshows``.
+        index : int
+            The position of the focused item in the container, 0 if unknown.
+        kodi_id : Optional[str]
+            The Kodi ID of the focused item.
+
+        Examples
+        --------
+        >>> NavigationRecorder().record(container='movies', index=3, kodi_id='tmdb_1')
+        """
+        if self._failed:
+            return
+
+        try:
+            if self._handler is None:
+                self._open()
+
+            event = Event(at=self.clock(), container=container, index=index, id_hash=self.hash_id(kodi_id=kodi_id))
+            self._handler.emit(logging.makeLogRecord(dict(msg=event.format())))
+        except (OSError, ValueError) as e:  # ValueError for writes to a file closed by a failed rotation
+            self._failed = True
+            self.log.error(f"Unable to record navigation, recording is stopped: {e}")
+
+    def close(self):
+        """
+        Close the recording file.
+
+        The file is opened again by the next ``record``, which also retries after an error.
+
+        Examples
+        --------
+        >>> NavigationRecorder().close()
+        """
+        self._failed = False
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
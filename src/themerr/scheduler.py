@@ -0,0 +1,372 @@
+# standard imports
+from collections import OrderedDict
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+# kodi imports
+import xbmc
+
+# local imports
+from . import logger
+from . import metrics
+from . import profiler
+
+# lanes, in priority order
+FOCUSED = 0
+NEIGHBOR = 1
+WARMUP = 2
+lanes = ('focused', 'neighbor', 'warmup')
+
+tasks = metrics.registry.counter(
+    name='lookup_tasks_total',
+    description='Lookup tasks, by lane and result (queued, rejected, evicted, cancelled, demoted, done, failed)',
+)
+queue_depth = metrics.registry.gauge(
+    name='lookup_queue_depth',
+    description='Number of queued lookup tasks',
+)
+queue_wait = metrics.registry.histogram(
+    name='lookup_queue_wait_seconds',
+    description='Time lookup tasks spent queued before running',
+)
+
+
+class _Task(NamedTuple):
+    kodi_id: str
+    db_type: Optional[str]
+    lane: int
+    queued_at: float
+
+
+class LookupScheduler:
+    """
+    A bounded priority queue for ThemerrDB lookups.
+
+    Lookups are queued in one of three lanes, the focused item first, then its neighbors, then warmup work. Each Kodi
+    ID is queued at most once, queuing it again in a higher priority lane moves it to that lane. When the focus moves,
+    the queued focused lookup is cancelled, as the user has left the item, and the queued neighbor lookups are moved
+    to the warmup lane.
+
+    The queue is bounded. When it is full, a lookup evicts the oldest lookup of a lower priority lane, otherwise it is
+    rejected, so producers of lower priority work are pushed back instead of growing the queue.
+
+    Lookups are run by worker threads calling ``work``. Without workers, ``run_next`` runs lookups on the calling
+    thread.
+
+    Parameters
+    ----------
+    handler : Callable[[str, Optional[str], int], None]
+        The function running a lookup, called with the Kodi ID, the database type and the lane.
+    monitor : Optional[xbmc.Monitor]
+        The monitor used to stop the workers.
+    max_size : int
+        The maximum number of queued lookups.
+    clock : Callable[[], float]
+        The clock used to measure the queue wait. Defaults to ``time.monotonic``.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    handler : Callable[[str, Optional[str], int], None]
+        The function running a lookup.
+    monitor : xbmc.Monitor
+        The monitor used to stop the workers.
+    max_size : int
+        The maximum number of queued lookups.
+    clock : Callable[[], float]
+        The clock used to measure the queue wait.
+
+    Methods
+    -------
+    submit(kodi_id: str, db_type: Optional[str], lane: int = FOCUSED) -> bool
+        Queue a lookup.
+    accepting(lane: int) -> bool
+        Check if a lookup in a lane would be queued.
+    pending(kodi_id: str) -> bool
+        Check if a lookup is queued or running.
+    focus(kodi_id: Optional[str])
+        Update the queue for a new focused item.
+    size() -> int
+        Get the number of queued lookups.
+    running() -> bool
+        Check if any worker is running.
+    run_next(timeout: Optional[float] = None) -> bool
+        Run the next lookup.
+    work()
+        Run lookups until Kodi requests an abort.
+
+    Examples
+    --------
+    >>> scheduler = LookupScheduler(handler=print)
+    >>> scheduler.submit(kodi_id='tmdb_1', db_type='movies')
+    True
+    >>> scheduler.run_next()
+    tmdb_1 movies 0
+    True
+    """
+    def __init__(
+            self,
+            handler: Callable[[str, Optional[str], int], None],
+            monitor: Optional[xbmc.Monitor] = None,
+            max_size: int = 32,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.log = logger.log
+        self.handler = handler
+        self.monitor = monitor if monitor else xbmc.Monitor()
+        self.max_size = max_size
+        self.clock = clock
+
+        self._lanes = [OrderedDict() for _ in lanes]  # kodi id -> task, oldest first
+        self._in_flight = set()
+        self._workers = 0
+        self._condition = threading.Condition()
+
+    def _queued(self, kodi_id: str) -> Optional[_Task]:
+        for lane in self._lanes:
+            if kodi_id in lane:
+                return lane[kodi_id]
+
+    def _remove(self, task: _Task, result: str):
+        del self._lanes[task.lane][task.kodi_id]
+        tasks.inc(labels=dict(lane=lanes[task.lane], result=result))
+
+    def _update_depth(self):
+        queue_depth.set(self.size())
+
+    def submit(self, kodi_id: str, db_type: Optional[str], lane: int = FOCUSED) -> bool:
+        """
+        Queue a lookup.
+
+        Lookups which are already running, or queued in the same or a higher priority lane, are not queued again.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID to look up.
+        db_type : Optional[str]
+            The ThemerrDB database type, e.g. ``movies``.
+        lane : int
+            The lane to queue the lookup in, one of ``FOCUSED``, ``NEIGHBOR`` or ``WARMUP``.
+
+        Returns
+        -------
+        bool
+            True if the lookup is queued or running, False if it was rejected as the queue is full.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).submit(kodi_id='tmdb_1', db_type='movies', lane=WARMUP)
+        True
+        """
+        with self._condition:
+            if kodi_id in self._in_flight:
+                return True
+
+            queued = self._queued(kodi_id=kodi_id)
+            if queued:
+                if queued.lane <= lane:
+                    return True
+                del self._lanes[queued.lane][kodi_id]  # moved to the higher priority lane below
+            elif self.size() >= self.max_size:
+                if not self._evict(lane=lane):
+                    tasks.inc(labels=dict(lane=lanes[lane], result='rejected'))
+                    return False
+
+            self._lanes[lane][kodi_id] = _Task(kodi_id=kodi_id, db_type=db_type, lane=lane, queued_at=self.clock())
+            tasks.inc(labels=dict(lane=lanes[lane], result='queued'))
+            self._update_depth()
+            self._condition.notify()
+            return True
+
+    def _evict(self, lane: int) -> bool:
+        for lower in range(len(lanes) - 1, lane, -1):
+            if self._lanes[lower]:
+                task = next(iter(self._lanes[lower].values()))
+                self._remove(task=task, result='evicted')
+                return True
+        return False
+
+    def accepting(self, lane: int) -> bool:
+        """
+        Check if a lookup in a lane would be queued.
+
+        Producers of neighbor and warmup lookups should stop when this is False.
+
+        Parameters
+        ----------
+        lane : int
+            The lane of the lookup.
+
+        Returns
+        -------
+        bool
+            True if the queue has room, or a lookup of a lower priority lane can be evicted, otherwise False.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).accepting(lane=WARMUP)
+        True
+        """
+        with self._condition:
+            if self.size() < self.max_size:
+                return True
+            return any(self._lanes[lower] for lower in range(lane + 1, len(lanes)))
+
+    def pending(self, kodi_id: str) -> bool:
+        """
+        Check if a lookup is queued or running.
+
+        A lookup is pending from being queued until its handler returns.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the lookup.
+
+        Returns
+        -------
+        bool
+            True if the lookup is queued or running, otherwise False.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).pending(kodi_id='tmdb_1')
+        False
+        """
+        with self._condition:
+            return kodi_id in self._in_flight or self._queued(kodi_id=kodi_id) is not None
+
+    def focus(self, kodi_id: Optional[str]):
+        """
+        Update the queue for a new focused item.
+
+        Queued focused lookups for other items are cancelled, and queued neighbor lookups are moved to the warmup lane.
+        Running lookups are not interrupted.
+
+        Parameters
+        ----------
+        kodi_id : Optional[str]
+            The Kodi ID of the focused item.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).focus(kodi_id='tmdb_1')
+        """
+        with self._condition:
+            for task in list(self._lanes[FOCUSED].values()):
+                if task.kodi_id != kodi_id:
+                    self._remove(task=task, result='cancelled')
+
+            for task in list(self._lanes[NEIGHBOR].values()):
+                self._remove(task=task, result='demoted')
+                self._lanes[WARMUP][task.kodi_id] = task._replace(lane=WARMUP)
+
+            self._update_depth()
+
+    def size(self) -> int:
+        """
+        Get the number of queued lookups.
+
+        Running lookups are not counted.
+
+        Returns
+        -------
+        int
+            The number of queued lookups.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).size()
+        0
+        """
+        return sum(len(lane) for lane in self._lanes)
+
+    def running(self) -> bool:
+        """
+        Check if any worker is running.
+
+        Without workers, the window watcher runs lookups itself.
+
+        Returns
+        -------
+        bool
+            True if at least one thread is in ``work``, otherwise False.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).running()
+        False
+        """
+        return self._workers > 0
+
+    def run_next(self, timeout: Optional[float] = None) -> bool:
+        """
+        Run the next lookup.
+
+        The oldest lookup of the highest priority lane is run on the calling thread, inside the profiler, so lookups
+        on worker threads are included in profiles. Errors raised by the handler are logged, so a failed lookup does
+        not stop a worker.
+
+        Parameters
+        ----------
+        timeout : Optional[float]
+            The number of seconds to wait for a lookup if the queue is empty. By default, there is no wait.
+
+        Returns
+        -------
+        bool
+            True if a lookup was run, otherwise False.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).run_next()
+        False
+        """
+        with self._condition:
+            if not self.size() and timeout:
+                self._condition.wait(timeout=timeout)
+
+            lane = next((lane for lane in self._lanes if lane), None)
+            if lane is None:
+                return False
+
+            _, task = lane.popitem(last=False)
+            self._in_flight.add(task.kodi_id)
+            self._update_depth()
+
+        queue_wait.observe(self.clock() - task.queued_at)
+        result = 'done'
+        try:
+            with profiler.profiler.profile():
+                self.handler(task.kodi_id, task.db_type, task.lane)
+        except Exception as e:
+            result = 'failed'
+            self.log.error(f"Lookup of {task.kodi_id} failed: {e}")
+        finally:
+            with self._condition:
+                self._in_flight.discard(task.kodi_id)
+            tasks.inc(labels=dict(lane=lanes[task.lane], result=result))
+
+        return True
+
+    def work(self):
+        """
+        Run lookups until Kodi requests an abort.
+
+        This is the target of the lookup worker threads.
+
+        Examples
+        --------
+        >>> LookupScheduler(handler=print).work()
+        """
+        with self._condition:
+            self._workers += 1
+        try:
+            while not self.monitor.abortRequested():
+                self.run_next(timeout=0.5)
+        finally:
+            with self._condition:
+                self._workers -= 1
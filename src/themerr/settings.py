@@ -1,3 +1,6 @@
+# standard imports
+from typing import List
+
 # kodi imports
 import xbmcaddon
 
@@ -20,8 +23,36 @@ class Settings:
     -------
     dev_mode()
         Get the dev mode setting.
+    lookup_delay()
+        Get the lookup delay setting.
+    memory_interval()
+        Get the memory snapshot interval setting.
+    memory_depth()
+        Get the memory traceback depth setting.
     theme_timeout()
         Get the theme timeout setting.
+    themerrdb_url()
+        Get the ThemerrDB URL setting.
+    themerrdb_mirrors()
+        Get the ThemerrDB mirrors setting.
+    themerrdb_rate_limit()
+        Get the ThemerrDB rate limit setting.
+    youtube_rate_limit()
+        Get the YouTube rate limit setting.
+    status_endpoint()
+        Get the status endpoint setting.
+    status_port()
+        Get the status port setting.
+    slow_tick_threshold()
+        Get the slow tick threshold setting.
+    prefetch_lookahead()
+        Get the prefetch lookahead setting.
+    profile_mode()
+        Get the profile mode setting.
+    profile_duration()
+        Get the profile duration setting.
+    navigation_recorder()
+        Get the navigation recorder setting.
 
     Examples
     --------
@@ -49,6 +80,63 @@ class Settings:
         """
         return self.addon.getSettingBool(id='devMode')
 
+    def lookup_delay(self) -> int:
+        """
+        Get the lookup delay setting.
+
+        Get the number of milliseconds an item must be selected before it is looked up from the addon settings.
+
+        Returns
+        -------
+        int
+            The lookup delay setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.lookup_delay()
+        250
+        """
+        return self.addon.getSettingInt(id='lookupDelay')
+
+    def memory_interval(self) -> int:
+        """
+        Get the memory snapshot interval setting.
+
+        Get the memory snapshot interval setting from the addon settings, in seconds.
+
+        Returns
+        -------
+        int
+            The memory snapshot interval setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.memory_interval()
+        300
+        """
+        return self.addon.getSettingInt(id='memoryInterval')
+
+    def memory_depth(self) -> int:
+        """
+        Get the memory traceback depth setting.
+
+        Get the number of frames stored for each memory allocation from the addon settings.
+
+        Returns
+        -------
+        int
+            The memory traceback depth setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.memory_depth()
+        1
+        """
+        return self.addon.getSettingInt(id='memoryDepth')
+
     def theme_timeout(self) -> int:
         """
         Get the theme timeout setting.
@@ -68,5 +156,217 @@ class Settings:
         """
         return self.addon.getSettingInt(id='themeTimeout')
 
+    def themerrdb_url(self) -> str:
+        """
+        Get the ThemerrDB URL setting.
+
+        Get the base URL of ThemerrDB from the addon settings, without a trailing slash. The public ThemerrDB is used if
+        the setting is empty.
+
+        Returns
+        -------
+        str
+            The ThemerrDB URL setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.themerrdb_url()
+        'https://app.lizardbyte.dev/ThemerrDB'
+        """
+        return self.addon.getSettingString(id='themerrdbUrl').rstrip('/') or constants.themerrdb_url
+
+    def themerrdb_mirrors(self) -> List[str]:
+        """
+        Get the ThemerrDB mirrors setting.
+
+        Get the base URLs of the ThemerrDB mirrors from the addon settings, without trailing slashes. The setting is a
+        comma separated list.
+
+        Returns
+        -------
+        List[str]
+            The ThemerrDB mirrors setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.themerrdb_mirrors()
+        []
+        """
+        mirrors = self.addon.getSettingString(id='themerrdbMirrors').split(',')
+        return [mirror.strip().rstrip('/') for mirror in mirrors if mirror.strip()]
+
+    def themerrdb_rate_limit(self) -> int:
+        """
+        Get the ThemerrDB rate limit setting.
+
+        Get the maximum number of ThemerrDB requests per minute from the addon settings, 0 for no limit.
+
+        Returns
+        -------
+        int
+            The ThemerrDB rate limit setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.themerrdb_rate_limit()
+        120
+        """
+        return self.addon.getSettingInt(id='themerrdbRateLimit')
+
+    def youtube_rate_limit(self) -> int:
+        """
+        Get the YouTube rate limit setting.
+
+        Get the maximum number of YouTube extractions per minute from the addon settings, 0 for no limit.
+
+        Returns
+        -------
+        int
+            The YouTube rate limit setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.youtube_rate_limit()
+        20
+        """
+        return self.addon.getSettingInt(id='youtubeRateLimit')
+
+    def status_endpoint(self) -> bool:
+        """
+        Get the status endpoint setting.
+
+        Get the status endpoint setting from the addon settings.
+
+        Returns
+        -------
+        bool
+            The status endpoint setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.status_endpoint()
+        False
+        """
+        return self.addon.getSettingBool(id='statusEndpoint')
+
+    def status_port(self) -> int:
+        """
+        Get the status port setting.
+
+        Get the status port setting from the addon settings.
+
+        Returns
+        -------
+        int
+            The status port setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.status_port()
+        9787
+        """
+        return self.addon.getSettingInt(id='statusPort')
+
+    def slow_tick_threshold(self) -> int:
+        """
+        Get the slow tick threshold setting.
+
+        Get the slow tick threshold setting from the addon settings, in milliseconds.
+
+        Returns
+        -------
+        int
+            The slow tick threshold setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.slow_tick_threshold()
+        1000
+        """
+        return self.addon.getSettingInt(id='slowTickThreshold')
+
+    def prefetch_lookahead(self) -> int:
+        """
+        Get the prefetch lookahead setting.
+
+        Get the maximum number of items ahead of the scroll to prefetch from the addon settings.
+
+        Returns
+        -------
+        int
+            The prefetch lookahead setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.prefetch_lookahead()
+        3
+        """
+        return self.addon.getSettingInt(id='prefetchLookahead')
+
+    def profile_mode(self) -> str:
+        """
+        Get the profile mode setting.
+
+        Get the profile mode setting from the addon settings, either ``cprofile`` or ``sampling``.
+
+        Returns
+        -------
+        str
+            The profile mode setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.profile_mode()
+        'sampling'
+        """
+        return self.addon.getSettingString(id='profileMode')
+
+    def profile_duration(self) -> int:
+        """
+        Get the profile duration setting.
+
+        Get the profile duration setting from the addon settings, in seconds.
+
+        Returns
+        -------
+        int
+            The profile duration setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.profile_duration()
+        30
+        """
+        return self.addon.getSettingInt(id='profileDuration')
+
+    def navigation_recorder(self) -> bool:
+        """
+        Get the navigation recorder setting.
+
+        Get the navigation recorder setting from the addon settings.
+
+        Returns
+        -------
+        bool
+            The navigation recorder setting.
+
+        Examples
+        --------
+        >>> addon_settings = Settings()
+        >>> addon_settings.navigation_recorder()
+        False
+        """
+        return self.addon.getSettingBool(id='navigationRecorder')
+
 
 settings = Settings()
@@ -0,0 +1,243 @@
+# standard imports
+from collections import OrderedDict
+import json
+import os
+import threading
+from typing import Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+# kodi imports
+import xbmcvfs
+
+# lib imports
+import requests
+
+# local imports
+from . import mirrors
+from . import settings
+
+# schemes of Kodi virtual file systems, read with xbmcvfs
+vfs_schemes = ('smb', 'nfs', 'ftp', 'sftp', 'dav', 'davs')
+
+
+class HttpSource:
+    """
+    A ThemerrDB served over HTTP.
+
+    Requests are made through a mirror pool, so they are hedged and failed over when mirrors are configured.
+
+    Parameters
+    ----------
+    pool : mirrors.MirrorPool
+        The mirror pool used for requests.
+
+    Attributes
+    ----------
+    pool : mirrors.MirrorPool
+        The mirror pool used for requests.
+    remote : bool
+        Always True, requests to this source are rate limited.
+
+    Methods
+    -------
+    get(path: str) -> Tuple[int, Optional[dict]]
+        Get an item.
+
+    Examples
+    --------
+    >>> source = HttpSource(pool=mirrors.themerrdb)
+    """
+    remote = True
+
+    def __init__(self, pool: mirrors.MirrorPool):
+        self.pool = pool
+
+    def get(self, path: str) -> Tuple[int, Optional[dict]]:
+        """
+        Get an item.
+
+        Responses which are not JSON, e.g. error pages, have no data.
+
+        Parameters
+        ----------
+        path : str
+            The path of the item, e.g. ``movies/themoviedb/10378.json``.
+
+        Returns
+        -------
+        Tuple[int, Optional[dict]]
+            The HTTP status code, and the item if it was found.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            If no mirror answered.
+
+        Examples
+        --------
+        >>> HttpSource(pool=mirrors.themerrdb).get(path='movies/themoviedb/10378.json')
+        (200, {...})
+        """
+        response = self.pool.get(path=path)
+        try:
+            data = response.json()
+        except (requests.exceptions.RequestException, json.decoder.JSONDecodeError):
+            data = None
+        return response.status_code, data
+
+
+class DirectorySource:
+    """
+    A copy of ThemerrDB in a directory.
+
+    The directory has the same layout as ThemerrDB, e.g. ``movies/themoviedb/10378.json``. Local directories are read
+    directly, paths of Kodi virtual file systems, such as ``smb://`` shares, are read with ``xbmcvfs``. ``special://``
+    paths are translated to local paths.
+
+    Parsed items are cached with the modification time of their file, so unchanged files are not read or parsed again.
+    Checking the modification time is the only file system access for cached items.
+
+    Parameters
+    ----------
+    root : str
+        The directory, a local path, a ``file://`` URL, or a Kodi path such as ``smb://server/share/ThemerrDB``.
+    max_size : int
+        The maximum number of cached items.
+
+    Attributes
+    ----------
+    root : str
+        The directory, as a local path or a Kodi virtual file system path.
+    max_size : int
+        The maximum number of cached items.
+    remote : bool
+        Always False, reads from this source are not rate limited.
+
+    Methods
+    -------
+    get(path: str) -> Tuple[int, Optional[dict]]
+        Get an item.
+
+    Examples
+    --------
+    >>> source = DirectorySource(root='/srv/ThemerrDB')
+    """
+    remote = False
+
+    def __init__(self, root: str, max_size: int = 4096):
+        scheme = urlparse(root).scheme
+        if scheme == 'file':
+            root = unquote(urlparse(root).path)
+        elif scheme == 'special':
+            root = xbmcvfs.translatePath(root)
+        self.root = root.rstrip('/\\')
+        self.max_size = max_size
+
+        self._vfs = urlparse(self.root).scheme in vfs_schemes
+        self._items = OrderedDict()  # path -> (modification time, item)
+        self._lock = threading.Lock()
+
+    def _mtime(self, file: str) -> Optional[float]:
+        if self._vfs:
+            if not xbmcvfs.exists(file):
+                return None
+            return xbmcvfs.Stat(file).st_mtime()
+        try:
+            return os.stat(file).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _read(self, file: str) -> str:
+        if self._vfs:
+            with xbmcvfs.File(file) as f:
+                return f.read()
+        with open(file, encoding='utf-8') as f:
+            return f.read()
+
+    def _available(self) -> bool:
+        if self._vfs:
+            return xbmcvfs.exists(f'{self.root}/')
+        return os.path.isdir(self.root)
+
+    def get(self, path: str) -> Tuple[int, Optional[dict]]:
+        """
+        Get an item.
+
+        Missing items are reported like HTTP, with a 404 status code.
+
+        Parameters
+        ----------
+        path : str
+            The path of the item, e.g. ``movies/themoviedb/10378.json``.
+
+        Returns
+        -------
+        Tuple[int, Optional[dict]]
+            200 and the item if it was found, otherwise 404 and None.
+
+        Raises
+        ------
+        OSError
+            If the directory is not available, e.g. the share is not mounted.
+
+        Examples
+        --------
+        >>> DirectorySource(root='/srv/ThemerrDB').get(path='movies/themoviedb/10378.json')
+        (200, {...})
+        """
+        file = f'{self.root}/{path}'
+        mtime = self._mtime(file=file)
+        if mtime is None:
+            if not self._available():
+                raise OSError(f'ThemerrDB directory {self.root} is not available')
+            return 404, None
+
+        with self._lock:
+            cached = self._items.get(path)
+            if cached and cached[0] == mtime:
+                self._items.move_to_end(path)
+                return 200, cached[1]
+
+        try:
+            item = json.loads(self._read(file=file))
+        except json.decoder.JSONDecodeError:
+            return 200, None
+
+        with self._lock:
+            self._items[path] = (mtime, item)
+            self._items.move_to_end(path)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return 200, item
+
+
+http = HttpSource(pool=mirrors.themerrdb)
+_directories = {}
+_directories_lock = threading.Lock()
+
+
+def themerrdb() -> Union[HttpSource, DirectorySource]:
+    """
+    Get the ThemerrDB source.
+
+    The source is chosen by the ThemerrDB URL setting. HTTP URLs are requested through the ThemerrDB mirror pool, any
+    other value is read as a directory. Directory sources are kept per directory, so their cache is reused.
+
+    Returns
+    -------
+    Union[HttpSource, DirectorySource]
+        The ThemerrDB source.
+
+    Examples
+    --------
+    >>> themerrdb()
+    <...HttpSource object at 0x...>
+    """
+    url = settings.settings.themerrdb_url()
+    if urlparse(url).scheme in ('http', 'https'):
+        return http
+
+    with _directories_lock:
+        if url not in _directories:
+            _directories[url] = DirectorySource(root=url)
+        return _directories[url]
@@ -0,0 +1,102 @@
+# standard imports
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import List
+
+# local imports
+from . import constants
+from . import logger
+from . import metrics
+
+log = logger.log
+
+
+def format_threads(threads: List[Thread], prefix: str = constants.name.lower()) -> str:
+    """
+    Format the liveness of threads in the Prometheus text exposition format.
+
+    Each thread is exposed as a gauge labelled with the thread name, with a value of 1 if it is alive, otherwise 0.
+
+    Parameters
+    ----------
+    threads : List[Thread]
+        The threads to report on.
+    prefix : str
+        The prefix to add to the metric name.
+
+    Returns
+    -------
+    str
+        The formatted thread liveness.
+
+    Examples
+    --------
+    >>> format_threads(threads=[])
+    '...'
+    """
+    name = f'{prefix}_thread_alive'
+    lines = [
+        f'# HELP {name} Whether a service thread is alive',
+        f'# TYPE {name} gauge',
+    ]
+    for thread in threads:
+        lines.append(f'{name}{{thread="{thread.name}"}} {1 if thread.is_alive() else 0}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class _StatusRequestHandler(BaseHTTPRequestHandler):
+    # serves the metrics registry and thread liveness at /metrics
+    server: 'StatusServer'
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        body = (metrics.format_prometheus(snapshot=metrics.registry.snapshot()) +
+                format_threads(threads=self.server.threads)).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        # log to the Kodi log instead of stderr
+        log.debug(f"Status endpoint: {format % args}")
+
+
+class StatusServer(ThreadingHTTPServer):
+    """
+    HTTP server for the status endpoint.
+
+    Serves the metrics registry and the liveness of the service threads at ``/metrics``, in the Prometheus text
+    exposition format. The server runs in its own thread and all work is done when the endpoint is scraped, so the
+    window watcher is not affected.
+
+    Parameters
+    ----------
+    port : int
+        The port to listen on.
+    threads : List[Thread]
+        The service threads to report liveness for.
+    host : str
+        The address to bind to, defaults to all interfaces.
+
+    Attributes
+    ----------
+    threads : List[Thread]
+        The service threads to report liveness for.
+
+    Examples
+    --------
+    >>> server = StatusServer(port=9787, threads=[])
+    >>> server.serve_forever()
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int, threads: List[Thread], host: str = ''):
+        super().__init__((host, port), _StatusRequestHandler)
+        self.threads = threads
@@ -0,0 +1,147 @@
+# local imports
+from . import metrics
+from . import settings
+
+throttled_lookups = metrics.registry.counter(
+    name='lookups_throttled_total',
+    description='Uncached items left before the lookup delay passed, so no lookup was made',
+)
+scroll_velocity = metrics.registry.gauge(
+    name='scroll_velocity',
+    description='Measured scroll velocity, in items per second',
+)
+
+
+class DwellThrottle:
+    """
+    Gates lookups on how long an item has been focused.
+
+    While scrolling, most items are only focused for a moment, so looking them up wastes a request. A lookup is only
+    made once the item has been focused for the dwell time. The dwell time starts at the lookup delay setting, and
+    grows with the scroll velocity, measured as a moving average of the time between focus changes, so items passed
+    at a steady pace are not looked up either. Focus changes further apart than the maximum dwell time end the
+    scroll.
+
+    Parameters
+    ----------
+    factor : float
+        The dwell time while scrolling, as a multiple of the average time between focus changes.
+    max_factor : float
+        The maximum dwell time, as a multiple of the lookup delay.
+    smoothing : float
+        The weight of the latest time between focus changes in the moving average.
+
+    Attributes
+    ----------
+    factor : float
+        The dwell time while scrolling, as a multiple of the average time between focus changes.
+    max_factor : float
+        The maximum dwell time, as a multiple of the lookup delay.
+    smoothing : float
+        The weight of the latest time between focus changes in the moving average.
+    interval : Optional[float]
+        The average number of seconds between focus changes, None when not scrolling.
+
+    Methods
+    -------
+    focus_changed(at: float)
+        Update the scroll velocity for a focus change.
+    dwell() -> float
+        Get the current dwell time.
+    ready(focused_at: float, now: float) -> bool
+        Check if the focused item may be looked up.
+
+    Examples
+    --------
+    >>> throttle = DwellThrottle()
+    >>> throttle.focus_changed(at=0.0)
+    >>> throttle.ready(focused_at=0.0, now=1.0)
+    True
+    """
+    def __init__(self, factor: float = 1.5, max_factor: float = 4.0, smoothing: float = 0.3):
+        self.factor = factor
+        self.max_factor = max_factor
+        self.smoothing = smoothing
+        self.interval = None
+
+        self._last_focus_at = None
+
+    @staticmethod
+    def _delay() -> float:
+        return max(0, settings.settings.lookup_delay()) / 1000
+
+    def focus_changed(self, at: float):
+        """
+        Update the scroll velocity for a focus change.
+
+        The window watcher calls this on every focus change, with the ``time.monotonic()`` value of the change.
+
+        Parameters
+        ----------
+        at : float
+            The time of the focus change, in seconds.
+
+        Examples
+        --------
+        >>> DwellThrottle().focus_changed(at=0.0)
+        """
+        last_focus_at, self._last_focus_at = self._last_focus_at, at
+        if last_focus_at is None:
+            return
+
+        interval = at - last_focus_at
+        if interval > self._delay() * self.max_factor:
+            self.interval = None  # the focus rested, so this is not a scroll
+        elif self.interval is None:
+            self.interval = interval
+        else:
+            self.interval = self.smoothing * interval + (1 - self.smoothing) * self.interval
+
+        scroll_velocity.set(1 / self.interval if self.interval else 0.0)
+
+    def dwell(self) -> float:
+        """
+        Get the current dwell time.
+
+        The dwell time is the lookup delay, or a multiple of the average time between focus changes while scrolling,
+        up to the maximum dwell time.
+
+        Returns
+        -------
+        float
+            The number of seconds an item must be focused before it is looked up.
+
+        Examples
+        --------
+        >>> DwellThrottle().dwell()
+        0.25
+        """
+        delay = self._delay()
+        if self.interval is None:
+            return delay
+        return min(max(delay, self.interval * self.factor), delay * self.max_factor)
+
+    def ready(self, focused_at: float, now: float) -> bool:
+        """
+        Check if the focused item may be looked up.
+
+        This is only checked for items which are not cached, cached items are always answered immediately.
+
+        Parameters
+        ----------
+        focused_at : float
+            The time the item was focused, in seconds.
+        now : float
+            The current time, in seconds.
+
+        Returns
+        -------
+        bool
+            True if the item has been focused for the dwell time, otherwise False.
+
+        Examples
+        --------
+        >>> DwellThrottle().ready(focused_at=0.0, now=1.0)
+        True
+        """
+        return now - focused_at >= self.dwell()
@@ -0,0 +1,264 @@
+# standard imports
+from collections import deque
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+# kodi imports
+import xbmcgui
+
+# local imports
+from . import constants
+from . import metrics
+
+PROPERTY_NAME = f'{constants.addon_id}.traces'
+
+# the phases reported on, as (name, start mark, end mark)
+phases = (
+    ('focus_to_lookup', 'focus', 'lookup_start'),
+    ('lookup', 'lookup_start', 'lookup_end'),
+    ('lookup_to_extract', 'lookup_end', 'extract_start'),
+    ('extract', 'extract_start', 'extract_end'),
+    ('extract_to_play', 'extract_end', 'play'),
+    ('play_to_audio', 'play', 'av_started'),
+    ('focus_to_audio', 'focus', 'av_started'),
+)
+
+
+class Trace:
+    """
+    The timeline of a single selected item, from being selected until its theme is heard.
+
+    Each step is recorded as a named mark, using ``time.monotonic()``.
+
+    Parameters
+    ----------
+    kodi_id : str
+        The Kodi ID of the selected item.
+
+    Attributes
+    ----------
+    kodi_id : str
+        The Kodi ID of the selected item.
+    marks : Dict[str, float]
+        A mapping of mark names to timestamps.
+
+    Methods
+    -------
+    mark(name: str)
+        Record a mark.
+    duration(start: str, end: str) -> Optional[float]
+        Get the number of seconds between two marks.
+
+    Examples
+    --------
+    >>> trace = Trace(kodi_id='tmdb_1')
+    >>> trace.mark(name='lookup_start')
+    """
+    def __init__(self, kodi_id: str):
+        self.kodi_id = kodi_id
+        self.marks: Dict[str, float] = {'focus': time.monotonic()}
+
+    def mark(self, name: str):
+        """
+        Record a mark.
+
+        Only the first occurrence of each mark is kept.
+
+        Parameters
+        ----------
+        name : str
+            The name of the mark.
+
+        Examples
+        --------
+        >>> Trace(kodi_id='tmdb_1').mark(name='lookup_start')
+        """
+        self.marks.setdefault(name, time.monotonic())
+
+    def duration(self, start: str, end: str) -> Optional[float]:
+        """
+        Get the number of seconds between two marks.
+
+        Nothing is returned unless both marks were recorded.
+
+        Parameters
+        ----------
+        start : str
+            The name of the first mark.
+        end : str
+            The name of the second mark.
+
+        Returns
+        -------
+        Optional[float]
+            The number of seconds between the marks.
+
+        Examples
+        --------
+        >>> Trace(kodi_id='tmdb_1').duration(start='focus', end='play')
+        """
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+
+
+class Tracer:
+    """
+    Records traces into a bounded ring buffer.
+
+    A trace is started every time a new item is selected, later steps are marked by Kodi ID so lookups and playback
+    happening after the selection changes are still attributed to the right trace.
+
+    Parameters
+    ----------
+    size : int
+        The maximum number of traces to keep.
+
+    Attributes
+    ----------
+    traces : deque
+        The most recent traces.
+
+    Methods
+    -------
+    start(kodi_id: str) -> Trace
+        Start a new trace.
+    mark(kodi_id: str, name: str)
+        Record a mark on the most recent trace for a Kodi ID.
+    report() -> dict
+        Get percentiles of each phase over the recorded traces.
+
+    Examples
+    --------
+    >>> tracer = Tracer()
+    >>> tracer.start(kodi_id='tmdb_1')
+    <...Trace object at 0x...>
+    >>> tracer.mark(kodi_id='tmdb_1', name='lookup_start')
+    """
+    def __init__(self, size: int = 256):
+        self.traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def start(self, kodi_id: str) -> Trace:
+        """
+        Start a new trace.
+
+        The trace is marked as focused now, and the oldest trace is dropped if the buffer is full.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the selected item.
+
+        Returns
+        -------
+        Trace
+            The new trace.
+
+        Examples
+        --------
+        >>> Tracer().start(kodi_id='tmdb_1')
+        <...Trace object at 0x...>
+        """
+        trace = Trace(kodi_id=kodi_id)
+        with self._lock:
+            self.traces.append(trace)
+        return trace
+
+    def mark(self, kodi_id: str, name: str):
+        """
+        Record a mark on the most recent trace for a Kodi ID.
+
+        The mark is ignored if there is no trace for the Kodi ID.
+
+        Parameters
+        ----------
+        kodi_id : str
+            The Kodi ID of the item.
+        name : str
+            The name of the mark.
+
+        Examples
+        --------
+        >>> Tracer().mark(kodi_id='tmdb_1', name='lookup_start')
+        """
+        with self._lock:
+            for trace in reversed(self.traces):
+                if trace.kodi_id == kodi_id:
+                    trace.mark(name=name)
+                    return
+
+    def report(self) -> dict:
+        """
+        Get percentiles of each phase over the recorded traces.
+
+        Traces missing either mark of a phase, e.g. because the theme was cached or never played, are left out of
+        that phase.
+
+        Returns
+        -------
+        dict
+            A mapping of phase names to histogram snapshots, in the format used by ``metrics.format_snapshot``.
+
+        Examples
+        --------
+        >>> Tracer().report()
+        {...}
+        """
+        with self._lock:
+            traces = list(self.traces)
+
+        report = {}
+        for name, start, end in phases:
+            histogram = metrics.Histogram(
+                name=name,
+                description=f'Seconds from {start} to {end}',
+                size=len(traces) or 1,
+            )
+            for trace in traces:
+                duration = trace.duration(start=start, end=end)
+                if duration is not None:
+                    histogram.observe(value=duration)
+            report[name] = histogram.snapshot()
+
+        return report
+
+
+def publish():
+    """
+    Publish the trace report to the Kodi home window.
+
+    The report is shared with the script entry point in the same way as the metrics.
+
+    Examples
+    --------
+    >>> publish()
+    """
+    xbmcgui.Window(metrics.HOME_WINDOW_ID).setProperty(PROPERTY_NAME, json.dumps(tracer.report()))
+
+
+def read_published() -> dict:
+    """
+    Read the trace report published by the service.
+
+    The report is read from the Kodi home window property written by ``publish``.
+
+    Returns
+    -------
+    dict
+        A mapping of phase names to histogram snapshots, empty if nothing has been published.
+
+    Examples
+    --------
+    >>> read_published()
+    {}
+    """
+    data = xbmcgui.Window(metrics.HOME_WINDOW_ID).getProperty(PROPERTY_NAME)
+    try:
+        return json.loads(data) if data else {}
+    except ValueError:
+        return {}
+
+
+tracer = Tracer()
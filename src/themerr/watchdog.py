@@ -0,0 +1,158 @@
+# standard imports
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+# kodi imports
+import xbmc
+
+# local imports
+from . import logger
+from . import metrics
+from . import ratelimit
+from . import settings
+
+stalls = metrics.registry.counter(
+    name='watchdog_stalls_total',
+    description='Window watcher ticks which went over the slow tick threshold',
+)
+
+
+class Watchdog:
+    """
+    Watches the window watcher thread for slow ticks.
+
+    The window watcher marks the start and end of each tick. If a tick runs longer than the slow tick threshold, the
+    stack of the window watcher thread is captured and logged, so blocking calls can be diagnosed after the fact.
+    Logging is rate limited, each slow tick is reported at most once.
+
+    Parameters
+    ----------
+    monitor : xbmc.Monitor
+        The monitor used to wait between checks.
+    rate_limit : Optional[ratelimit.TokenBucket]
+        The rate limit for logged stacks. Defaults to a burst of 3, then 1 per minute.
+
+    Attributes
+    ----------
+    log : logger.Logger
+        The logger object.
+    monitor : xbmc.Monitor
+        The monitor used to wait between checks.
+    rate_limit : ratelimit.TokenBucket
+        The rate limit for logged stacks.
+    suppressed : int
+        The number of slow ticks not logged due to the rate limit.
+
+    Methods
+    -------
+    tick_started()
+        Mark the start of a tick on the current thread.
+    tick_finished()
+        Mark the end of the current tick.
+    check() -> bool
+        Check if the current tick is over the slow tick threshold.
+    watch()
+        Check the window watcher until Kodi requests an abort.
+
+    Examples
+    --------
+    >>> watchdog = Watchdog(monitor=xbmc.Monitor())
+    >>> watchdog.watch()
+    """
+    def __init__(self, monitor: xbmc.Monitor, rate_limit: Optional[ratelimit.TokenBucket] = None):
+        self.log = logger.log
+        self.monitor = monitor
+        self.rate_limit = rate_limit if rate_limit else ratelimit.TokenBucket(rate=1 / 60, capacity=3)
+        self.suppressed = 0
+
+        self._tick = None  # (thread ident, start time, tick number) of the running tick
+        self._tick_number = 0
+        self._reported_tick = None
+
+    def tick_started(self):
+        """
+        Mark the start of a tick on the current thread.
+
+        This is called by the window watcher, so it only does an attribute assignment.
+
+        Examples
+        --------
+        >>> Watchdog(monitor=xbmc.Monitor()).tick_started()
+        """
+        self._tick_number += 1
+        self._tick = (threading.get_ident(), time.monotonic(), self._tick_number)
+
+    def tick_finished(self):
+        """
+        Mark the end of the current tick.
+
+        This is called by the window watcher, so it only does an attribute assignment.
+
+        Examples
+        --------
+        >>> Watchdog(monitor=xbmc.Monitor()).tick_finished()
+        """
+        self._tick = None
+
+    def check(self) -> bool:
+        """
+        Check if the current tick is over the slow tick threshold.
+
+        If it is, and it has not been reported yet, the stack of the ticking thread is logged as a warning, subject to
+        the rate limit. A threshold of 0 disables the check.
+
+        Returns
+        -------
+        bool
+            True if a new slow tick was found, otherwise False.
+
+        Examples
+        --------
+        >>> Watchdog(monitor=xbmc.Monitor()).check()
+        False
+        """
+        budget = settings.settings.slow_tick_threshold() / 1000
+        tick = self._tick
+        if budget <= 0 or tick is None:
+            return False
+
+        ident, started, number = tick
+        elapsed = time.monotonic() - started
+        if elapsed < budget or number == self._reported_tick:
+            return False
+
+        self._reported_tick = number
+        stalls.inc()
+
+        if not self.rate_limit.consume():
+            self.suppressed += 1
+            return True
+
+        frame = sys._current_frames().get(ident)
+        stack = ''.join(traceback.format_stack(frame)) if frame else 'unavailable, the tick has finished\n'
+        suppressed = f", {self.suppressed} earlier slow ticks were not logged" if self.suppressed else ''
+        self.suppressed = 0
+
+        self.log.warning(f"Window watcher tick has been running for {elapsed:.2f}s "
+                         f"(threshold {budget:.2f}s){suppressed}, stack:\n{stack}")
+        return True
+
+    def watch(self):
+        """
+        Check the window watcher until Kodi requests an abort.
+
+        The check runs every 100ms in its own thread.
+
+        Examples
+        --------
+        >>> Watchdog(monitor=xbmc.Monitor()).watch()
+        """
+        self.log.debug("Watchdog started")
+
+        while not self.monitor.waitForAbort(0.1):
+            self.check()
+
+        self.log.debug("Watchdog stopped")
@@ -1,5 +1,9 @@
 # standard imports
+from collections import OrderedDict
+import threading
+import time
 from typing import Optional
+from urllib.error import HTTPError
 
 # lib imports
 try:
@@ -8,16 +12,37 @@ except TypeError:
     import youtube_dl  # patches fail when building docs
 
 # local imports
+from . import circuit
 from . import logger
+from . import metrics
+from . import ratelimit
 
 log = logger.log
 
+# extracted audio URLs are cached for less than the lifetime of the signed URLs returned by YouTube
+audio_url_cache_ttl = 3600
+audio_url_cache_size = 64
+_audio_urls = OrderedDict()  # YouTube URL -> (time extracted, audio URL)
+_audio_urls_lock = threading.Lock()
+
+extract_latency = metrics.registry.histogram(
+    name='youtube_extract_seconds',
+    description='Latency of YouTube info extraction',
+)
+extract_failures = metrics.registry.counter(
+    name='youtube_extract_failures_total',
+    description='Failed YouTube extractions, by reason',
+)
+
 
 def process_youtube(url: str) -> Optional[str]:
     """
     Get URL using `youtube_dl`.
 
-    The function will try to get a playable URL from the YouTube video.
+    The function will try to get a playable URL from the YouTube video. Audio URLs are cached for an hour. Errors
+    which are not an answer from YouTube, such as network errors and timeouts, are recorded on the YouTube circuit
+    breaker, while it is open only cached URLs are returned, without waiting for the YouTube rate limit. Other
+    extractions wait for the rate limit.
 
     Parameters
     ----------
@@ -34,6 +59,28 @@ def process_youtube(url: str) -> Optional[str]:
     >>> process_youtube(url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
     ...
     """
+    with _audio_urls_lock:
+        cached = _audio_urls.get(url)
+    if cached and time.monotonic() - cached[0] < audio_url_cache_ttl:
+        return cached[1]
+
+    # the breaker is checked before the rate limit, so no token is waited for while it is open, and allow is only
+    # called once a token was taken, so a rate limited extraction does not take the probe of a half-open breaker
+    if circuit.youtube.blocked():
+        extract_failures.inc(labels=dict(reason='circuit_open'))
+        log.debug(f'YouTube circuit breaker is open, skipping {url}')
+        return None
+
+    if not ratelimit.youtube.acquire():
+        extract_failures.inc(labels=dict(reason='rate_limited'))
+        log.debug(f'YouTube rate limit reached, skipping {url}')
+        return None
+
+    if not circuit.youtube.allow():
+        extract_failures.inc(labels=dict(reason='circuit_open'))
+        log.debug(f'YouTube circuit breaker is open, skipping {url}')
+        return None
+
     youtube_dl_params = dict(
         logger=logger.log,
         socket_timeout=10,
@@ -44,23 +91,139 @@ def process_youtube(url: str) -> Optional[str]:
 
     with ydl:
         try:
-            result = ydl.extract_info(
-                url=url,
-                download=False  # We just want to extract the info
-            )
+            with extract_latency.time():
+                result = ydl.extract_info(
+                    url=url,
+                    download=False  # We just want to extract the info
+                )
         except Exception as exc:
-            if isinstance(exc, youtube_dl.utils.ExtractorError) and exc.expected:
+            cause = error_cause(exc=exc)
+            if youtube_answered(cause=cause):
+                circuit.youtube.success()  # YouTube answered, the video is not available
+                extract_failures.inc(labels=dict(reason='youtube'))
                 log.error('YDL returned YT error while downloading {}: {}'.format(url, exc))
+            elif isinstance(cause, OSError):
+                circuit.youtube.failure()
+                extract_failures.inc(labels=dict(reason='network'))
+                log.error('YDL returned a network error while downloading {}: {}'.format(url, exc))
             else:
+                circuit.youtube.failure()
+                extract_failures.inc(labels=dict(reason='unexpected'))
                 log.error('YDL returned an unexpected error while downloading {}: {}'.format(url, exc))
             return None
 
-        if 'entries' in result:
-            # Can be a playlist or a list of videos
-            video_data = result['entries'][0]
-        else:
-            # Just a video
-            video_data = result
+    circuit.youtube.success()
+    audio_url = select_audio_url(result=result)
+    if not audio_url:
+        extract_failures.inc(labels=dict(reason='no_audio'))
+        return None
+
+    with _audio_urls_lock:
+        _audio_urls[url] = (time.monotonic(), audio_url)
+        _audio_urls.move_to_end(url)
+        while len(_audio_urls) > audio_url_cache_size:
+            _audio_urls.popitem(last=False)
+
+    return audio_url
+
+
+def error_cause(exc: Exception) -> Exception:
+    """
+    Get the exception which caused a `youtube_dl` error.
+
+    ``YoutubeDL.extract_info`` catches the ``ExtractorError`` of an extractor, and raises a ``DownloadError`` with the
+    ``exc_info`` of the original exception instead. An ``ExtractorError`` raised while handling another exception, such
+    as a ``URLError`` or a timeout, keeps it as its ``cause`` or ``exc_info``. These are followed to the first exception
+    which was not raised by `youtube_dl` for another one.
+
+    Parameters
+    ----------
+    exc : Exception
+       The exception raised by ``YoutubeDL.extract_info``.
+
+    Returns
+    -------
+    Exception
+       The underlying exception, which may be ``exc`` itself.
+
+    Examples
+    --------
+    >>> error_cause(exc=youtube_dl.utils.DownloadError('ERROR: Video unavailable'))
+    DownloadError('ERROR: Video unavailable')
+    """
+    seen = set()
+    while id(exc) not in seen:
+        seen.add(id(exc))
+        if not isinstance(exc, (youtube_dl.utils.DownloadError, youtube_dl.utils.ExtractorError)):
+            break
+
+        exc_info = getattr(exc, 'exc_info', None)
+        inner = getattr(exc, 'cause', None) or (exc_info[1] if exc_info else None)
+        if not isinstance(inner, BaseException):
+            break
+        exc = inner
+
+    return exc
+
+
+def youtube_answered(cause: Exception) -> bool:
+    """
+    Check if an extraction failed because of the answer from YouTube.
+
+    An ``ExtractorError`` which was not caused by another exception, e.g. an unavailable or private video, or an HTTP
+    error other than a server error or too many requests, means YouTube is reachable. Network errors and timeouts, which
+    `youtube_dl` also raises as expected ``ExtractorError``, are not answers, and neither are other exceptions.
+
+    Parameters
+    ----------
+    cause : Exception
+       The underlying exception, as returned by ``error_cause``.
+
+    Returns
+    -------
+    bool
+       True if YouTube answered, otherwise False.
+
+    Examples
+    --------
+    >>> youtube_answered(cause=youtube_dl.utils.ExtractorError('Video unavailable', expected=True))
+    True
+    >>> youtube_answered(cause=TimeoutError('timed out'))
+    False
+    """
+    if isinstance(cause, youtube_dl.utils.ExtractorError):
+        return True
+    if isinstance(cause, HTTPError):
+        return cause.code < 500 and cause.code != 429
+    return False
+
+
+def select_audio_url(result: dict) -> Optional[str]:
+    """
+    Select the audio URL from the info extracted by `youtube_dl`.
+
+    The largest audio only format of each supported codec is found, the mp4a codec is preferred over opus.
+
+    Parameters
+    ----------
+    result : dict
+       The info dict returned by ``YoutubeDL.extract_info``, for a video or a playlist.
+
+    Returns
+    -------
+    Optional[str]
+       The URL of the audio object.
+
+    Examples
+    --------
+    >>> select_audio_url(result=dict(formats=[]))
+    """
+    if 'entries' in result:
+        # Can be a playlist or a list of videos
+        video_data = result['entries'][0]
+    else:
+        # Just a video
+        video_data = result
 
     selected = {
         'opus': {
@@ -82,22 +245,13 @@ def process_youtube(url: str) -> Optional[str]:
                 else:
                     log.debug('Unknown codec: %s' % fmt['acodec'])
                     continue  # unknown codec
-                filesize = int(fmt['filesize'])
-                if filesize > selected[temp_codec]['size']:
+                # the filesize is not always known, formats without one are only used if nothing better is found
+                filesize = int(fmt.get('filesize') or fmt.get('filesize_approx') or 0)
+                if filesize > selected[temp_codec]['size'] or not selected[temp_codec]['audio_url']:
                     selected[temp_codec]['size'] = filesize
                     selected[temp_codec]['audio_url'] = fmt['url']
 
-    audio_url = None
-
-    if 0 < selected['opus']['size'] > selected['mp4a']['size']:
-        audio_url = selected['opus']['audio_url']
-    elif 0 < selected['mp4a']['size'] > selected['opus']['size']:
-        audio_url = selected['mp4a']['audio_url']
-
-    if audio_url:  # mp4a codec is preferred
-        if selected['mp4a']['audio_url']:  # mp4a codec is available
-            audio_url = selected['mp4a']['audio_url']
-        elif selected['opus']['audio_url']:  # fallback to opus :(
-            audio_url = selected['opus']['audio_url']
+    # mp4a codec is preferred, fallback to opus :(
+    audio_url = selected['mp4a']['audio_url'] or selected['opus']['audio_url']
 
-    return audio_url  # return None or url found
+    return audio_url
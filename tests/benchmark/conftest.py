@@ -0,0 +1,70 @@
+# standard imports
+import json
+import os
+import timeit
+
+# lib imports
+import pytest
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+
+class Benchmark:
+    """Time a function and compare the result to the stored baseline"""
+    def __init__(self, name: str, baselines: dict, save: bool, tolerance: float):
+        self.name = name
+        self.baselines = baselines
+        self.save = save
+        self.tolerance = tolerance
+
+    def __call__(self, function, repeat: int = 5, min_time: float = 0.05) -> float:
+        timer = timeit.Timer(stmt=function)
+
+        # find a number of calls which takes at least min_time, so the timer resolution does not matter
+        number = 1
+        while timer.timeit(number=number) < min_time:
+            number *= 2
+
+        result = min(timer.repeat(repeat=repeat, number=number)) / number
+        self.record(result=result)
+
+        return result
+
+    def record(self, result: float, name: str = ''):
+        """Compare a measured value, where lower is better, to its baseline"""
+        name = f'{self.name}.{name}' if name else self.name
+
+        baseline = self.baselines.get(name)
+        if self.save or baseline is None:
+            self.baselines[name] = result
+        elif os.getenv('CI') is None and result > baseline * (1 + self.tolerance):
+            pytest.fail(f'{name} regressed: {result * 1e6:.2f}us, baseline {baseline * 1e6:.2f}us')
+
+
+@pytest.fixture(scope='session')
+def benchmark_baselines(request):
+    """Load the stored baselines, and store them again after the session"""
+    try:
+        with open(BASELINES_FILE) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    original = dict(baselines)
+    yield baselines
+
+    if baselines != original and os.getenv('CI') is None:
+        with open(BASELINES_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+@pytest.fixture(scope='function')
+def benchmark(request, benchmark_baselines):
+    """Return a benchmark for the current test, timings are per call in seconds"""
+    return Benchmark(
+        name=request.node.name,
+        baselines=benchmark_baselines,
+        save=request.config.getoption('--benchmark-save'),
+        tolerance=request.config.getoption('--benchmark-tolerance'),
+    )
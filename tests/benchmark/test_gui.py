@@ -0,0 +1,77 @@
+# standard imports
+from datetime import datetime
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import gui
+
+
+@pytest.fixture(scope='function')
+def window_obj(mock_xbmc_player):
+    """Return the Window object with a mocked player"""
+    return gui.Window(player_instance=mock_xbmc_player)
+
+
+# high enough that the theme is never started, only the cost of watching is measured
+timeout = 10 ** 9
+
+
+def fill_cache(window_obj, size: int):
+    timestamp = datetime.now().timestamp()
+    for i in range(size):
+        window_obj.uuid_mapping[f'tmdb_{i}'] = {
+            'timestamp': timestamp,
+            'youtube_url': f'https://www.youtube.com/watch?v={i:011d}',
+        }
+
+
+def test_window_watcher_tick_no_item(benchmark, window_obj):
+    """Benchmark a window watcher tick with nothing selected"""
+    benchmark(lambda: window_obj.tick(timeout=timeout))
+
+
+def test_window_watcher_tick_cached_item(benchmark, window_obj):
+    """Benchmark a window watcher tick with a cached item selected"""
+    fill_cache(window_obj=window_obj, size=1000)
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: '500' if label == 'ListItem.UniqueID(tmdb)' else ''):
+        benchmark(lambda: window_obj.tick(timeout=timeout))
+
+    assert window_obj.last_selected_item_id == 'tmdb_500'
+
+
+@pytest.mark.parametrize('checks', [
+    [False] * 6,
+    [True] + [False] * 5,
+])
+def test_any_true(benchmark, checks):
+    """Benchmark any_true with a list of checks"""
+    benchmark(lambda: gui.Window.any_true(checks=checks))
+
+
+@pytest.mark.parametrize('predicate', [
+    'is_home',
+    'is_movies',
+    'is_movie_set',
+    'is_tv_shows',
+    'is_seasons',
+    'is_episodes',
+])
+def test_is_predicates(benchmark, window_obj, predicate):
+    """Benchmark the window predicates"""
+    benchmark(getattr(window_obj, predicate))
+
+
+@pytest.mark.parametrize('size', [10_000, 100_000])
+@pytest.mark.parametrize('hit', [True, False])
+def test_uuid_mapping_lookup(benchmark, window_obj, size, hit):
+    """Benchmark cache lookups in a large uuid_mapping"""
+    fill_cache(window_obj=window_obj, size=size)
+    kodi_id = f'tmdb_{size // 2}' if hit else 'tmdb_missing'
+
+    benchmark(lambda: window_obj.cache_status(kodi_id=kodi_id))
+
+    assert window_obj.cache_status(kodi_id=kodi_id) == ('hit' if hit else 'miss')
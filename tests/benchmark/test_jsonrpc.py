@@ -0,0 +1,31 @@
+# standard imports
+import time
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import library
+
+
+@pytest.mark.parametrize('strategy', ['single', 'batched', 'paged'])
+def test_unique_ids(benchmark, kodi_library, strategy):
+    """Benchmark the JSON-RPC calls per 1,000 items, and the time per item, to get the unique ids of the library"""
+    movies = len(kodi_library.items['movies'])
+    dbids = list(kodi_library.items['movies'])
+    kodi_library.latency = 0.0005  # a round trip through the Kodi core
+
+    start = time.perf_counter()
+    if strategy == 'single':
+        unique_ids = {}
+        for dbid in dbids:
+            unique_ids.update(library.fetch_unique_ids(kind='movie', dbids=[dbid]))
+    elif strategy == 'batched':
+        unique_ids = library.fetch_unique_ids(kind='movie', dbids=dbids)
+    else:
+        unique_ids = library.list_unique_ids(kind='movie')
+    seconds = time.perf_counter() - start
+
+    assert len(unique_ids) == movies
+    benchmark.record(result=kodi_library.calls * 1000 / movies, name='calls_per_1000')
+    benchmark.record(result=seconds / movies, name='per_item')
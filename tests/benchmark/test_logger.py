@@ -0,0 +1,19 @@
+# standard imports
+from unittest.mock import patch
+
+# kodi imports
+import xbmc
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import logger
+
+
+@pytest.mark.parametrize('dev_mode', [False, True], ids=['default', 'dev_mode'])
+@pytest.mark.parametrize('level', [xbmc.LOGDEBUG, xbmc.LOGWARNING], ids=['debug', 'warning'])
+def test_log(benchmark, dev_mode, level):
+    """Benchmark the overhead of Logger.log"""
+    with patch('src.themerr.settings.settings.dev_mode', return_value=dev_mode):
+        benchmark(lambda: logger.log.log(msg='Benchmark message', level=level))
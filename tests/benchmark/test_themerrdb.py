@@ -0,0 +1,55 @@
+# standard imports
+import time
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import gui
+from src.themerr import metrics
+
+
+@pytest.fixture(scope='function')
+def window_obj(mock_xbmc_player):
+    """Return the Window object with a mocked player"""
+    return gui.Window(player_instance=mock_xbmc_player)
+
+
+def run_lookups(window_obj, ids: int) -> metrics.Histogram:
+    latency = metrics.Histogram(name='lookup_seconds', description='Lookup latency', size=ids)
+    for i in range(1, ids + 1):
+        start = time.perf_counter()
+        window_obj.find_youtube_url(kodi_id=f'tmdb_{i}', db_type='movies')
+        latency.observe(value=time.perf_counter() - start)
+
+    return latency
+
+
+@pytest.mark.parametrize('faults', [
+    dict(),
+    dict(latency=0.001, jitter=0.002, error_rate=0.05, not_found_rate=0.05),
+], ids=['clean', 'faults'])
+def test_lookups(benchmark, themerrdb_server, window_obj, faults):
+    """Benchmark the throughput and tail latency of ThemerrDB lookups against the local stand-in"""
+    for name, value in faults.items():
+        setattr(themerrdb_server, name, value)
+
+    ids = 1000
+    snapshot = run_lookups(window_obj=window_obj, ids=ids).snapshot()
+
+    assert themerrdb_server.requests == ids
+    benchmark.record(result=snapshot['sum'] / ids, name='mean')
+    benchmark.record(result=snapshot['p99'], name='p99')
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['cold', 'cached'])
+def test_directory_lookups(benchmark, themerrdb_directory, window_obj, cached):
+    """Benchmark lookups in a local ThemerrDB directory, cold and with the parsed items cached"""
+    ids = 100
+    if cached:
+        run_lookups(window_obj=window_obj, ids=ids)
+
+    snapshot = run_lookups(window_obj=window_obj, ids=ids).snapshot()
+
+    benchmark.record(result=snapshot['sum'] / ids, name='mean')
+    benchmark.record(result=snapshot['p99'], name='p99')
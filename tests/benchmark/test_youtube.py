@@ -0,0 +1,28 @@
+# lib imports
+import pytest
+
+# local imports
+from scripts.youtube_replay import load_corpus
+from src.themerr import youtube
+
+corpus = load_corpus()
+
+
+@pytest.mark.parametrize('name', sorted(name for name, entry in corpus.items() if 'info' in entry))
+def test_select_audio_url(benchmark, name):
+    """Benchmark the format selection of process_youtube on the recorded corpus"""
+    info = corpus[name]['info']
+
+    benchmark(lambda: youtube.select_audio_url(result=info))
+
+
+@pytest.mark.parametrize('name', ['video', 'large_formats', 'unavailable'])
+def test_process_youtube(benchmark, youtube_replay, name):
+    """Benchmark extraction and format selection, replaying the recorded corpus"""
+    url = corpus[name]['url']
+
+    def extract():
+        youtube._audio_urls.clear()  # measure the extraction, not the cache
+        return youtube.process_youtube(url=url)
+
+    benchmark(extract)
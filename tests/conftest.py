@@ -1,5 +1,7 @@
 # standard imports
+from contextlib import contextmanager
 import os
+from threading import Thread
 from unittest.mock import MagicMock, patch
 
 # kodi imports
@@ -10,13 +12,77 @@ import pytest
 
 # script imports
 from scripts.bootstrap_kodi import bootstrap_modules
+from scripts.kodi_library import KodiLibrary
+from scripts.themerrdb_server import ThemerrDBServer, write_items
+from scripts.youtube_replay import ReplayExtractor, load_corpus
 
 # bootstrap kodi modules
 bootstrap_modules()
 
+from src.themerr import circuit  # noqa: E402
+from src.themerr import jsonrpc  # noqa: E402
+from src.themerr import library  # noqa: E402
+from src.themerr import ratelimit  # noqa: E402
+from src.themerr import youtube  # noqa: E402
 from src.themerr.player import Player  # noqa: E402
 
 
+BENCHMARK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark')
+    group.addoption(
+        '--benchmark',
+        action='store_true',
+        help='Run the benchmarks in tests/benchmark, they are deselected by default',
+    )
+    group.addoption(
+        '--benchmark-save',
+        action='store_true',
+        help='Replace the stored benchmark baselines with the results of this run',
+    )
+    group.addoption(
+        '--benchmark-tolerance',
+        type=float,
+        default=0.5,
+        help='Allowed slowdown against the baseline before a benchmark fails, 0.5 is 50%% slower',
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: a timing benchmark, only run with --benchmark')
+
+
+def pytest_collection_modifyitems(config, items):
+    # timings depend on the machine and take a while, so benchmarks are opt-in
+    for item in items:
+        if str(item.path).startswith(BENCHMARK_DIRECTORY + os.sep):
+            item.add_marker(pytest.mark.benchmark)
+    if config.getoption('--benchmark'):
+        return
+
+    deselected = [item for item in items if item.get_closest_marker('benchmark')]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if not item.get_closest_marker('benchmark')]
+
+
+@pytest.fixture(scope='function', autouse=True)
+def reset_endpoints():
+    """Close the circuit breakers, refill the rate limits and clear the cached audio URLs and unique ids"""
+    yield
+    circuit.themerrdb.reset()
+    circuit.youtube.reset()
+    ratelimit.themerrdb.reset()
+    ratelimit.youtube.reset()
+    youtube._audio_urls.clear()
+    library.movies.clear()
+    library.tv_shows.clear()
+    library.movie_sets.clear()
+    jsonrpc.client.clear()
+
+
 @pytest.fixture(scope='function')
 def mock_xbmc_log():
     with patch('xbmc.log', spec=True) as mock_log:
@@ -105,3 +171,67 @@ def mock_xbmc_get_cond_visibility():
         mock_visibility.side_effect = get_cond_visibility
 
         yield mock_visibility
+
+
+@contextmanager
+def serve_themerrdb():
+    """Serve a ThemerrDB stand-in on a free port"""
+    server = ThemerrDBServer(port=0, count=10000, seed=0)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@pytest.fixture(scope='function')
+def themerrdb_server():
+    """Serve a ThemerrDB stand-in on a free port, and point the addon at it"""
+    with serve_themerrdb() as server, \
+            patch('src.themerr.settings.settings.themerrdb_url', return_value=server.url):
+        yield server
+
+
+@pytest.fixture(scope='function')
+def themerrdb_mirror(themerrdb_server):
+    """Serve a second ThemerrDB stand-in, and configure it as a mirror"""
+    with serve_themerrdb() as server, \
+            patch('src.themerr.settings.settings.themerrdb_mirrors', return_value=[server.url]):
+        yield server
+
+
+@pytest.fixture(scope='function')
+def themerrdb_directory(tmp_path):
+    """Write ThemerrDB stand-in items to a directory, and point the addon at it"""
+    write_items(directory=str(tmp_path), count=100)
+    with patch('src.themerr.settings.settings.themerrdb_url', return_value=str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.fixture(scope='function')
+def kodi_library():
+    """Answer JSON-RPC requests from a local stand-in for the Kodi video library"""
+    stand_in = KodiLibrary()
+    with patch('xbmc.executeJSONRPC', side_effect=stand_in.execute):
+        yield stand_in
+
+
+@pytest.fixture(scope='session')
+def youtube_corpus():
+    """Return the recorded extract_info corpus"""
+    return load_corpus()
+
+
+@pytest.fixture(scope='function')
+def youtube_replay(youtube_corpus):
+    """Replay the recorded corpus instead of extracting from YouTube, the delay can be changed during a test"""
+    replay = ReplayExtractor(corpus=youtube_corpus, seed=0)
+
+    def extract_info(ydl, url, download=True, **kwargs):
+        return replay.extract_info(url, download=download, **kwargs)
+
+    with patch.object(youtube.youtube_dl.YoutubeDL, 'extract_info', new=extract_info):
+        yield replay
@@ -0,0 +1,151 @@
+# standard imports
+import time
+from unittest.mock import patch
+
+# local imports
+from tests.simulator import Item, Simulator, Step
+
+movies = [Item(label=f'Movie {i}', unique_ids={'tmdb': str(i)}) for i in range(1, 51)]
+
+
+def test_dwell_on_movie():
+    """Test a theme starts once the item has been selected for the theme timeout"""
+    result = Simulator(script=[Step(at=0.0, container='movies', item=movies[0])], duration=10).run()
+
+    assert len(result.plays) == 1
+    play = result.plays[0]
+    assert play.kodi_id == 'tmdb_1'
+    # 3 second theme timeout, then the extraction, the lookup runs on a worker meanwhile
+    assert 3.9 < play.latency < 4.1
+    assert result.themerrdb_requests == 1
+    assert result.youtube_extractions == 1
+    assert result.stops == 0
+
+
+def test_fast_scroll():
+    """Test scrolling through items only plays the theme of the item the user stops on"""
+    script = [Step(at=i * 0.2, container='movies', item=movie) for i, movie in enumerate(movies)]
+
+    result = Simulator(script=script, duration=20, themerrdb_latency=0.05).run()
+
+    assert [play.kodi_id for play in result.plays] == ['tmdb_50']
+    assert result.themerrdb_requests == 1  # only the item the user stops on is looked up
+    assert result.youtube_extractions == 1
+
+
+def test_fast_scroll_without_lookup_delay():
+    """Test every selected item is looked up without a lookup delay"""
+    script = [Step(at=i * 0.2, container='movies', item=movie) for i, movie in enumerate(movies)]
+
+    result = Simulator(script=script, duration=20, themerrdb_latency=0.05, lookup_delay=0).run()
+
+    assert [play.kodi_id for play in result.plays] == ['tmdb_50']
+    assert result.themerrdb_requests == 50
+
+
+def test_steady_scroll():
+    """Test the lookup delay grows when items are passed at a steady pace, slower than the lookup delay"""
+    script = [Step(at=i * 0.4, container='movies', item=movie) for i, movie in enumerate(movies)]
+
+    result = Simulator(script=script, duration=30, themerrdb_latency=0.05).run()
+
+    assert [play.kodi_id for play in result.plays] == ['tmdb_50']
+    assert result.themerrdb_requests == 2  # the first item, before the scroll velocity is known, and the last
+
+
+def test_item_without_theme():
+    """Test nothing is played for an item without a theme"""
+    item = Item(label='No theme', unique_ids={'tmdb': '999'}, has_theme=False)
+
+    result = Simulator(script=[Step(at=0.0, container='movies', item=item)], duration=10).run()
+
+    assert result.plays == []
+    assert result.themerrdb_requests == 1
+    assert result.youtube_extractions == 0
+
+
+def test_revisit_uses_cache():
+    """Test a revisited item is not looked up again"""
+    script = [
+        Step(at=0.0, container='movies', item=movies[0]),
+        Step(at=1.0, container='movies', item=movies[1]),
+        Step(at=2.0, container='movies', item=movies[0]),
+    ]
+
+    result = Simulator(script=script, duration=10).run()
+
+    assert result.themerrdb_requests == 2
+    assert [play.kodi_id for play in result.plays] == ['tmdb_1']
+    assert 3.0 < result.plays[0].latency < 5.0  # measured from the second visit
+
+
+def test_stop_after_leaving():
+    """Test the theme stops once another screen has been shown for the theme timeout"""
+    script = [
+        Step(at=0.0, container='movies', item=movies[0]),
+        Step(at=10.0, container='home'),
+    ]
+
+    result = Simulator(script=script, duration=20).run()
+
+    assert len(result.plays) == 1
+    assert result.stops == 1
+
+
+def test_video_playback():
+    """Test no theme is played while a video is playing"""
+    script = [
+        Step(at=0.0, container='movies', item=movies[0]),
+        Step(at=1.0, container='movies', item=movies[0], video=True),
+        Step(at=60.0, container='movies', item=movies[0]),
+    ]
+
+    result = Simulator(script=script, duration=70).run()
+
+    assert len(result.plays) == 1
+    assert result.plays[0].at > 60.0
+
+
+def test_tv_show_seasons():
+    """Test seasons and episodes reuse the theme of the selected TV show"""
+    show = Item(label='Show', unique_ids={'tmdb': '1399'})
+    season = Item(label='Season 1', unique_ids={})
+    script = [
+        Step(at=0.0, container='tvshows', item=show),
+        Step(at=1.0, container='seasons', item=season),
+    ]
+
+    result = Simulator(script=script, duration=10).run()
+
+    assert [play.kodi_id for play in result.plays] == ['tmdb_1399']
+    assert result.themerrdb_requests == 1
+
+
+def test_long_session():
+    """Test a 10 minute session replays on the virtual clock"""
+    script = [Step(at=i * 30.0, container='movies', item=movie) for i, movie in enumerate(movies[:20])]
+
+    start = time.perf_counter()
+    result = Simulator(script=script, duration=600).run()
+    elapsed = time.perf_counter() - start
+
+    assert len(result.plays) == 20
+    assert result.ticks > 10000
+    assert elapsed < 60  # real seconds, for a session of 600 virtual seconds
+    assert result.traces.report()['focus_to_lookup']['count'] == 20
+
+
+def test_stale_while_revalidate():
+    """Test a stale theme is played from the cache while it is refreshed"""
+    script = [
+        Step(at=0.0, container='movies', item=movies[0]),
+        Step(at=10.0, container='home'),
+        Step(at=100.0, container='movies', item=movies[0]),
+    ]
+
+    with patch('src.themerr.gui.cache_ttl', 60):
+        result = Simulator(script=script, duration=110, themerrdb_latency=5.0).run()
+
+    assert result.themerrdb_requests == 2
+    assert len(result.plays) == 2
+    assert result.plays[1].latency < 4.1  # the refresh is not waited for
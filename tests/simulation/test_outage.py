@@ -0,0 +1,32 @@
+# local imports
+from src.themerr import circuit
+from src.themerr import gui
+from tests.simulator import Item, Simulator, Step
+
+movies = [Item(label=f'Movie {i}', unique_ids={'tmdb': str(i)}) for i in range(1, 21)]
+
+# browse a movie every 4 seconds, ThemerrDB is unreachable for the first 40 seconds
+script = [Step(at=i * 4.0, container='movies', item=movie) for i, movie in enumerate(movies)]
+
+
+def test_outage_fails_fast():
+    """Test ThemerrDB is not requested while it is unreachable, and themes play again once it recovers"""
+    rejected = circuit.rejections.get(labels=dict(endpoint='themerrdb'))
+
+    result = Simulator(script=script, duration=80, outages=[(0.0, 40.0)]).run()
+
+    # the breaker opens after the failure threshold, instead of a failed request per movie
+    assert result.failed_requests == circuit.themerrdb.failure_threshold
+    assert circuit.rejections.get(labels=dict(endpoint='themerrdb')) - rejected == 7
+    # the first probe after the reset timeout closes the breaker
+    assert circuit.themerrdb.state() == circuit.CLOSED
+    assert [play.kodi_id for play in result.plays] == [f'tmdb_{number}' for number in range(13, 21)]
+
+
+def test_outage_recovery():
+    """Test movies looked up during the outage are retried once the short retry ttl has passed"""
+    revisit = [Step(at=gui.cache_retry + 20.0 + step.at, container='movies', item=step.item) for step in script[:5]]
+
+    result = Simulator(script=script + revisit, duration=gui.cache_retry + 40, outages=[(0.0, 40.0)]).run()
+
+    assert [play.kodi_id for play in result.plays][-5:] == [f'tmdb_{number}' for number in range(1, 6)]
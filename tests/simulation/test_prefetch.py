@@ -0,0 +1,37 @@
+# local imports
+from src.themerr import prefetch
+from tests.simulator import Item, Simulator, Step
+
+movies = [Item(label=f'Movie {i}', unique_ids={'tmdb': str(i)}) for i in range(1, 51)]
+
+# scroll down to movie 10, rest, then step down to movie 12 and stay
+script = [Step(at=i * 0.4, container='movies', item=movie) for i, movie in enumerate(movies[:10])]
+script += [
+    Step(at=6.0, container='movies', item=movies[10]),
+    Step(at=8.0, container='movies', item=movies[11]),
+]
+
+
+def test_prefetch_ahead_of_scroll():
+    """Test the items ahead of the scroll are looked up before they are selected"""
+    hits = prefetch.prefetch_hits.total()
+
+    # lookups slower than the theme timeout
+    result = Simulator(script=script, duration=20, themerrdb_latency=3.5, listing=movies).run()
+    baseline = Simulator(script=script, duration=20, themerrdb_latency=3.5, listing=movies, prefetch_lookahead=0).run()
+
+    assert [play.kodi_id for play in result.plays] == ['tmdb_12']
+    assert prefetch.prefetch_hits.total() - hits == 3  # movie 2, before the scroll was measured, then 11 and 12
+    # the lookup of the selected movie is no longer part of the time to its theme
+    assert result.plays[0].latency < baseline.plays[0].latency
+
+
+def test_prefetch_both_sides():
+    """Test the items on both sides are looked up before the user scrolls"""
+    result = Simulator(
+        script=[Step(at=0.0, container='movies', item=movies[20])],
+        duration=10,
+        listing=movies,
+    ).run()
+
+    assert result.themerrdb_requests == 3  # movies 20, 21 and 22
@@ -0,0 +1,28 @@
+# local imports
+from src.themerr import ratelimit
+from tests.simulator import Item, Simulator, Step
+
+movies = [Item(label=f'Movie {i}', unique_ids={'tmdb': str(i)}) for i in range(1, 51)]
+
+# scroll through every movie without a lookup delay, then stay on the last one
+script = [Step(at=i * 0.5, container='movies', item=movie) for i, movie in enumerate(movies)]
+
+
+def skipped(priority: str) -> float:
+    return ratelimit.rate_limited.get(labels=dict(endpoint='themerrdb', priority=priority))
+
+
+def test_rate_limit():
+    """Test ThemerrDB requests stay within the rate limit, and the focused items are looked up first"""
+    background, interactive = skipped(priority='background'), skipped(priority='interactive')
+
+    unlimited = Simulator(script=script, duration=40, lookup_delay=0, listing=movies).run()
+    result = Simulator(script=script, duration=40, lookup_delay=0, listing=movies, themerrdb_rate_limit=30).run()
+
+    assert unlimited.themerrdb_requests == 50
+    # the burst, then 30 requests per minute
+    assert result.themerrdb_requests <= ratelimit.themerrdb.capacity + 30 * 40 / 60
+    # prefetching gives way to the focused items, which wait for a token instead of being skipped
+    assert skipped(priority='background') > background
+    assert skipped(priority='interactive') == interactive
+    assert [play.kodi_id for play in result.plays] == ['tmdb_50']
@@ -0,0 +1,26 @@
+# local imports
+from src.themerr import recorder
+from tests.simulator import Item, Simulator, Step, steps_from_recording
+
+movies = [Item(label=f'Movie {i}', unique_ids={'tmdb': str(i)}) for i in range(1, 11)]
+
+
+def test_replay_recording(tmp_path):
+    """Test a navigation recording replays to the same outcome"""
+    script = [Step(at=0.0, container='home')]
+    script += [Step(at=1.0 + i * 0.5, container='movies', item=movie) for i, movie in enumerate(movies)]
+    script += [Step(at=15.0, container='movies', item=movies[2]), Step(at=25.0, container='home')]
+
+    recorded = Simulator(script=script, duration=40, record_to=str(tmp_path)).run()
+
+    events = recorder.read_recording(directory=str(tmp_path))
+    assert [event.container for event in events[:2]] == ['movies', 'movies']
+    assert events[-1].container == 'home'
+    assert all('tmdb' not in event.id_hash for event in events)
+
+    replayed = Simulator(script=steps_from_recording(events=events), duration=40).run()
+
+    assert [play.kodi_id for play in recorded.plays] == ['tmdb_10', 'tmdb_3']
+    assert len(replayed.plays) == len(recorded.plays)
+    assert replayed.themerrdb_requests == recorded.themerrdb_requests
+    assert replayed.stops == recorded.stops
@@ -0,0 +1,384 @@
+# standard imports
+from bisect import bisect_right
+from contextlib import ExitStack
+from datetime import datetime
+import json
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+# kodi imports
+import xbmc
+
+# lib imports
+import requests
+
+# local imports
+from src.themerr import circuit
+from src.themerr import gui
+from src.themerr import ratelimit
+from src.themerr import recorder
+from src.themerr import scheduler
+from src.themerr import tracing
+
+list_item_pattern = re.compile(r'^Container\.ListItem\((?P<offset>-?\d+)\)\.UniqueID\((?P<db>\w+)\)$')
+
+# the conditions and database types of each container, as checked by the Window predicates
+containers = {
+    'home': dict(condition='Window.IsVisible(home)', dbtype=''),
+    'movies': dict(condition='Container.Content(movies)', dbtype='movie'),
+    'sets': dict(condition='ListItem.IsCollection', dbtype='set'),
+    'tvshows': dict(condition='Container.Content(tvshows)', dbtype='tvshow'),
+    'seasons': dict(condition='Container.Content(Seasons)', dbtype='season'),
+    'episodes': dict(condition='Container.Content(Episodes)', dbtype='episode'),
+    'other': dict(condition='', dbtype=''),
+}
+
+
+class Item(NamedTuple):
+    """An item in the fake Kodi library"""
+    label: str
+    unique_ids: Dict[str, str]  # e.g. {'tmdb': '10378'}
+    has_theme: bool = True
+
+
+class Step(NamedTuple):
+    """The state of the fake Kodi UI from a point in time, until the next step"""
+    at: float  # seconds since the start of the script
+    container: str = 'home'
+    item: Optional[Item] = None
+    video: bool = False  # a video, not a theme, is playing
+
+
+class Play(NamedTuple):
+    """A theme started by the addon"""
+    at: float
+    kodi_id: str
+    latency: float  # seconds from the item being focused until the theme started
+
+
+class Result(NamedTuple):
+    """The outcome of a simulation"""
+    plays: List[Play]
+    stops: int
+    themerrdb_requests: int
+    failed_requests: int
+    youtube_extractions: int
+    ticks: int
+    traces: tracing.Tracer
+
+
+class VirtualClock:
+    """A clock which only moves when told to"""
+    epoch = datetime(2024, 1, 1).timestamp()
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.epoch + self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def sleep(self, milliseconds: int):
+        self.advance(milliseconds / 1000)
+
+
+class Simulator:
+    """
+    Drive ``Window.window_watcher`` against a scripted fake Kodi UI, on a virtual clock.
+
+    The script is a list of steps, each setting the container, focused item and video playback from its time until the
+    next step. Every ``xbmc.sleep`` of the window watcher advances the virtual clock instead of waiting, as do the
+    simulated ThemerrDB and YouTube latencies, so long sessions replay quickly.
+
+    Lookups run on virtual workers, like the lookup worker threads of the service. A worker is busy for the latency of
+    its lookup, and the result is cached once that latency has passed. With no workers, lookups run on the window
+    watcher, blocking its ticks.
+
+    The optional listing is the content of the container, in order. Focused items in the listing have a
+    ``Container.CurrentItem`` position, and their neighbors can be read with ``Container.ListItem(offset)``.
+
+    During the optional outages, given as ``(start, end)`` times, ThemerrDB requests fail with a connection error
+    after the latency.
+
+    The rate limits are disabled by default. Rate limit waits on a virtual worker only keep the worker busy, each
+    worker sees the virtual time of its own lookup.
+    """
+    def __init__(
+            self,
+            script: List[Step],
+            duration: float,
+            theme_timeout: int = 3,
+            themerrdb_latency: float = 0.2,
+            youtube_latency: float = 1.0,
+            lookup_delay: int = 250,
+            prefetch_lookahead: int = 3,
+            listing: Optional[List[Item]] = None,
+            workers: int = 2,
+            record_to: Optional[str] = None,
+            outages: Optional[List[Tuple[float, float]]] = None,
+            themerrdb_rate_limit: int = 0,
+            youtube_rate_limit: int = 0,
+    ):
+        self.script = sorted(script, key=lambda step: step.at)
+        self._times = [step.at for step in self.script]
+        self.duration = duration
+        self.theme_timeout = theme_timeout
+        self.themerrdb_latency = themerrdb_latency
+        self.youtube_latency = youtube_latency
+        self.lookup_delay = lookup_delay
+        self.prefetch_lookahead = prefetch_lookahead
+        self.listing = listing if listing else []
+        self.workers = workers
+        self.record_to = record_to  # directory for the navigation recorder, disabled if not set
+        self.outages = outages if outages else []
+        self.themerrdb_rate_limit = themerrdb_rate_limit
+        self.youtube_rate_limit = youtube_rate_limit
+
+        self.clock = VirtualClock()
+        self.tracer = tracing.Tracer()
+        self.window = None
+
+        self.plays = []
+        self.stops = 0
+        self.themerrdb_requests = 0
+        self.failed_requests = 0
+        self.youtube_extractions = 0
+        self.ticks = 0
+
+        self._theme_file = None
+        self._background = None  # the latency of the running background lookup
+        self._worker = 0
+        self._busy_until = [0.0] * workers
+        self._completions = {}  # kodi id -> (time the lookup completes, cache entry)
+
+    @property
+    def index(self) -> int:
+        """The index of the step at the current virtual time, -1 before the first step"""
+        return bisect_right(self._times, self.clock.now) - 1
+
+    @property
+    def step(self) -> Step:
+        """The step at the current virtual time"""
+        index = self.index
+        return self.script[index] if index >= 0 else Step(at=0.0)
+
+    def focused_at(self) -> float:
+        """The time the current item was focused, steps with the same item are one focus"""
+        index = self.index
+        while index > 0 and self.script[index - 1].item == self.script[index].item:
+            index -= 1
+        return self.script[index].at if index >= 0 else 0.0
+
+    # fake Kodi UI
+    def get_info_label(self, label: str) -> str:
+        step = self.step
+        if label == 'ListItem.Label':
+            return step.item.label if step.item else ''
+        if label == 'ListItem.DBTYPE':
+            return containers[step.container]['dbtype'] if step.item else ''
+        if label.startswith('ListItem.UniqueID(') and step.item:
+            return step.item.unique_ids.get(label[len('ListItem.UniqueID('):-1], '')
+        if label == 'Container.CurrentItem':
+            return str(self.listing.index(step.item) + 1) if step.item in self.listing else ''
+        match = list_item_pattern.match(label)
+        if match and step.item in self.listing:
+            index = self.listing.index(step.item) + int(match.group('offset'))
+            if 0 <= index < len(self.listing):
+                return self.listing[index].unique_ids.get(match.group('db'), '')
+        return ''
+
+    def get_cond_visibility(self, condition: str) -> bool:
+        return containers[self.step.container]['condition'] == condition
+
+    def sleep(self, milliseconds: int):
+        self.ticks += 1
+        self.clock.sleep(milliseconds)
+        self.run_workers()
+
+    def wait(self, seconds: float):
+        """Wait on the current thread, background lookups only keep their worker busy"""
+        if self._background is None:
+            self.clock.advance(seconds)
+        else:
+            self._background += seconds
+
+    def thread_now(self) -> float:
+        """The virtual time seen by the current thread, including the latency of a running background lookup"""
+        return self.clock.now + (self._background or 0.0)
+
+    # fake lookup workers
+    def run_workers(self):
+        for kodi_id, (completes_at, entry) in list(self._completions.items()):
+            if completes_at <= self.clock.now:
+                del self._completions[kodi_id]
+                self.window.uuid_mapping[kodi_id] = entry
+
+        for self._worker, busy_until in enumerate(self._busy_until):
+            if busy_until > self.clock.now:
+                continue
+            self._background = 0.0
+            try:
+                if not self.window.scheduler.run_next():
+                    break
+            finally:
+                self._background = None
+
+    def background_lookup(self, lookup, kodi_id: str, db_type: Optional[str], lane: int):
+        """Run a lookup on the current worker, and hide its result until the lookup latency has passed"""
+        previous = self.window.uuid_mapping.get(kodi_id)
+        lookup(kodi_id=kodi_id, db_type=db_type, lane=lane)
+        entry = self.window.uuid_mapping.pop(kodi_id, None)
+        if previous is not None:
+            self.window.uuid_mapping[kodi_id] = previous
+
+        completes_at = self.clock.now + self._background
+        if entry is not previous:  # skipped lookups leave the cache unchanged
+            self._completions[kodi_id] = (completes_at, entry)
+        self._busy_until[self._worker] = completes_at
+
+    def start_workers(self):
+        lookup_scheduler = self.window.scheduler
+        lookup, pending, submit = lookup_scheduler.handler, lookup_scheduler.pending, lookup_scheduler.submit
+
+        # lookups waiting for their latency to pass are still running
+        lookup_scheduler.handler = lambda kodi_id, db_type, lane: self.background_lookup(lookup, kodi_id, db_type, lane)
+        lookup_scheduler.pending = lambda kodi_id: kodi_id in self._completions or pending(kodi_id=kodi_id)
+        lookup_scheduler.submit = lambda kodi_id, db_type, lane=scheduler.FOCUSED: (
+            kodi_id in self._completions or submit(kodi_id=kodi_id, db_type=db_type, lane=lane))
+        lookup_scheduler.running = lambda: True
+
+    def abort_requested(self) -> bool:
+        return self.clock.now >= self.duration
+
+    # fake player
+    def get_playing_file(self) -> str:
+        if self.step.video:
+            self._theme_file = None  # starting a video replaces the theme
+            return 'video.mkv'
+        if self._theme_file is None:
+            raise RuntimeError('Kodi is not playing any file')
+        return self._theme_file
+
+    def is_playing_video(self) -> bool:
+        return self.step.video
+
+    def play(self, item: str, windowed: bool = False):
+        self._theme_file = item
+        kodi_id = self.window.current_selected_item_id
+        self.plays.append(Play(at=self.clock.now, kodi_id=kodi_id, latency=self.clock.now - self.focused_at()))
+
+    def stop(self, player=None):
+        # the addon player calls ``xbmc.Player.stop(self)``
+        self._theme_file = None
+        self.stops += 1
+
+    # fake network
+    def themerrdb_get(self, url: str, **kwargs):
+        self.themerrdb_requests += 1
+        started_at = self.clock.now
+        self.wait(self.themerrdb_latency)
+        if any(start <= started_at < end for start, end in self.outages):
+            self.failed_requests += 1
+            raise requests.exceptions.ConnectionError(f'ThemerrDB is unreachable: {url}')
+
+        db, db_id = url.rsplit('/', 2)[-2:]
+        db_id = db_id[:-len('.json')]
+        db = {'themoviedb': 'tmdb'}.get(db, db)
+        items = [step.item for step in self.script if step.item] + self.listing
+        item = next((item for item in items if item.unique_ids.get(db) == db_id), None)
+
+        response = MagicMock()
+        if item and item.has_theme:
+            response.status_code = 200
+            response.json.return_value = dict(youtube_theme_url=f'https://www.youtube.com/watch?v={db}{db_id}')
+        else:
+            response.status_code = 404
+            response.json.side_effect = json.decoder.JSONDecodeError('Expecting value', '<html>', 0)
+        return response
+
+    def process_youtube(self, url: str) -> str:
+        self.youtube_extractions += 1
+        self.clock.advance(self.youtube_latency)
+        return f"https://rr.googlevideo.com/videoplayback?id={url.rsplit('=', 1)[-1]}"
+
+    def run(self) -> Result:
+        """Run the script until its duration has passed on the virtual clock"""
+        clock = self.clock
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.epoch + clock.now, tz)
+
+        with ExitStack() as stack:
+            stack.enter_context(patch('xbmc.getInfoLabel', side_effect=self.get_info_label))
+            stack.enter_context(patch('xbmc.getCondVisibility', side_effect=self.get_cond_visibility))
+            stack.enter_context(patch('xbmc.sleep', side_effect=self.sleep))
+            stack.enter_context(patch.multiple(
+                xbmc.Player,
+                getPlayingFile=MagicMock(side_effect=self.get_playing_file),
+                isPlayingVideo=MagicMock(side_effect=self.is_playing_video),
+                play=MagicMock(side_effect=self.play),
+                stop=MagicMock(side_effect=self.stop),
+            ))
+            stack.enter_context(patch('requests.get', side_effect=self.themerrdb_get))
+            stack.enter_context(patch('src.themerr.youtube.process_youtube', side_effect=self.process_youtube))
+            stack.enter_context(patch('src.themerr.gui.time', clock))
+            stack.enter_context(patch('src.themerr.tracing.time', clock))
+            stack.enter_context(patch.object(circuit.themerrdb, 'clock', clock.monotonic))
+            stack.enter_context(patch.object(circuit.youtube, 'clock', clock.monotonic))
+            stack.enter_context(patch('src.themerr.gui.datetime', VirtualDatetime))
+            stack.enter_context(patch('src.themerr.tracing.tracer', self.tracer))
+            stack.enter_context(patch('src.themerr.settings.settings.theme_timeout', return_value=self.theme_timeout))
+            stack.enter_context(patch('src.themerr.settings.settings.lookup_delay', return_value=self.lookup_delay))
+            stack.enter_context(patch('src.themerr.settings.settings.prefetch_lookahead',
+                                      return_value=self.prefetch_lookahead))
+            stack.enter_context(patch('src.themerr.settings.settings.navigation_recorder',
+                                      return_value=bool(self.record_to)))
+            stack.enter_context(patch('src.themerr.settings.settings.themerrdb_rate_limit',
+                                      return_value=self.themerrdb_rate_limit))
+            stack.enter_context(patch('src.themerr.settings.settings.youtube_rate_limit',
+                                      return_value=self.youtube_rate_limit))
+            for limiter in (ratelimit.themerrdb, ratelimit.youtube):
+                stack.enter_context(patch.object(limiter, 'clock', self.thread_now))
+                stack.enter_context(patch.object(limiter, 'sleep', self.wait))
+                limiter.reset()
+
+            self.window = gui.Window()
+            self.window.monitor.abortRequested = self.abort_requested
+            self.window.recorder.directory = self.record_to
+            self.window.recorder.clock = clock.time
+            if self.workers:
+                self.start_workers()
+
+            self.window.window_watcher()
+            self.window.recorder.close()
+
+        return Result(
+            plays=self.plays,
+            stops=self.stops,
+            themerrdb_requests=self.themerrdb_requests,
+            failed_requests=self.failed_requests,
+            youtube_extractions=self.youtube_extractions,
+            ticks=self.ticks,
+            traces=self.tracer,
+        )
+
+
+def steps_from_recording(events: List[recorder.Event]) -> List[Step]:
+    """Convert a navigation recording into a script, the hashed ids are used as TMDB ids"""
+    start = events[0].at if events else 0.0
+    return [
+        Step(
+            at=event.at - start,
+            container=event.container,
+            item=Item(label=event.id_hash, unique_ids={'tmdb': event.id_hash}) if event.id_hash else None,
+        )
+        for event in events
+    ]
@@ -0,0 +1,65 @@
+# standard imports
+from unittest.mock import patch
+
+# local imports
+from src.themerr import actions
+
+
+def test_show_metrics(mock_xbmcgui_dialog):
+    """Test show_metrics method"""
+    snapshot = {'requests_total': dict(type='counter', description='Requests', values=[dict(labels={}, value=1)])}
+    with patch('src.themerr.metrics.read_published', return_value=snapshot):
+        actions.show_metrics()
+
+    heading, text = mock_xbmcgui_dialog.textviewer.call_args.args
+    assert 'requests_total' in text
+
+
+def test_show_metrics_not_published(mock_xbmcgui_dialog):
+    """Test show_metrics method when the service has not published anything"""
+    with patch('src.themerr.metrics.read_published', return_value={}):
+        actions.show_metrics()
+
+    heading, text = mock_xbmcgui_dialog.textviewer.call_args.args
+    assert 'No metrics' in text
+
+
+def test_show_traces(mock_xbmcgui_dialog):
+    """Test show_traces method"""
+    report = {'lookup': dict(type='histogram', description='Lookup', count=1, sum=0.2, p50=0.2, p90=0.2, p99=0.2,
+                             max=0.2)}
+    with patch('src.themerr.tracing.read_published', return_value=report):
+        actions.show_traces()
+
+    heading, text = mock_xbmcgui_dialog.textviewer.call_args.args
+    assert 'lookup: Lookup' in text
+    assert 'p90=0.2000' in text
+
+
+def test_show_traces_not_published(mock_xbmcgui_dialog):
+    """Test show_traces method when the service has not published anything"""
+    with patch('src.themerr.tracing.read_published', return_value={}):
+        actions.show_traces()
+
+    heading, text = mock_xbmcgui_dialog.textviewer.call_args.args
+    assert 'No traces' in text
+
+
+def test_run():
+    """Test run method dispatches to the action"""
+    with patch.dict(actions.actions, {'metrics': lambda: calls.append('metrics')}):
+        calls = []
+        actions.run(argv=['metrics'])
+        actions.run(argv=[])
+        actions.run(argv=['unknown'])
+
+    assert calls == ['metrics', 'metrics']
+
+
+def test_start_profiler(mock_xbmcgui_dialog):
+    """Test start_profiler method notifies the service"""
+    with patch('xbmc.executebuiltin') as mock_builtin:
+        actions.start_profiler()
+
+    mock_builtin.assert_called_once_with('NotifyAll(service.themerr,profile)')
+    mock_xbmcgui_dialog.notification.assert_called_once()
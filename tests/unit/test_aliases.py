@@ -0,0 +1,64 @@
+# standard imports
+import threading
+
+# local imports
+from src.themerr import aliases
+
+
+def test_link():
+    """Test ids seen together are linked to the first id"""
+    index = aliases.AliasIndex()
+    assert index.link(ids=[]) is None
+    assert index.link(ids=['tmdb_1', 'imdb_tt1']) == 'tmdb_1'
+    assert index.canonical(kodi_id='imdb_tt1') == 'tmdb_1'
+    assert index.canonical(kodi_id='tmdb_2') == 'tmdb_2'
+    assert index.ids(kodi_id='imdb_tt1') == ['tmdb_1', 'imdb_tt1']
+    assert index.size.value() == 2
+
+
+def test_link_known_alias():
+    """Test an item first seen by its second id keeps that id as canonical"""
+    index = aliases.AliasIndex()
+    assert index.link(ids=['imdb_tt1']) == 'imdb_tt1'
+    assert index.link(ids=['tmdb_1', 'imdb_tt1']) == 'imdb_tt1'
+    assert index.link(ids=['tmdb_1']) == 'imdb_tt1'
+    assert index.ids(kodi_id='tmdb_1') == ['imdb_tt1', 'tmdb_1']
+
+
+def test_link_merge():
+    """Test items seen apart are merged when their ids are seen together"""
+    index = aliases.AliasIndex()
+    index.link(ids=['tmdb_1'])
+    index.link(ids=['imdb_tt1'])
+    assert index.link(ids=['tmdb_1', 'imdb_tt1']) == 'tmdb_1'
+    assert index.canonical(kodi_id='imdb_tt1') == 'tmdb_1'
+    assert index.ids(kodi_id='tmdb_1') == ['tmdb_1', 'imdb_tt1']
+
+
+def test_link_threads():
+    """Test concurrent links of the same item agree on one canonical id"""
+    index = aliases.AliasIndex()
+    results = []
+
+    def link(ids):
+        results.append(index.link(ids=ids))
+
+    threads = [threading.Thread(target=link, args=(ids,)) for ids in (['tmdb_1', 'imdb_tt1'], ['imdb_tt1']) * 20]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(results) == {index.canonical(kodi_id='tmdb_1')} == {index.canonical(kodi_id='imdb_tt1')}
+    assert set(index.ids(kodi_id='tmdb_1')) == {'tmdb_1', 'imdb_tt1'}
+
+
+def test_remove():
+    """Test every id of an item is removed"""
+    index = aliases.AliasIndex()
+    index.link(ids=['tmdb_1', 'imdb_tt1'])
+    index.link(ids=['tmdb_2'])
+
+    assert index.remove(kodi_id='imdb_tt1') == ['tmdb_1', 'imdb_tt1']
+    assert index.ids(kodi_id='imdb_tt1') == ['imdb_tt1']
+    assert index.size.value() == 1
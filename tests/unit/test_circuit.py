@@ -0,0 +1,116 @@
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import circuit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='function')
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope='function')
+def breaker(clock):
+    return circuit.CircuitBreaker(name='test', failure_threshold=3, reset_timeout=10.0, clock=clock)
+
+
+def test_closed(breaker):
+    """Test requests are allowed until the failure threshold is reached"""
+    assert breaker.state() == circuit.CLOSED
+    assert breaker.healthy()
+
+    breaker.failure()
+    breaker.failure()
+    assert breaker.allow()
+    assert breaker.state() == circuit.CLOSED
+    assert not breaker.healthy()
+
+    breaker.success()
+    assert breaker.healthy()
+    assert breaker.failures == 0
+
+
+def test_open(breaker):
+    """Test requests fail fast once the breaker opens"""
+    rejected = circuit.rejections.get(labels=dict(endpoint='test'))
+    opened = circuit.transitions.get(labels=dict(endpoint='test', state=circuit.OPEN))
+    for _ in range(3):
+        breaker.failure()
+
+    assert breaker.state() == circuit.OPEN
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert circuit.rejections.get(labels=dict(endpoint='test')) == rejected + 2
+    assert circuit.transitions.get(labels=dict(endpoint='test', state=circuit.OPEN)) == opened + 1
+
+
+@pytest.mark.parametrize('probe_succeeds, state', [
+    (True, circuit.CLOSED),
+    (False, circuit.OPEN),
+])
+def test_half_open(breaker, clock, probe_succeeds, state):
+    """Test a single probe is allowed after the reset timeout, and its result decides the state"""
+    for _ in range(3):
+        breaker.failure()
+
+    clock.now = 10.0
+    assert breaker.state() == circuit.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # the probe is running
+
+    if probe_succeeds:
+        breaker.success()
+    else:
+        breaker.failure()
+    assert breaker.state() == state
+    assert breaker.allow() is probe_succeeds
+
+
+def test_half_open_lost_probe(breaker, clock):
+    """Test a probe which never reports is replaced after the reset timeout"""
+    for _ in range(3):
+        breaker.failure()
+
+    clock.now = 10.0
+    assert breaker.allow()
+    clock.now = 19.0
+    assert not breaker.allow()
+    clock.now = 20.0
+    assert breaker.allow()
+
+
+def test_blocked(breaker, clock):
+    """Test blocked reports rejected requests without taking the probe of a half-open breaker"""
+    assert not breaker.blocked()
+    for _ in range(3):
+        breaker.failure()
+    assert breaker.blocked()
+
+    clock.now = 10.0
+    assert not breaker.blocked()
+    assert not breaker.blocked()
+    assert breaker.allow()  # the probe is still available
+    assert breaker.blocked()
+
+    breaker.success()
+    assert not breaker.blocked()
+
+
+def test_reset(breaker):
+    """Test reset closes the breaker"""
+    for _ in range(3):
+        breaker.failure()
+
+    breaker.reset()
+    assert breaker.state() == circuit.CLOSED
+    assert breaker.healthy()
+    assert breaker.allow()
@@ -1,5 +1,7 @@
 # standard imports
+from datetime import datetime
 import os
+from unittest.mock import patch
 
 # kodi imports
 import xbmc
@@ -8,7 +10,13 @@ import xbmc
 import pytest
 
 # local imports
+from src.themerr import circuit
 from src.themerr import gui
+from src.themerr import ratelimit
+from src.themerr import recorder
+from src.themerr import scheduler
+from src.themerr import throttle
+from src.themerr import tracing
 
 
 @pytest.fixture(
@@ -242,3 +250,494 @@ def test_is_episodes(mock_xbmc_get_cond_visibility, window_obj, expected):
 
     if expected:
         del os.environ[env_var]
+
+
+def test_cache_status(window_obj):
+    """Test cache_status method"""
+    assert window_obj.cache_status(kodi_id='tmdb_1') == 'miss'
+
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': datetime.now().timestamp(), 'youtube_url': None}
+    assert window_obj.cache_status(kodi_id='tmdb_1') == 'hit'
+
+    window_obj.uuid_mapping['tmdb_1']['timestamp'] -= 3601
+    assert window_obj.cache_status(kodi_id='tmdb_1') == 'stale'
+
+    window_obj.uuid_mapping['tmdb_1']['refresh_at'] = datetime.now().timestamp() + 60
+    assert window_obj.cache_status(kodi_id='tmdb_1') == 'hit'
+
+
+def test_tick_records_metrics(window_obj):
+    """Test tick method records cache lookups for newly selected items"""
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': datetime.now().timestamp(), 'youtube_url': None}
+    hits = gui.cache_lookups.get(labels=dict(result='hit'))
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: '1' if label == 'ListItem.UniqueID(tmdb)' else ''):
+        window_obj.tick(timeout=60)
+        window_obj.tick(timeout=60)  # same item is not counted twice
+
+    assert window_obj.last_selected_item_id == 'tmdb_1'
+    assert gui.cache_lookups.get(labels=dict(result='hit')) == hits + 1
+
+
+def test_find_youtube_url_stand_in(themerrdb_server, window_obj):
+    """Test find_youtube_url against the local ThemerrDB stand-in"""
+    assert window_obj.find_youtube_url(kodi_id='tmdb_1', db_type='movies').startswith('https://www.youtube.com/')
+    assert window_obj.find_youtube_url(kodi_id='imdb_tt0000001', db_type='movies')
+    assert window_obj.find_youtube_url(kodi_id='tmdb_10001', db_type='movies') is None  # not in the stand-in
+
+    themerrdb_server.slow_body = 0.05
+    assert window_obj.find_youtube_url(kodi_id='tmdb_2', db_type='tv_shows')
+
+    themerrdb_server.error_rate = 1
+    assert window_obj.find_youtube_url(kodi_id='tmdb_1', db_type='movies') is None
+
+    assert themerrdb_server.requests == 5
+
+
+def test_find_youtube_url_mirror(themerrdb_server, themerrdb_mirror, window_obj):
+    """Test find_youtube_url fails over to a mirror"""
+    themerrdb_server.error_rate = 1
+    assert window_obj.find_youtube_url(kodi_id='tmdb_1', db_type='movies').startswith('https://www.youtube.com/')
+    assert themerrdb_mirror.requests == 1
+    assert circuit.themerrdb.healthy()
+
+
+def test_find_youtube_url_directory(themerrdb_directory, window_obj):
+    """Test find_youtube_url reads a ThemerrDB directory, without a rate limit"""
+    assert window_obj.find_youtube_url(kodi_id='tmdb_1', db_type='movies').startswith('https://www.youtube.com/')
+    assert window_obj.find_youtube_url(kodi_id='tmdb_101', db_type='movies') is None
+
+    with patch('src.themerr.settings.settings.themerrdb_rate_limit', return_value=1), \
+            patch.object(ratelimit.themerrdb, 'acquire') as acquire:
+        window_obj.lookup(kodi_id='tmdb_2', db_type='movies', lane=scheduler.WARMUP)
+    acquire.assert_not_called()
+    assert window_obj.uuid_mapping['tmdb_2']['youtube_url']
+
+
+@pytest.mark.parametrize('condition, container', [
+    ('Window.IsVisible(home)', 'home'),
+    ('ListItem.IsCollection', 'sets'),
+    ('Container.Content(movies)', 'movies'),
+    ('Container.Content(tvshows)', 'tvshows'),
+    ('Container.Content(Seasons)', 'seasons'),
+    ('Container.Content(Episodes)', 'episodes'),
+    ('Container.Content(videos)', 'other'),
+])
+def test_container_type(mock_xbmc_get_cond_visibility, window_obj, condition, container):
+    os.environ[f'_KODI_GET_COND_VISIBILITY_{condition}'] = '1'
+    try:
+        assert window_obj.container_type() == container
+    finally:
+        del os.environ[f'_KODI_GET_COND_VISIBILITY_{condition}']
+
+
+def test_tick_records_focus_changes(window_obj, tmp_path):
+    """Test focus changes are recorded only when the recorder is enabled"""
+    window_obj.recorder.directory = str(tmp_path)
+    labels = {'ListItem.UniqueID(tmdb)': '1', 'Container.CurrentItem': '7'}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'cache_status', return_value='hit'), \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=False):
+        window_obj.tick(timeout=60)
+    assert not os.listdir(tmp_path)
+
+    window_obj.last_selected_item_id = None
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'cache_status', return_value='hit'), \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=True):
+        window_obj.tick(timeout=60)
+        window_obj.tick(timeout=60)  # no focus change
+    window_obj.recorder.close()
+
+    events = recorder.read_recording(directory=str(tmp_path))
+    assert len(events) == 1
+    assert events[0].index == 7
+    assert events[0].id_hash == window_obj.recorder.hash_id(kodi_id='tmdb_1')
+
+
+def test_tick_lookup(window_obj):
+    """Test the focused item is looked up on the window watcher thread when no worker is running"""
+    labels = {'ListItem.UniqueID(tmdb)': '1'}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'database_type', return_value='movies'), \
+            patch.object(window_obj, 'find_youtube_url', return_value='https://www.youtube.com/watch?v=1') as find, \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=False):
+        window_obj.tick(timeout=60)
+        window_obj.tick(timeout=60)
+
+    find.assert_called_once_with(kodi_id='tmdb_1', db_type='movies')
+    assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] == 'https://www.youtube.com/watch?v=1'
+    assert window_obj.scheduler.size() == 0
+
+
+def test_lookup_no_database_type(window_obj):
+    """Test items without a database type are cached without a URL"""
+    with patch.object(window_obj, 'find_youtube_url') as find:
+        window_obj.lookup(kodi_id='tmdb_1', db_type=None)
+    find.assert_not_called()
+    assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] is None
+
+
+def test_tick_throttles_lookups(window_obj):
+    """Test items left before the lookup delay passed are not looked up, and are counted"""
+    throttled = throttle.throttled_lookups.total()
+    labels = {}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch('xbmc.getCondVisibility', return_value=False), \
+            patch.object(window_obj, 'find_youtube_url') as find, \
+            patch('src.themerr.settings.settings.lookup_delay', return_value=60000), \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=False):
+        for db_id in ('1', '2'):
+            labels['ListItem.UniqueID(tmdb)'] = db_id
+            window_obj.tick(timeout=60)
+
+    find.assert_not_called()
+    assert throttle.throttled_lookups.total() == throttled + 1
+
+
+def test_item_id(window_obj):
+    labels = {'Container.ListItem(1).UniqueID(imdb)': 'tt0000002', 'Container.ListItem(-1).UniqueID(tmdb)': '1'}
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')):
+        assert window_obj.item_id(offset=1) == 'imdb_tt0000002'
+        assert window_obj.item_id(offset=-1) == 'tmdb_1'
+        assert window_obj.item_id(offset=2) is None
+
+
+def test_link_ids(window_obj):
+    """Test an item is cached under one Kodi ID whichever of its ids a view exposes"""
+    now = datetime.now().timestamp()
+    window_obj.uuid_mapping['imdb_tt0000001'] = {'timestamp': now, 'youtube_url': 'https://www.youtube.com/watch?v=1'}
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': now, 'youtube_url': None}
+
+    labels = {'ListItem.UniqueID(tmdb)': '1', 'ListItem.UniqueID(imdb)': 'tt0000001'}
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')):
+        assert window_obj.link_ids(ids=window_obj.list_item_ids(prefix='ListItem')) == 'tmdb_1'
+
+    # the entry with a URL is kept under the canonical id
+    assert list(window_obj.uuid_mapping) == ['tmdb_1']
+    assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] == 'https://www.youtube.com/watch?v=1'
+
+    labels = {'ListItem.UniqueID(imdb)': 'tt0000001'}
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')):
+        assert window_obj.link_ids(ids=window_obj.list_item_ids(prefix='ListItem')) == 'tmdb_1'
+
+
+def test_tick_tv_show_id(kodi_library, window_obj):
+    """Test seasons and episodes are resolved to their TV show, without a previously selected show"""
+    labels = {'ListItem.TvShowDBID': '5'}
+    window_obj.last_selected_show_id = 'tmdb_48866'  # browsed before
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'is_seasons', return_value=True):
+        window_obj.tick(timeout=60)
+        labels['ListItem.TvShowDBID'] = ''  # e.g. the parent folder item
+        window_obj.tick(timeout=60)
+        assert window_obj.last_selected_item_id == 'tmdb_48866'
+        labels['ListItem.TvShowDBID'] = '5'
+        window_obj.tick(timeout=60)
+
+    assert kodi_library.calls == 1
+    assert window_obj.last_selected_item_id == 'tmdb_5'
+
+
+def test_tick_tv_show_id_unresolved(kodi_library, window_obj):
+    """Test a TV show which cannot be resolved is not requested again on every tick"""
+    labels = {'ListItem.TvShowDBID': '999'}  # not in the library
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'is_seasons', return_value=True):
+        for _ in range(5):
+            window_obj.tick(timeout=60)
+
+    assert kodi_library.calls == 1
+    assert window_obj.last_selected_item_id is None
+
+
+def test_tick_movie_set_id(themerrdb_server, kodi_library, window_obj):
+    """Test movie sets without unique ids are looked up by the collection of their movies"""
+    labels = {'ListItem.DBTYPE': 'set', 'ListItem.DBID': '2'}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch('xbmc.getCondVisibility', side_effect=lambda condition: condition == 'ListItem.IsCollection'):
+        window_obj.tick(timeout=60)
+        assert window_obj.last_selected_item_id == 'set_2'
+        assert window_obj.uuid_mapping['set_2']['youtube_url'].startswith('https://www.youtube.com/')
+
+        trace = tracing.tracer.traces[-1]  # the collection is looked up as tmdb_2, and traced as the set
+        assert trace.kodi_id == 'set_2'
+        assert 'lookup_start' in trace.marks and 'lookup_end' in trace.marks
+
+        window_obj.lookup(kodi_id='set_2', db_type='movie_collections')
+
+    assert kodi_library.calls == 1
+    assert window_obj.aliases.ids(kodi_id='set_2') == ['set_2', 'tmdb_2']
+    assert themerrdb_server.requests == 3  # the movie once, and the collection twice
+
+
+def test_library_changed(kodi_library, window_obj):
+    """Test added items are resolved in one batch and warmed up, and removed items are dropped from the cache"""
+    now = datetime.now().timestamp()
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': now, 'youtube_url': 'https://www.youtube.com/watch?v=1'}
+
+    window_obj.library_changed(changes=[('added', 'movie', number) for number in (1, 2, 3)] + [('added', 'tvshow', 4)])
+
+    assert kodi_library.calls == 2  # one batch per kind
+    assert window_obj.aliases.canonical(kodi_id='imdb_tt0000002') == 'tmdb_2'
+    assert not window_obj.scheduler.pending(kodi_id='tmdb_1')  # cached
+    assert window_obj.scheduler.pending(kodi_id='tmdb_2')
+    assert window_obj.scheduler.pending(kodi_id='tmdb_3')
+    assert window_obj.scheduler.pending(kodi_id='tmdb_4')
+
+    window_obj.library_changed(changes=[('removed', 'movie', 1), ('updated', 'movie', 2)])
+    assert 'tmdb_1' not in window_obj.uuid_mapping
+    assert window_obj.aliases.ids(kodi_id='imdb_tt0000001') == ['imdb_tt0000001']
+    assert kodi_library.calls == 3
+
+
+def test_library_changed_existing(kodi_library, window_obj):
+    """Test removed items which existed before the service started are dropped from the cache, without a listing"""
+    labels = {'ListItem.DBTYPE': 'movie', 'ListItem.DBID': '5', 'ListItem.UniqueID(tmdb)': '5',
+              'Container.ListItem(1).DBTYPE': 'movie', 'Container.ListItem(1).DBID': '6',
+              'Container.ListItem(1).UniqueID(imdb)': 'tt0000006'}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'database_type', return_value='movies'), \
+            patch.object(window_obj, 'find_youtube_url', return_value='https://www.youtube.com/watch?v=5'), \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=False):
+        window_obj.tick(timeout=60)  # selected
+        assert window_obj.item_id(offset=1) == 'imdb_tt0000006'  # prefetched
+    window_obj.lookup(kodi_id='imdb_tt0000006', db_type=None)
+    assert {'tmdb_5', 'imdb_tt0000006'} <= set(window_obj.uuid_mapping)
+
+    window_obj.library_changed(changes=[('removed', 'movie', 5), ('removed', 'movie', 6), ('removed', 'movie', 7)])
+    assert 'tmdb_5' not in window_obj.uuid_mapping
+    assert 'imdb_tt0000006' not in window_obj.uuid_mapping
+    assert kodi_library.calls == 0
+
+
+def test_library_changed_ids(kodi_library, window_obj):
+    """Test items scraped again with other ids, and changed movie sets, are dropped from the cache"""
+    now = datetime.now().timestamp()
+    window_obj.library_changed(changes=[('updated', 'movie', 1)])
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': now, 'youtube_url': 'https://www.youtube.com/watch?v=1'}
+    window_obj.uuid_mapping['set_1'] = {'timestamp': now, 'youtube_url': 'https://www.youtube.com/watch?v=2'}
+    assert window_obj.scheduler.size() == 0  # updated items are not looked up
+
+    kodi_library.items['movies'][1]['uniqueid'] = dict(tmdb='10001')
+    window_obj.library_changed(changes=[('updated', 'movie', 1), ('updated', 'set', 1)])
+
+    assert window_obj.uuid_mapping == {}
+    assert window_obj.aliases.canonical(kodi_id='tmdb_10001') == 'tmdb_10001'
+
+
+def test_library_notification(kodi_library, window_obj):
+    """Test library notifications received by the monitor of the window update the cache"""
+    window_obj.monitor.onNotification(sender='xbmc', method='VideoLibrary.OnUpdate',
+                                      data='{"item": {"id": 5, "type": "movie"}, "added": true}')
+    assert window_obj.scheduler.pending(kodi_id='tmdb_5')
+
+
+def test_database_type_movie_set(window_obj):
+    """Test movie sets in movie containers are looked up as collections"""
+    with patch('xbmc.getCondVisibility',
+               side_effect=lambda condition: condition in ('Container.Content(movies)', 'ListItem.IsCollection')):
+        assert window_obj.database_type() == 'movie_collections'
+
+
+def test_lookup_alias_fallback(themerrdb_server, window_obj):
+    """Test an item missing by its first id is found by its other ids"""
+    window_obj.aliases.link(ids=['tmdb_10001', 'imdb_tt0000001'])
+    found = gui.alias_fallbacks.get(labels=dict(result='found'))
+
+    window_obj.lookup(kodi_id='tmdb_10001', db_type='movies')
+    assert window_obj.uuid_mapping['tmdb_10001']['youtube_url'].startswith('https://www.youtube.com/')
+    assert 'imdb_tt0000001' not in window_obj.uuid_mapping
+    assert themerrdb_server.requests == 2
+    assert gui.alias_fallbacks.get(labels=dict(result='found')) == found + 1
+
+    window_obj.aliases.link(ids=['tmdb_1', 'imdb_tt0000002'])
+    window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+    assert themerrdb_server.requests == 3  # found by the first id
+
+
+def test_lookup_alias_fallback_unsupported(window_obj):
+    """Test ids not supported by the database type are not looked up"""
+    window_obj.aliases.link(ids=['imdb_tt0000001', 'tmdb_1'])
+    with patch.object(window_obj, 'find_youtube_url', return_value=None) as find:
+        window_obj.lookup(kodi_id='imdb_tt0000001', db_type='tv_shows')
+    find.assert_called_once_with(kodi_id='tmdb_1', db_type='tv_shows')
+
+
+def test_lookup_alias_fallback_unavailable(window_obj):
+    """Test the other ids are not looked up when the request for the first id failed"""
+    window_obj.aliases.link(ids=['tmdb_1', 'imdb_tt0000001'])
+
+    def find(kodi_id, db_type):
+        circuit.themerrdb.failure()
+
+    with patch.object(window_obj, 'find_youtube_url', side_effect=find) as find_youtube_url:
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+    assert find_youtube_url.call_count == 1
+
+
+def test_prefetch(window_obj):
+    """Test uncached items ahead of the scroll are queued in the neighbor lane"""
+    labels = {f'Container.ListItem({offset}).UniqueID(tmdb)': str(10 + offset) for offset in (-1, 1)}
+    window_obj.uuid_mapping['tmdb_9'] = {'timestamp': datetime.now().timestamp(), 'youtube_url': None}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch('xbmc.getCondVisibility', return_value=False), \
+            patch.object(window_obj, 'database_type', return_value='movies'), \
+            patch('src.themerr.settings.settings.prefetch_lookahead', return_value=3):
+        window_obj.prefetch()
+
+    assert window_obj.scheduler.pending(kodi_id='tmdb_11')
+    assert not window_obj.scheduler.pending(kodi_id='tmdb_9')  # cached
+    assert window_obj.scheduler.size() == 1
+
+
+def test_prefetch_seasons(window_obj):
+    """Test seasons and episodes are not prefetched"""
+    with patch('xbmc.getInfoLabel', return_value='1'), \
+            patch.object(window_obj, 'is_seasons', return_value=True), \
+            patch('src.themerr.settings.settings.prefetch_lookahead', return_value=3):
+        window_obj.prefetch()
+    assert window_obj.scheduler.size() == 0
+
+
+def test_lookup_jitter(window_obj):
+    """Test entries are refreshed within the jittered ttl"""
+    with patch.object(window_obj, 'find_youtube_url', return_value='https://www.youtube.com/watch?v=1'):
+        for number in range(20):
+            window_obj.lookup(kodi_id=f'tmdb_{number}', db_type='movies')
+
+    refresh_after = {entry['refresh_at'] - entry['timestamp'] for entry in window_obj.uuid_mapping.values()}
+    assert all(gui.cache_ttl * (1 - gui.cache_ttl_jitter) <= ttl <= gui.cache_ttl for ttl in refresh_after)
+    assert len(refresh_after) > 1
+
+
+def test_lookup_refresh(window_obj):
+    """Test a refresh replaces the stale entry"""
+    updated = gui.cache_refreshes.get(labels=dict(result='updated'))
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': datetime.now().timestamp() - 3601, 'youtube_url': 'old'}
+
+    with patch.object(window_obj, 'find_youtube_url', return_value='new'):
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+
+    assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] == 'new'
+    assert window_obj.cache_status(kodi_id='tmdb_1') == 'hit'
+    assert gui.cache_refreshes.get(labels=dict(result='updated')) == updated + 1
+
+
+def test_lookup_refresh_failed(window_obj):
+    """Test a refresh failed as ThemerrDB is unavailable keeps the stale URL until it is too old"""
+    kept = gui.cache_refreshes.get(labels=dict(result='kept_stale'))
+    fetched_at = datetime.now().timestamp() - 3601
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': fetched_at, 'youtube_url': 'old'}
+    circuit.themerrdb.failure()
+
+    with patch.object(window_obj, 'find_youtube_url', return_value=None):
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+
+        entry = window_obj.uuid_mapping['tmdb_1']
+        assert entry['youtube_url'] == 'old'
+        assert entry['timestamp'] == fetched_at
+        assert entry['refresh_at'] - datetime.now().timestamp() <= gui.cache_retry
+        assert gui.cache_refreshes.get(labels=dict(result='kept_stale')) == kept + 1
+
+        entry['timestamp'] -= gui.cache_max_stale
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+        assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] is None
+
+
+def test_lookup_removed(window_obj):
+    """Test a refresh drops the stale URL when ThemerrDB no longer has a theme"""
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': datetime.now().timestamp() - 3601, 'youtube_url': 'old'}
+
+    with patch.object(window_obj, 'find_youtube_url', return_value=None):
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+
+    entry = window_obj.uuid_mapping['tmdb_1']
+    assert entry['youtube_url'] is None
+    assert entry['refresh_at'] - entry['timestamp'] >= gui.cache_ttl * (1 - gui.cache_ttl_jitter)
+
+
+def test_lookup_unavailable(window_obj):
+    """Test a miss while ThemerrDB is unavailable is retried soon"""
+    circuit.themerrdb.failure()
+
+    with patch.object(window_obj, 'find_youtube_url', return_value=None):
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies')
+
+    entry = window_obj.uuid_mapping['tmdb_1']
+    assert entry['refresh_at'] - entry['timestamp'] <= gui.cache_retry
+
+
+def test_find_youtube_url_circuit_open(themerrdb_server, window_obj):
+    """Test ThemerrDB is not requested while the circuit breaker is open"""
+    rejected = gui.themerrdb_requests.get(labels=dict(status='circuit_open'))
+    themerrdb_server.error_rate = 1
+    for _ in range(circuit.themerrdb.failure_threshold + 2):
+        assert window_obj.find_youtube_url(kodi_id='tmdb_1', db_type='movies') is None
+
+    assert circuit.themerrdb.state() == circuit.OPEN
+    assert themerrdb_server.requests == circuit.themerrdb.failure_threshold
+    assert gui.themerrdb_requests.get(labels=dict(status='circuit_open')) == rejected + 2
+
+
+def test_tick_stale(window_obj):
+    """Test a stale item is refreshed in the warmup lane"""
+    window_obj.uuid_mapping['tmdb_1'] = {'timestamp': datetime.now().timestamp() - 3601, 'youtube_url': 'old'}
+    labels = {'ListItem.UniqueID(tmdb)': '1'}
+
+    with patch('xbmc.getInfoLabel', side_effect=lambda label: labels.get(label, '')), \
+            patch.object(window_obj, 'database_type', return_value='movies'), \
+            patch.object(window_obj.scheduler, 'submit') as submit, \
+            patch('src.themerr.settings.settings.navigation_recorder', return_value=False):
+        window_obj.tick(timeout=60)
+
+    submit.assert_called_once_with(kodi_id='tmdb_1', db_type='movies', lane=scheduler.WARMUP)
+
+
+@pytest.mark.parametrize('lane, looked_up', [
+    (scheduler.FOCUSED, True),
+    (scheduler.NEIGHBOR, False),
+])
+def test_lookup_rate_limited(window_obj, lane, looked_up):
+    """Test only lookups of the focused item use the tokens reserved for them"""
+    ratelimit.themerrdb.bucket.tokens = ratelimit.themerrdb.reserve
+
+    with patch('src.themerr.settings.settings.themerrdb_rate_limit', return_value=60), \
+            patch.object(window_obj, 'find_youtube_url', return_value='https://www.youtube.com/watch?v=1') as find:
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies', lane=lane)
+
+    assert find.called is looked_up
+    assert ('tmdb_1' in window_obj.uuid_mapping) is looked_up
+
+
+def test_lookup_circuit_open(window_obj):
+    """Test lookups while the ThemerrDB circuit breaker is open fail fast, without waiting for a token"""
+    for _ in range(circuit.themerrdb.failure_threshold):
+        circuit.themerrdb.failure()
+
+    with patch('src.themerr.settings.settings.themerrdb_rate_limit', return_value=60), \
+            patch.object(ratelimit.themerrdb, 'acquire') as acquire:
+        window_obj.lookup(kodi_id='tmdb_1', db_type='movies', lane=scheduler.FOCUSED)
+
+    acquire.assert_not_called()
+    assert window_obj.uuid_mapping['tmdb_1']['youtube_url'] is None
+
+
+def test_window_watcher_tick_error(mock_xbmc_log, window_obj):
+    """Test an error in a tick is logged, and the watcher keeps running"""
+    with patch.object(window_obj.monitor, 'abortRequested', side_effect=[False, False, True]), \
+            patch.object(window_obj, 'tick', side_effect=[KeyError('tmdb_1'), None]) as tick, \
+            patch('xbmc.sleep'):
+        window_obj.window_watcher()
+
+    assert tick.call_count == 2
+    assert any('Window watcher tick failed' in call.kwargs['msg'] for call in mock_xbmc_log.call_args_list)
+    assert window_obj.watchdog._tick is None
@@ -0,0 +1,87 @@
+# standard imports
+import json
+from unittest.mock import patch
+
+# local imports
+from src.themerr import jsonrpc
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_call(kodi_library):
+    """Test a single request is sent as JSON-RPC 2.0, not as a batch"""
+    with patch('xbmc.executeJSONRPC', side_effect=kodi_library.execute) as execute:
+        result = jsonrpc.client.call(method='VideoLibrary.GetTVShowDetails', params=dict(tvshowid=1,
+                                                                                         properties=['uniqueid']))
+
+    assert result == dict(tvshowdetails=dict(tvshowid=1, label='TV Show 1', uniqueid=dict(tmdb='1')))
+    request = json.loads(execute.call_args[0][0])
+    assert request['jsonrpc'] == '2.0'
+    assert request['method'] == 'VideoLibrary.GetTVShowDetails'
+
+
+def test_call_error(kodi_library):
+    """Test errors and invalid responses have no result"""
+    errors = jsonrpc.methods.get(labels=dict(method='VideoLibrary.GetTVShowDetails', result='error'))
+    assert jsonrpc.client.call(method='VideoLibrary.GetTVShowDetails', params=dict(tvshowid=-1)) is None
+    assert jsonrpc.client.call(method='VideoLibrary.Unknown') is None
+    assert jsonrpc.methods.get(labels=dict(method='VideoLibrary.GetTVShowDetails', result='error')) == errors + 1
+
+    with patch('xbmc.executeJSONRPC', return_value='not json'):
+        assert jsonrpc.client.call(method='VideoLibrary.GetTVShowDetails', params=dict(tvshowid=1)) is None
+
+
+def test_batch(kodi_library):
+    """Test requests are sent in batches of up to max_batch, and results are in the order of the requests"""
+    client = jsonrpc.Client(execute=kodi_library.execute, max_batch=4)
+    calls = jsonrpc.calls.total()
+
+    requests = [('VideoLibrary.GetMovieDetails', dict(movieid=movie_id)) for movie_id in range(1, 11)]
+    requests.insert(5, ('VideoLibrary.GetMovieDetails', dict(movieid=-1)))
+    results = client.batch(requests=requests)
+
+    assert kodi_library.calls == 3
+    assert jsonrpc.calls.total() == calls + 3
+    assert results[5] is None
+    assert [result['moviedetails']['movieid'] for result in results if result] == list(range(1, 11))
+
+
+def test_batch_cache(kodi_library):
+    """Test cached results are used until the ttl, and failed requests are not cached"""
+    clock = FakeClock()
+    client = jsonrpc.Client(execute=kodi_library.execute, cache_ttl=10.0, clock=clock)
+    requests = [('VideoLibrary.GetMovieDetails', dict(movieid=1)), ('VideoLibrary.GetMovieDetails', dict(movieid=-1))]
+
+    first = client.batch(requests=requests, cache=True)
+    second = client.batch(requests=requests, cache=True)
+    assert first == second
+    assert kodi_library.requests == 3  # the failed request is sent again
+
+    client.batch(requests=requests)  # without the cache
+    assert kodi_library.requests == 5
+
+    clock.now = 10.0
+    client.batch(requests=requests[:1], cache=True)
+    assert kodi_library.requests == 6
+
+    client.clear()
+    client.batch(requests=requests[:1], cache=True)
+    assert kodi_library.requests == 7
+
+
+def test_pages(kodi_library):
+    """Test listings are paged until the total, with only the requested properties"""
+    client = jsonrpc.Client(execute=kodi_library.execute, page_size=300)
+
+    movies = list(client.pages(method='VideoLibrary.GetMovies', key='movies'))
+    assert [movie['movieid'] for movie in movies] == list(range(1, 1001))
+    assert movies[0] == dict(movieid=1, label='Movie 1', uniqueid=dict(tmdb='1', imdb='tt0000001'))
+    assert kodi_library.calls == 4
+
+    assert list(client.pages(method='VideoLibrary.Unknown', key='items')) == []
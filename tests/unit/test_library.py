@@ -0,0 +1,135 @@
+# standard imports
+import json
+from unittest.mock import patch
+
+# local imports
+from src.themerr import library
+
+
+def test_fetch_unique_ids(kodi_library):
+    """Test the unique ids of items are fetched in one batch, with only the uniqueid property"""
+    unique_ids = library.fetch_unique_ids(kind='movie', dbids=[1, 2, -1])
+
+    assert unique_ids == {1: dict(tmdb='1', imdb='tt0000001'), 2: dict(tmdb='2', imdb='tt0000002'), -1: None}
+    assert kodi_library.calls == 1
+
+
+def test_list_unique_ids(kodi_library):
+    """Test the unique ids of every item are listed in pages"""
+    unique_ids = library.list_unique_ids(kind='movie')
+
+    assert len(unique_ids) == 1000
+    assert unique_ids[1000] == dict(tmdb='1000', imdb='tt0001000')
+    assert kodi_library.calls == 2
+
+
+def movie_set(*tmdb_ids):
+    movies = [dict(movieid=number, uniqueid=dict(tmdb=tmdb_id) if tmdb_id else {})
+              for number, tmdb_id in enumerate(tmdb_ids)]
+    return json.dumps(dict(jsonrpc='2.0', id=0, result=dict(setdetails=dict(setid=1, movies=movies))))
+
+
+def test_movie_set_unique_ids(themerrdb_server):
+    """Test the collection of a movie set is read from the ThemerrDB items of its movies"""
+    with patch('xbmc.executeJSONRPC', return_value=movie_set(None, '10001', '4')) as execute:
+        assert library.movie_set_unique_ids(set_id=1) == dict(tmdb='2')
+    assert json.loads(execute.call_args[0][0])['params'] == dict(setid=1, movies=dict(properties=['uniqueid']))
+    assert themerrdb_server.requests == 2  # 10001 is not in the stand-in
+
+    with patch('xbmc.executeJSONRPC', return_value=movie_set('10001', '10002', '10003', '1')):
+        assert library.movie_set_unique_ids(set_id=1) == {}
+    assert themerrdb_server.requests == 2 + library.movie_set_samples
+
+
+def test_movie_set_unique_ids_rate_limit(themerrdb_server):
+    """Test each ThemerrDB request takes a rate limit token, and the collection is skipped without one"""
+    with patch('xbmc.executeJSONRPC', return_value=movie_set('10001', '10002', '1')), \
+            patch.object(library.ratelimit.themerrdb, 'acquire', return_value=True) as acquire:
+        assert library.movie_set_unique_ids(set_id=1) == dict(tmdb='1')
+    assert acquire.call_count == themerrdb_server.requests == 3
+
+    with patch('xbmc.executeJSONRPC', return_value=movie_set('1')), \
+            patch.object(library.ratelimit.themerrdb, 'acquire', return_value=False):
+        assert library.movie_set_unique_ids(set_id=1) is None
+    assert themerrdb_server.requests == 3
+
+
+def test_movie_set_unique_ids_library(themerrdb_server, kodi_library):
+    """Test the movie sets of the library stand-in resolve to the collections of the ThemerrDB stand-in"""
+    assert library.movie_sets.resolve(dbids=[1, 2]) == {1: dict(tmdb='1'), 2: dict(tmdb='2')}
+
+
+def test_movie_set_unique_ids_error(themerrdb_server):
+    """Test failed calls and requests have no unique ids, so they are retried"""
+    with patch('xbmc.executeJSONRPC', return_value='{}'):
+        assert library.movie_set_unique_ids(set_id=1) is None
+
+    themerrdb_server.error_rate = 1
+    with patch('xbmc.executeJSONRPC', return_value=movie_set('1')):
+        assert library.movie_set_unique_ids(set_id=1) is None
+    assert not library.circuit.themerrdb.healthy()
+
+
+def test_resolver_cache():
+    """Test items are fetched once, and evicted least recently used first"""
+    calls = []
+
+    def fetch(dbids):
+        calls.append(dbids)
+        return {dbid: dict(tmdb=str(dbid)) for dbid in dbids}
+
+    resolver = library.Resolver(kind='test', fetch=fetch, max_size=3)
+    hits = library.resolutions.get(labels=dict(kind='test', result='hit'))
+
+    assert resolver.unique_ids(dbid=1) == dict(tmdb='1')
+    assert resolver.unique_ids(dbid=1) == dict(tmdb='1')
+    assert calls == [[1]]
+    assert library.resolutions.get(labels=dict(kind='test', result='hit')) == hits + 1
+
+    assert resolver.resolve(dbids=[1, 2, 3, 2]) == {dbid: dict(tmdb=str(dbid)) for dbid in (1, 2, 3)}
+    assert calls == [[1], [2, 3]]  # fetched together
+
+    resolver.unique_ids(dbid=4)  # evicts 1
+    resolver.resolve(dbids=[1, 2])
+    assert calls == [[1], [2, 3], [4], [1]]
+
+    assert resolver.forget(dbid=2) == dict(tmdb='2')
+    assert resolver.forget(dbid=2) is None
+    resolver.unique_ids(dbid=2)
+    resolver.clear()
+    resolver.unique_ids(dbid=1)
+    assert calls == [[1], [2, 3], [4], [1], [2], [1]]
+
+
+def test_resolver_update():
+    """Test items cached from a listing are not fetched"""
+    resolver = library.Resolver(kind='test', fetch=lambda dbids: {})
+    resolver.update(items={1: dict(tmdb='1')})
+    assert resolver.unique_ids(dbid=1) == dict(tmdb='1')
+
+
+def test_resolver_error():
+    """Test failed fetches are not cached, and only retried after a while"""
+    now = [0.0]
+    results = [{1: None, 2: dict(tmdb='2')}, {1: dict(tmdb='1')}]
+    resolver = library.Resolver(kind='test', fetch=lambda dbids: results.pop(0), retry_after=30, clock=lambda: now[0])
+    retries = library.resolutions.get(labels=dict(kind='test', result='retry_later'))
+
+    assert resolver.resolve(dbids=[1, 2]) == {1: {}, 2: dict(tmdb='2')}
+    now[0] = 29.0
+    assert resolver.resolve(dbids=[1, 2]) == {1: {}, 2: dict(tmdb='2')}  # not fetched again
+    assert library.resolutions.get(labels=dict(kind='test', result='retry_later')) == retries + 1
+
+    now[0] = 30.0
+    assert resolver.resolve(dbids=[1, 2]) == {1: dict(tmdb='1'), 2: dict(tmdb='2')}
+    assert results == []
+
+
+def test_resolver_error_forget():
+    """Test a forgotten item is fetched again, even if it failed recently"""
+    results = [{1: None}, {1: dict(tmdb='1')}]
+    resolver = library.Resolver(kind='test', fetch=lambda dbids: results.pop(0))
+
+    assert resolver.unique_ids(dbid=1) == {}
+    resolver.forget(dbid=1)
+    assert resolver.unique_ids(dbid=1) == dict(tmdb='1')
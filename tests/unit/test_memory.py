@@ -0,0 +1,76 @@
+# standard imports
+import tracemalloc
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import memory
+
+leak = []
+
+
+@pytest.fixture(scope='function')
+def tracker():
+    """Return a MemoryTracker in dev mode with a 0 second interval, and stop tracing afterwards"""
+    with patch('src.themerr.settings.settings.dev_mode', return_value=True), \
+            patch('src.themerr.settings.settings.memory_interval', return_value=0), \
+            patch('src.themerr.settings.settings.memory_depth', return_value=2):
+        tracker = memory.MemoryTracker(top=5)
+        yield tracker
+        tracker.stop()
+        leak.clear()
+
+
+def test_format_size():
+    """Test format_size method"""
+    assert memory.format_size(size=2048) == '+2.0 KiB'
+    assert memory.format_size(size=-512) == '-0.5 KiB'
+
+
+def test_check_dev_mode_disabled(tracker):
+    """Test check does not trace memory outside dev mode"""
+    with patch('src.themerr.settings.settings.dev_mode', return_value=False):
+        assert tracker.check() is False
+
+    assert tracker.depth is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_check(mock_xbmc_log, tracker):
+    """Test check logs the growing allocation sites"""
+    assert tracker.check() is False  # baseline
+    assert tracemalloc.is_tracing()
+    assert tracemalloc.get_traceback_limit() == 2
+    assert memory.traced_memory.value() > 0
+
+    leak.extend(bytearray(1024) for _ in range(100))
+
+    assert tracker.check() is True
+    message = mock_xbmc_log.call_args.kwargs['msg']
+    assert 'top growing allocation sites' in message
+    assert 'test_memory.py' in message
+    assert ' <- ' in message  # depth 2 shows the caller
+
+
+def test_check_depth_changed(tracker):
+    """Test check restarts tracing when the depth changes"""
+    tracker.check()
+
+    with patch('src.themerr.settings.settings.memory_depth', return_value=5):
+        assert tracker.check() is False
+
+    assert tracker.depth == 5
+    assert tracemalloc.get_traceback_limit() == 5
+
+
+def test_stop(tracker):
+    """Test stop only stops tracing started by the tracker"""
+    tracker.stop()
+    assert not tracemalloc.is_tracing()
+
+    tracker.check()
+    tracker.stop()
+    assert not tracemalloc.is_tracing()
+    assert tracker.snapshot is None
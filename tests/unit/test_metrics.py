@@ -0,0 +1,167 @@
+# standard imports
+import json
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import metrics
+
+
+@pytest.fixture(scope='function')
+def registry_obj():
+    """Return a new Registry object"""
+    return metrics.Registry()
+
+
+def test_metric():
+    """Test the base Metric object, which has no values to reset"""
+    metric = metrics.Metric(name='my_metric', description='My metric')
+    metric.reset()
+    assert metric.snapshot() == dict(type='untyped', description='My metric')
+
+
+def test_counter():
+    """Test Counter object"""
+    counter = metrics.Counter(name='requests_total', description='Requests')
+    counter.inc()
+    counter.inc(value=2, labels=dict(status='200'))
+    counter.inc(labels=dict(status='404'))
+
+    assert counter.get() == 1
+    assert counter.get(labels=dict(status='200')) == 2
+    assert counter.get(labels=dict(status='500')) == 0
+    assert counter.total() == 4
+
+    snapshot = counter.snapshot()
+    assert snapshot['type'] == 'counter'
+    assert dict(labels=dict(status='200'), value=2) in snapshot['values']
+
+    counter.reset()
+    assert counter.total() == 0
+
+
+def test_gauge():
+    """Test Gauge object"""
+    gauge = metrics.Gauge(name='entries', description='Entries')
+    assert gauge.value() == 0
+
+    gauge.set(value=5)
+    assert gauge.value() == 5
+
+    gauge.function = lambda: 10
+    assert gauge.value() == 10
+    assert gauge.snapshot()['value'] == 10
+
+
+def test_histogram():
+    """Test Histogram object"""
+    histogram = metrics.Histogram(name='latency_seconds', description='Latency')
+    assert histogram.percentile(percent=50) is None
+
+    for value in range(1, 101):
+        histogram.observe(value=value)
+
+    assert histogram.count == 100
+    assert histogram.sum == 5050
+    assert histogram.percentile(percent=50) == 50
+    assert histogram.percentile(percent=90) == 90
+    assert histogram.percentile(percent=99) == 99
+    assert histogram.percentile(percent=100) == 100
+
+    snapshot = histogram.snapshot()
+    assert snapshot['p90'] == 90
+    assert snapshot['max'] == 100
+
+    histogram.reset()
+    assert histogram.count == 0
+    assert not histogram.samples
+
+
+def test_histogram_window():
+    """Test percentiles only use the most recent observations"""
+    histogram = metrics.Histogram(name='latency_seconds', description='Latency', size=10)
+    for value in range(100):
+        histogram.observe(value=value)
+
+    assert histogram.count == 100
+    assert len(histogram.samples) == 10
+    assert histogram.percentile(percent=0) == 90
+
+
+def test_histogram_time():
+    """Test Histogram time context manager"""
+    histogram = metrics.Histogram(name='latency_seconds', description='Latency')
+    with pytest.raises(ValueError):
+        with histogram.time():
+            raise ValueError
+
+    assert histogram.count == 1
+    assert histogram.sum >= 0
+
+
+def test_registry_get_or_create(registry_obj):
+    """Test metrics are shared by name"""
+    counter = registry_obj.counter(name='requests_total')
+    assert registry_obj.counter(name='requests_total') is counter
+
+    with pytest.raises(TypeError):
+        registry_obj.histogram(name='requests_total')
+
+
+def test_registry_snapshot(registry_obj):
+    """Test Registry snapshot, reset and text formatting"""
+    registry_obj.counter(name='requests_total', description='Requests').inc(labels=dict(status='200'))
+    registry_obj.histogram(name='latency_seconds', description='Latency').observe(value=0.5)
+    registry_obj.gauge(name='entries', description='Entries', function=lambda: 3)
+
+    snapshot = registry_obj.snapshot()
+    assert set(snapshot.keys()) == {'requests_total', 'latency_seconds', 'entries'}
+    json.dumps(snapshot)  # must be serializable
+
+    text = metrics.format_snapshot(snapshot=snapshot)
+    assert 'requests_total: Requests' in text
+    assert 'status=200: 1' in text
+    assert 'p50=0.5000' in text
+    assert 'value: 3' in text
+
+    registry_obj.reset()
+    assert registry_obj.counter(name='requests_total').total() == 0
+
+
+def test_publish(registry_obj):
+    """Test publishing and reading the snapshot through the home window"""
+    registry_obj.counter(name='requests_total').inc()
+
+    with patch('xbmcgui.Window', spec=True) as mock_window:
+        registry_obj.publish()
+        name, data = mock_window.return_value.setProperty.call_args.args
+        assert name == metrics.PROPERTY_NAME
+
+        mock_window.return_value.getProperty.return_value = data
+        assert metrics.read_published() == registry_obj.snapshot()
+
+        mock_window.return_value.getProperty.return_value = ''
+        assert metrics.read_published() == {}
+
+
+def test_format_prometheus(registry_obj):
+    """Test format_prometheus method"""
+    registry_obj.counter(name='requests_total', description='Requests').inc(labels=dict(status='a"b'))
+    histogram = registry_obj.histogram(name='latency_seconds', description='Latency')
+    histogram.observe(value=0.5)
+    registry_obj.histogram(name='empty_seconds', description='Empty')
+    registry_obj.gauge(name='entries', description='Entries', function=lambda: 3)
+
+    text = metrics.format_prometheus(snapshot=registry_obj.snapshot())
+    assert text.endswith('\n')
+    assert '# HELP themerr_requests_total Requests' in text
+    assert '# TYPE themerr_requests_total counter' in text
+    assert 'themerr_requests_total{status="a\\"b"} 1.0' in text
+    assert '# TYPE themerr_latency_seconds summary' in text
+    assert 'themerr_latency_seconds{quantile="0.5"} 0.5' in text
+    assert 'themerr_latency_seconds_sum 0.5' in text
+    assert 'themerr_latency_seconds_count 1.0' in text
+    assert 'themerr_empty_seconds{quantile="0.99"} NaN' in text
+    assert 'themerr_entries 3.0' in text
@@ -0,0 +1,117 @@
+# standard imports
+import random
+import time
+from unittest.mock import patch
+
+# lib imports
+import pytest
+import requests
+
+# local imports
+from src.themerr import mirrors
+
+
+@pytest.fixture(scope='function')
+def pool():
+    """Return a pool of the configured ThemerrDB and its mirrors, which always starts on the configured ThemerrDB"""
+    pool = mirrors.MirrorPool(
+        urls=mirrors.themerrdb.urls,
+        default_delay=0.1,
+        min_samples=3,
+    )
+    with patch('random.choices', side_effect=lambda urls, weights: urls[:1]):
+        yield pool
+
+
+def test_single(themerrdb_server, pool):
+    """Test a single ThemerrDB is requested without hedging"""
+    assert pool.order() == [themerrdb_server.url]
+    assert pool.get(path='movies/themoviedb/1.json').status_code == 200
+    assert themerrdb_server.requests == 1
+    assert pool.latency(url=themerrdb_server.url) is not None
+
+
+def test_no_hedge(themerrdb_server, themerrdb_mirror, pool):
+    """Test requests answered within the hedge delay are not hedged"""
+    sent = mirrors.hedges.get(labels=dict(result='sent'))
+
+    assert pool.get(path='movies/themoviedb/1.json').status_code == 200
+    assert themerrdb_mirror.requests == 0
+    assert mirrors.hedges.get(labels=dict(result='sent')) == sent
+
+
+def test_hedge(themerrdb_server, themerrdb_mirror, pool):
+    """Test slow requests are hedged on a mirror, and the first answer is used"""
+    won = mirrors.hedges.get(labels=dict(result='won'))
+    themerrdb_server.latency = 0.5
+
+    start = time.perf_counter()
+    response = pool.get(path='movies/themoviedb/1.json')
+
+    assert time.perf_counter() - start < 0.4
+    assert response.url.startswith(themerrdb_mirror.url)
+    assert themerrdb_mirror.requests == 1
+    assert mirrors.hedges.get(labels=dict(result='won')) == won + 1
+
+
+def test_failover(themerrdb_server, themerrdb_mirror, pool):
+    """Test server errors are retried on a mirror"""
+    failovers = mirrors.failovers.total()
+    themerrdb_server.error_rate = 1
+
+    response = pool.get(path='movies/themoviedb/1.json')
+
+    assert response.status_code == 200
+    assert response.url.startswith(themerrdb_mirror.url)
+    assert mirrors.failovers.total() == failovers + 1
+    assert pool.latency(url=themerrdb_server.url) == pool.failure_penalty
+
+
+def test_not_found(themerrdb_server, themerrdb_mirror, pool):
+    """Test a missing item is a good answer, which is not retried"""
+    assert pool.get(path='movies/themoviedb/10001.json').status_code == 404
+    assert themerrdb_mirror.requests == 0
+
+
+def test_all_failed(themerrdb_server, themerrdb_mirror, pool):
+    """Test the last server error is returned when every mirror fails"""
+    themerrdb_server.error_rate = themerrdb_mirror.error_rate = 1
+    assert pool.get(path='movies/themoviedb/1.json').status_code == 500
+
+
+def test_all_unreachable(pool):
+    """Test the last request error is raised when no mirror answers"""
+    urls = ['http://127.0.0.1:1', 'http://127.0.0.1:2']
+    with patch.object(pool, 'urls', return_value=urls):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            pool.get(path='movies/themoviedb/1.json')
+
+
+def test_hedge_delay(pool):
+    """Test the hedge delay is the 90th percentile of the recent latencies, once there are enough"""
+    url = 'http://mirror'
+    assert pool.hedge_delay(url=url) == pool.default_delay
+
+    for seconds in (0.2, 0.3, 0.4, 0.5):
+        pool._record(url=url, seconds=seconds)
+    assert pool.hedge_delay(url=url) == 0.5
+
+    pool._record(url='http://fast', seconds=0.001)
+    assert pool.hedge_delay(url='http://fast') == pool.default_delay
+
+
+def test_order_latency_weighted():
+    """Test faster mirrors are chosen more often, and mirrors without latencies are measured"""
+    urls = ['http://slow', 'http://fast', 'http://new']
+    pool = mirrors.MirrorPool(urls=lambda: urls)
+    pool._record(url='http://slow', seconds=1.0)
+    pool._record(url='http://fast', seconds=0.1)
+
+    random.seed(0)
+    firsts = [pool.order()[0] for _ in range(1000)]
+
+    assert firsts.count('http://slow') < 100
+    assert firsts.count('http://fast') > 400
+    assert firsts.count('http://new') > 400
+    assert pool.order()[1:] in (['http://fast', 'http://slow'], ['http://new', 'http://slow'],
+                                ['http://fast', 'http://new'], ['http://new', 'http://fast'])
@@ -1,3 +1,6 @@
+# standard imports
+from unittest.mock import MagicMock, call, patch
+
 # lib imports
 import pytest
 
@@ -24,3 +27,59 @@ def test_on_settings_changed(monitor_obj):
     monitor_obj.onSettingsChanged()
 
     assert settings.settings != og_settings
+
+
+def test_on_notification(monitor_obj):
+    """Test that on_notification starts the profiler"""
+    with patch('src.themerr.profiler.profiler.start') as mock_start:
+        monitor_obj.onNotification(sender='other.addon', method='Other.profile', data='null')
+        mock_start.assert_not_called()
+
+        monitor_obj.onNotification(sender='service.themerr', method='Other.profile', data='null')
+        mock_start.assert_called_once()
+
+
+def test_library_notification():
+    """Test library notifications are passed on as changes of movies, TV shows and movie sets"""
+    handler = MagicMock()
+    monitor_obj = monitor.ThemerrMonitor(library_handler=handler)
+
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnUpdate',
+                               data='{"item": {"id": 1, "type": "movie"}, "added": true}')
+    handler.assert_called_once_with([('added', 'movie', 1)])
+
+    handler.reset_mock()
+    ignored = [
+        ('xbmc', 'VideoLibrary.OnUpdate', '{"item": {"id": 1, "type": "movie"}, "playcount": 1}'),
+        ('xbmc', 'VideoLibrary.OnUpdate', '{"item": {"id": 1, "type": "episode"}, "added": true}'),
+        ('xbmc', 'VideoLibrary.OnUpdate', 'not json'),
+        ('xbmc', 'VideoLibrary.OnUpdate', 'null'),
+        ('other.addon', 'VideoLibrary.OnRemove', '{"id": 1, "type": "movie"}'),
+    ]
+    for sender, method, data in ignored:
+        monitor_obj.onNotification(sender=sender, method=method, data=data)
+    handler.assert_not_called()
+
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnUpdate', data='{"item": {"id": 2, "type": "set"}}')
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnRemove', data='{"id": 3, "type": "tvshow"}')
+    assert handler.call_args_list == [call([('updated', 'set', 2)]), call([('removed', 'tvshow', 3)])]
+
+
+def test_library_notification_scan():
+    """Test changes during a library scan are passed on together when it finishes"""
+    handler = MagicMock()
+    monitor_obj = monitor.ThemerrMonitor(library_handler=handler)
+
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnScanStarted', data='null')
+    for number in range(1, 4):
+        monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnUpdate',
+                                   data=f'{{"item": {{"id": {number}, "type": "movie"}}, "added": true}}')
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnUpdate',
+                               data='{"item": {"id": 1, "type": "movie"}}')
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnRemove', data='{"id": 2, "type": "movie"}')
+    handler.assert_not_called()
+    assert monitor_obj.scanning
+
+    monitor_obj.onNotification(sender='xbmc', method='VideoLibrary.OnScanFinished', data='null')
+    handler.assert_called_once_with([('added', 'movie', 1), ('removed', 'movie', 2), ('added', 'movie', 3)])
+    assert not monitor_obj.scanning
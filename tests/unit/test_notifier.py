@@ -1,4 +1,5 @@
 # kodi imports
+import xbmc
 import xbmcgui
 
 # lib imports
@@ -52,3 +53,94 @@ def test_notify(mock_xbmcgui_dialog, notifier_obj, heading, icon, time, sound):
         time=time,
         sound=sound,
     )
+
+
+def test_notify_rate_limited(mock_xbmcgui_dialog):
+    """Test notify method holds back messages once the rate limit is exceeded"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGINFO: (0, 1)})
+
+    notifier_obj.notify(message='first', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='second', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='third', level=xbmc.LOGINFO)
+
+    assert mock_xbmcgui_dialog.notification.call_count == 1
+    assert list(notifier_obj.pending[xbmc.LOGINFO]) == ['second', 'third']
+    assert notifier_obj.suppressed[xbmc.LOGINFO] == 2
+
+
+def test_notify_coalesce(mock_xbmcgui_dialog):
+    """Test held back messages are merged into the next allowed notification"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGINFO: (0, 1)})
+
+    notifier_obj.notify(message='first', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='second', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='third', level=xbmc.LOGINFO)
+
+    # refill the bucket
+    notifier_obj.buckets[xbmc.LOGINFO].tokens = 1
+    notifier_obj.notify(message='fourth', level=xbmc.LOGINFO)
+
+    assert mock_xbmcgui_dialog.notification.call_count == 2
+    kwargs = mock_xbmcgui_dialog.notification.call_args.kwargs
+    assert kwargs['heading'] == f'{notifier_obj.heading} (+2 more)'
+    assert kwargs['message'] == 'second\nthird\nfourth'
+    assert not notifier_obj.pending[xbmc.LOGINFO]
+    assert notifier_obj.suppressed[xbmc.LOGINFO] == 0
+
+
+def test_notify_errors_not_rate_limited(mock_xbmcgui_dialog):
+    """Test error notifications are never rate limited"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGINFO: (0, 1)})
+
+    for _ in range(10):
+        notifier_obj.notify(message='error', icon=xbmcgui.NOTIFICATION_ERROR, level=xbmc.LOGERROR)
+
+    assert mock_xbmcgui_dialog.notification.call_count == 10
+
+
+def test_flush(mock_xbmcgui_dialog):
+    """Test flush method shows a summary of held back messages"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGINFO: (0, 1)})
+
+    notifier_obj.notify(message='first', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='second', level=xbmc.LOGINFO)
+    notifier_obj.notify(message='third', level=xbmc.LOGINFO)
+
+    # bucket is empty, nothing should be shown
+    notifier_obj.flush()
+    assert mock_xbmcgui_dialog.notification.call_count == 1
+
+    notifier_obj.buckets[xbmc.LOGINFO].tokens = 1
+    notifier_obj.flush()
+
+    assert mock_xbmcgui_dialog.notification.call_count == 2
+    kwargs = mock_xbmcgui_dialog.notification.call_args.kwargs
+    assert kwargs['heading'] == f'{notifier_obj.heading} (+1 more)'
+    assert kwargs['message'] == 'second\nthird'
+    assert not notifier_obj.pending[xbmc.LOGINFO]
+
+
+def test_rate_limited_per_level(mock_xbmcgui_dialog):
+    """Test debug and info messages are rate limited separately, although they share an icon"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGDEBUG: (0, 1), xbmc.LOGINFO: (0, 1)})
+
+    notifier_obj.notify(message='debug', icon=xbmcgui.NOTIFICATION_INFO, level=xbmc.LOGDEBUG)
+    notifier_obj.notify(message='info', icon=xbmcgui.NOTIFICATION_INFO, level=xbmc.LOGINFO)
+    notifier_obj.notify(message='held back', icon=xbmcgui.NOTIFICATION_INFO, level=xbmc.LOGDEBUG)
+
+    assert mock_xbmcgui_dialog.notification.call_count == 2
+    assert list(notifier_obj.pending[xbmc.LOGDEBUG]) == ['held back']
+    assert not notifier_obj.pending[xbmc.LOGINFO]
+
+
+def test_flush_icon(mock_xbmcgui_dialog):
+    """Test flush method shows the summary with the icon of the held back messages"""
+    notifier_obj = notifier.Notifier(rate_limits={xbmc.LOGWARNING: (0, 1)})
+
+    notifier_obj.notify(message='first', icon=xbmcgui.NOTIFICATION_WARNING, level=xbmc.LOGWARNING)
+    notifier_obj.notify(message='second', icon=xbmcgui.NOTIFICATION_WARNING, level=xbmc.LOGWARNING)
+
+    notifier_obj.buckets[xbmc.LOGWARNING].tokens = 1
+    notifier_obj.flush()
+
+    assert mock_xbmcgui_dialog.notification.call_args.kwargs['icon'] == xbmcgui.NOTIFICATION_WARNING
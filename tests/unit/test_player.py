@@ -6,6 +6,7 @@ import pytest
 
 # local imports
 from src.themerr import player
+from src.themerr import tracing
 
 
 @pytest.fixture(scope='function')
@@ -88,3 +89,16 @@ def test_reset(player_obj):
     assert not player_obj.theme_is_playing_for
     assert not player_obj.theme_playing_kodi_id
     assert not player_obj.theme_playing_url
+
+
+def test_on_av_started(player_obj):
+    """Test onAVStarted marks the trace of the playing theme"""
+    trace = tracing.tracer.start(kodi_id='tmdb_1')
+
+    player_obj.onAVStarted()  # no theme is playing
+    assert 'av_started' not in trace.marks
+
+    player_obj.theme_is_playing = True
+    player_obj.theme_playing_kodi_id = 'tmdb_1'
+    player_obj.onAVStarted()
+    assert 'av_started' in trace.marks
@@ -48,3 +48,35 @@ def test_terminate(plugin_obj):
 
     with pytest.raises(AttributeError):
         _ = plugin_obj.monitor
+
+
+def test_start_status_server(plugin_obj):
+    """Test plugin start_status_server method"""
+    plugin_obj.start_status_server()
+    assert plugin_obj.status_server
+    assert plugin_obj.threads[-1].name == 'ThemerrStatusServer'
+    assert plugin_obj.threads[-1].is_alive()
+
+    plugin_obj.terminate()
+    assert not plugin_obj.threads[-1].is_alive()
+
+
+def test_start_flushes_notifications(monkeypatch, plugin_obj):
+    """Test plugin start method shows held back notifications while waiting"""
+    flush = MagicMock()
+    monkeypatch.setattr(plugin_obj.log.notifier, 'flush', flush)
+    # the threads of the window share the monitor, so stop every thread once the notifications were flushed
+    plugin_obj.monitor.waitForAbort = MagicMock(side_effect=lambda timeout=None: flush.called)
+
+    plugin_obj.start()
+
+    plugin_obj.log.notifier.flush.assert_called_once_with()
+
+
+def test_start_shares_monitor(plugin_obj):
+    """Test plugin start method gives its monitor to the window, so notifications are only handled once"""
+    service_monitor = plugin_obj.monitor
+    plugin_obj.start()
+
+    assert plugin_obj.gui.monitor is service_monitor
+    assert service_monitor.library_handler == plugin_obj.gui.library_changed
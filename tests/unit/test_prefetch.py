@@ -0,0 +1,66 @@
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import prefetch
+
+
+@pytest.fixture(scope='function')
+def prefetcher_obj():
+    return prefetch.Prefetcher()
+
+
+def test_offsets_no_movement(prefetcher_obj):
+    """Test both sides are prefetched before any movement"""
+    assert prefetcher_obj.offsets(max_lookahead=3) == [1, -1]
+    assert prefetcher_obj.offsets(max_lookahead=1) == [1]
+    assert prefetcher_obj.offsets(max_lookahead=0) == []
+
+
+def test_offsets_follow_direction(prefetcher_obj):
+    """Test the items ahead of the movement are prefetched, further ahead when faster"""
+    for position, at in ((10, 0.0), (11, 0.5), (12, 1.0)):
+        prefetcher_obj.moved(position=position, at=at)
+    assert prefetcher_obj.velocity == pytest.approx(2.0)
+    assert prefetcher_obj.offsets(max_lookahead=5) == [1, 2]
+
+    for position, at in ((11, 1.1), (10, 1.2)):
+        prefetcher_obj.moved(position=position, at=at)
+    assert prefetcher_obj.velocity == pytest.approx(-10.0)
+    assert prefetcher_obj.offsets(max_lookahead=5) == [-1, -2, -3, -4, -5]
+
+
+def test_offsets_slow_movement(prefetcher_obj):
+    """Test slow movement still prefetches the next item"""
+    prefetcher_obj.moved(position=1, at=0.0)
+    prefetcher_obj.moved(position=2, at=10.0)
+    assert prefetcher_obj.offsets(max_lookahead=3) == [1]
+
+
+def test_moved_unknown_position(prefetcher_obj):
+    """Test an unknown position resets the velocity"""
+    prefetcher_obj.moved(position=1, at=0.0)
+    prefetcher_obj.moved(position=2, at=0.5)
+    prefetcher_obj.moved(position=0, at=1.0)
+    assert prefetcher_obj.velocity == 0.0
+
+    prefetcher_obj.moved(position=5, at=1.5)
+    assert prefetcher_obj.velocity == 0.0
+
+
+def test_hit_rate():
+    """Test selected prefetched items count as hits once"""
+    prefetcher_obj = prefetch.Prefetcher(history=2)
+    items = prefetch.prefetched_items.total()
+    hits = prefetch.prefetch_hits.total()
+
+    for kodi_id in ('tmdb_1', 'tmdb_2', 'tmdb_3'):
+        prefetcher_obj.prefetched(kodi_id=kodi_id)
+
+    assert not prefetcher_obj.selected(kodi_id='tmdb_1')  # forgotten
+    assert prefetcher_obj.selected(kodi_id='tmdb_3')
+    assert not prefetcher_obj.selected(kodi_id='tmdb_3')
+    assert not prefetcher_obj.selected(kodi_id=None)
+
+    assert prefetch.prefetched_items.total() == items + 3
+    assert prefetch.prefetch_hits.total() == hits + 1
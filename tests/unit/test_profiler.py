@@ -0,0 +1,193 @@
+# standard imports
+import os
+import pstats
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import profiler
+
+
+def wait_for_abort(timeout: float) -> bool:
+    time.sleep(timeout)
+    return False
+
+
+@pytest.fixture(scope='function')
+def profiler_obj():
+    """Return a Profiler object with a monitor which does not abort"""
+    monitor = MagicMock()
+    monitor.waitForAbort.side_effect = wait_for_abort
+    return profiler.Profiler(interval=0.005, monitor=monitor)
+
+
+def busy_loop(profiler_obj, stop: threading.Event):
+    """Do some work inside the profiler, until stopped"""
+    while not stop.is_set():
+        with profiler_obj.profile():
+            sum(range(1000))
+            time.sleep(0.001)
+
+
+def run_profile(profiler_obj, mode: str, directory: str) -> str:
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(profiler_obj, stop))
+    worker.start()
+
+    assert profiler_obj.start(mode=mode, duration=0.2, directory=directory)
+    assert profiler_obj.running()
+    profiler_obj.thread.join()
+    stop.set()
+    worker.join()
+
+    assert not profiler_obj.running()
+    files = os.listdir(directory)
+    assert len(files) == 1
+    return os.path.join(directory, files[0])
+
+
+def test_collapse_stack():
+    """Test collapse_stack orders frames from outermost to innermost"""
+    stack = profiler.collapse_stack(frame=sys._getframe())
+    assert stack.endswith(';test_profiler.py:test_collapse_stack')
+
+
+def test_profile_not_running(profiler_obj):
+    """Test profile does nothing when no run is in progress"""
+    with profiler_obj.profile():
+        pass
+
+    assert not profiler_obj.running()
+
+
+def test_start_unknown_mode(profiler_obj, tmp_path):
+    """Test start rejects unknown modes"""
+    assert profiler_obj.start(mode='unknown', duration=1, directory=str(tmp_path)) is False
+
+
+def test_cprofile(profiler_obj, tmp_path):
+    """Test a cprofile run writes a pstats file"""
+    path = run_profile(profiler_obj=profiler_obj, mode='cprofile', directory=str(tmp_path))
+
+    assert path.endswith('.pstats')
+    stats = pstats.Stats(path)
+    assert any(function == 'busy_loop' or function == '<built-in method builtins.sum>'
+               for _, _, function in stats.stats)
+
+
+def test_sampling(profiler_obj, tmp_path):
+    """Test a sampling run writes a collapsed stack file"""
+    path = run_profile(profiler_obj=profiler_obj, mode='sampling', directory=str(tmp_path))
+
+    assert path.endswith('.collapsed')
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert 'test_profiler.py:busy_loop' in stack
+    assert int(count) > 0
+
+
+def test_start_already_running(profiler_obj, tmp_path):
+    """Test start does not start a second run"""
+    assert profiler_obj.start(mode='sampling', duration=0.1, directory=str(tmp_path))
+    assert profiler_obj.start(mode='sampling', duration=0.1, directory=str(tmp_path)) is False
+    profiler_obj.thread.join()
+
+
+def test_write_error(profiler_obj, mock_xbmc_log, tmp_path):
+    """Test errors writing the output are logged"""
+    with patch('os.makedirs', side_effect=OSError('read only')):
+        assert profiler_obj.start(mode='sampling', duration=0.01, directory=str(tmp_path))
+        profiler_obj.thread.join()
+
+    assert 'Unable to write profile' in mock_xbmc_log.call_args.kwargs['msg']
+
+
+def lookup_loop(profiler_obj, stop: threading.Event):
+    """Do some other work inside the profiler, nested like a lookup run by a window watcher tick, until stopped"""
+    while not stop.is_set():
+        with profiler_obj.profile(), profiler_obj.profile():
+            sorted(range(1000), reverse=True)
+            time.sleep(0.001)
+
+
+def test_cprofile_threads(profiler_obj, tmp_path):
+    """Test a cprofile run records every profiled thread"""
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy_loop, args=(profiler_obj, stop)),
+               threading.Thread(target=lookup_loop, args=(profiler_obj, stop))]
+    for worker in workers:
+        worker.start()
+
+    assert profiler_obj.start(mode='cprofile', duration=0.2, directory=str(tmp_path))
+    profiler_obj.thread.join()
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    stats = pstats.Stats(os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0]))
+    functions = {function for _, _, function in stats.stats}
+    assert '<built-in method builtins.sum>' in functions
+    assert '<built-in method builtins.sorted>' in functions
+
+
+def test_cprofile_nothing_profiled(profiler_obj, mock_xbmc_log, tmp_path):
+    """Test a cprofile run without profiled code writes no profile, as pstats cannot load it"""
+    assert profiler_obj.start(mode='cprofile', duration=0.01, directory=str(tmp_path))
+    profiler_obj.thread.join()
+
+    assert not os.listdir(str(tmp_path))
+    assert 'Nothing was profiled' in mock_xbmc_log.call_args.kwargs['msg']
+
+
+def wait_for_session(profiler_obj) -> profiler._Session:
+    while profiler_obj._session is None:
+        time.sleep(0.001)
+    return profiler_obj._session
+
+
+def test_cprofile_enable_error(profiler_obj, tmp_path):
+    """Test a thread whose profile cannot be enabled, as another profiler is active, is sampled instead"""
+    with patch.object(profiler.cProfile, 'Profile') as profile_class:
+        profile_class.return_value.enable.side_effect = ValueError('Another profiling tool is already active')
+        profile_class.return_value.stats = {}
+        assert profiler_obj.start(mode='cprofile', duration=0.2, directory=str(tmp_path))
+        session = wait_for_session(profiler_obj=profiler_obj)
+
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(profiler_obj, stop))
+        worker.start()
+        profiler_obj.thread.join()
+        stop.set()
+        worker.join()
+
+    assert not session.active
+    assert session.sampled == {worker.ident}
+    assert profile_class.return_value.enable.call_count == 1  # the thread is sampled for the rest of the run
+
+    files = os.listdir(str(tmp_path))
+    assert len(files) == 1 and files[0].endswith('.collapsed')
+    with open(os.path.join(str(tmp_path), files[0])) as f:
+        assert 'test_profiler.py:busy_loop' in f.read()
+
+
+def test_cprofile_enable_unexpected_error(profiler_obj, tmp_path):
+    """Test a profile failing to enable for another reason raises, without leaving the thread active"""
+    with patch.object(profiler.cProfile, 'Profile') as profile_class:
+        profile_class.return_value.enable.side_effect = RuntimeError('enable failed')
+        profile_class.return_value.stats = {}
+        assert profiler_obj.start(mode='cprofile', duration=0.05, directory=str(tmp_path))
+        session = wait_for_session(profiler_obj=profiler_obj)
+
+        with pytest.raises(RuntimeError):
+            with profiler_obj.profile():
+                pass
+        assert not session.active
+
+        profiler_obj.thread.join()
@@ -0,0 +1,161 @@
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import ratelimit
+
+
+class FakeClock:
+    """A clock which only moves when told to"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='function')
+def clock():
+    """Return a fake clock"""
+    return FakeClock()
+
+
+def test_token_bucket_init(clock):
+    """Test the bucket starts full"""
+    bucket = ratelimit.TokenBucket(rate=1, capacity=3, clock=clock)
+    assert bucket.tokens == 3
+    assert bucket.updated_at == 0.0
+
+
+def test_consume(clock):
+    """Test consume method"""
+    bucket = ratelimit.TokenBucket(rate=1, capacity=2, clock=clock)
+    assert bucket.consume() is True
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+
+    clock.now = 1.0
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+
+
+def test_consume_capacity(clock):
+    """Test the bucket never holds more than its capacity"""
+    bucket = ratelimit.TokenBucket(rate=10, capacity=2, clock=clock)
+    clock.now = 100.0
+    assert bucket.consume(tokens=2) is True
+    assert bucket.consume() is False
+
+
+def test_wait_time(clock):
+    """Test wait_time method"""
+    bucket = ratelimit.TokenBucket(rate=2, capacity=1, clock=clock)
+    assert bucket.wait_time() == 0.0
+
+    bucket.consume()
+    assert bucket.wait_time() == pytest.approx(0.5)
+
+    clock.now = 0.25
+    assert bucket.wait_time() == pytest.approx(0.25)
+
+
+def test_wait_time_no_rate(clock):
+    """Test wait_time method when the bucket never refills"""
+    bucket = ratelimit.TokenBucket(rate=0, capacity=1, clock=clock)
+    bucket.consume()
+    assert bucket.wait_time() == float('inf')
+
+
+def test_consume_reserve(clock):
+    """Test consume leaves the reserve in the bucket"""
+    bucket = ratelimit.TokenBucket(rate=1, capacity=3, clock=clock)
+    assert bucket.consume(reserve=1) is True
+    assert bucket.consume(reserve=1) is True
+    assert bucket.consume(reserve=1) is False
+    assert bucket.wait_time(reserve=1) == pytest.approx(1.0)
+    assert bucket.consume() is True
+
+
+def test_refill_clock_behind(clock):
+    """Test the bucket is not drained when the clock reads an earlier time"""
+    bucket = ratelimit.TokenBucket(rate=1, capacity=2, clock=clock)
+    clock.now = 1.0
+    bucket.consume(tokens=2)
+    clock.now = 0.5
+    assert bucket.tokens == 0
+    assert bucket.consume() is False
+    clock.now = 2.0
+    assert bucket.consume() is True
+
+
+@pytest.fixture(scope='function')
+def limiter(clock):
+    """Return a limiter of 60 requests per minute, with a burst of 2 and 1 token reserved, on the fake clock"""
+    def sleep(seconds):
+        clock.now += seconds
+
+    return ratelimit.RateLimiter(name='test', rate=lambda: 60, capacity=2, reserve=1, clock=clock, sleep=sleep)
+
+
+def test_limiter_no_limit(clock):
+    """Test requests are never limited when the rate is 0"""
+    limiter = ratelimit.RateLimiter(name='test', rate=lambda: 0, capacity=1, reserve=1, clock=clock)
+    assert all(limiter.acquire(interactive=False) for _ in range(10))
+
+
+def test_limiter_interactive_waits(limiter, clock):
+    """Test interactive requests wait for a token, and the wait is recorded"""
+    count = limiter.wait.count
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert clock.now == 0.0
+
+    assert limiter.acquire()
+    assert clock.now == pytest.approx(1.0)
+    assert limiter.wait.count == count + 3
+    assert max(limiter.wait.samples) == pytest.approx(1.0)
+
+
+def test_limiter_interactive_timeout(clock):
+    """Test interactive requests are skipped after the maximum wait"""
+    def sleep(seconds):
+        clock.now += seconds
+
+    limiter = ratelimit.RateLimiter(name='test', rate=lambda: 6, capacity=1, reserve=0, max_wait=5.0, clock=clock,
+                                    sleep=sleep)
+    skipped = ratelimit.rate_limited.get(labels=dict(endpoint='test', priority='interactive'))
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    assert clock.now == pytest.approx(5.0)
+    assert ratelimit.rate_limited.get(labels=dict(endpoint='test', priority='interactive')) == skipped + 1
+
+
+def test_limiter_background_reserve(limiter):
+    """Test background requests never wait, and leave the reserve to interactive requests"""
+    skipped = ratelimit.rate_limited.get(labels=dict(endpoint='test', priority='background'))
+    assert limiter.acquire(interactive=False)
+    assert not limiter.acquire(interactive=False)
+    assert ratelimit.rate_limited.get(labels=dict(endpoint='test', priority='background')) == skipped + 1
+    assert limiter.acquire()
+
+
+def test_limiter_background_yields(limiter, clock):
+    """Test background requests are skipped while an interactive request waits"""
+    background = []
+
+    def sleep(seconds):
+        background.append(limiter.acquire(interactive=False))
+        clock.now += seconds
+
+    limiter.sleep = sleep
+    limiter.bucket.consume(tokens=2)
+    assert limiter.acquire()
+    assert background == [False]
+
+
+def test_limiter_reset(limiter):
+    """Test reset refills the bucket"""
+    limiter.acquire()
+    limiter.acquire()
+    limiter.reset()
+    assert limiter.bucket.tokens == 2
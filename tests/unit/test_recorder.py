@@ -0,0 +1,102 @@
+# standard imports
+import os
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import recorder
+
+
+@pytest.fixture(scope='function')
+def recorder_obj(tmp_path):
+    """Return a NavigationRecorder writing to a temporary directory, with a fixed clock"""
+    recorder_obj = recorder.NavigationRecorder(directory=str(tmp_path), clock=lambda: 1700000000.0)
+    yield recorder_obj
+    recorder_obj.close()
+
+
+def test_event_format_parse():
+    """Test events can be parsed from their formatted line"""
+    event = recorder.Event(at=1700000000.123, container='movies', index=3, id_hash='0123456789ab')
+    assert recorder.Event.parse(event.format() + '\n') == event
+
+
+def test_record(recorder_obj, tmp_path):
+    """Test focus changes are recorded with anonymized ids"""
+    recorder_obj.record(container='movies', index=3, kodi_id='tmdb_1')
+    recorder_obj.record(container='home', index=0, kodi_id=None)
+    recorder_obj.close()
+
+    with open(os.path.join(tmp_path, recorder.FILE_NAME)) as f:
+        content = f.read()
+    assert 'tmdb_1' not in content
+
+    events = recorder.read_recording(directory=str(tmp_path))
+    assert events == [
+        recorder.Event(at=1700000000.0, container='movies', index=3, id_hash=events[0].id_hash),
+        recorder.Event(at=1700000000.0, container='home', index=0, id_hash=''),
+    ]
+    assert len(events[0].id_hash) == 12
+
+
+def test_hash_is_stable(recorder_obj, tmp_path):
+    """Test the salt is kept, so an item has the same hash across sessions"""
+    recorder_obj.record(container='movies', index=1, kodi_id='tmdb_1')
+    recorder_obj.close()
+
+    other = recorder.NavigationRecorder(directory=str(tmp_path))
+    other.record(container='movies', index=1, kodi_id='tmdb_1')
+    other.close()
+
+    first, second = recorder.read_recording(directory=str(tmp_path))
+    assert first.id_hash == second.id_hash
+    assert recorder_obj.hash_id(kodi_id='tmdb_2') != first.id_hash
+
+
+def test_rotation(tmp_path):
+    """Test the file is rotated, and rotated files are read oldest first"""
+    recorder_obj = recorder.NavigationRecorder(directory=str(tmp_path), max_bytes=200, backups=2)
+    for index in range(20):
+        recorder_obj.record(container='movies', index=index, kodi_id=f'tmdb_{index}')
+    recorder_obj.close()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        recorder.SALT_FILE_NAME,
+        recorder.FILE_NAME,
+        f'{recorder.FILE_NAME}.1',
+        f'{recorder.FILE_NAME}.2',
+    ]
+    indexes = [event.index for event in recorder.read_recording(directory=str(tmp_path))]
+    assert indexes == sorted(indexes)
+    assert indexes[-1] == 19
+    assert len(indexes) < 20  # the oldest events were rotated out
+
+
+def test_record_error(mock_xbmc_log, recorder_obj):
+    """Test errors are logged once, and recording stops until closed"""
+    with patch('os.makedirs', side_effect=OSError('read only')):
+        recorder_obj.record(container='movies', index=1, kodi_id='tmdb_1')
+        recorder_obj.record(container='movies', index=2, kodi_id='tmdb_2')
+
+    assert mock_xbmc_log.call_count == 1
+    assert 'Unable to record navigation' in mock_xbmc_log.call_args.kwargs['msg']
+
+    recorder_obj.close()
+    recorder_obj.record(container='movies', index=3, kodi_id='tmdb_3')
+    assert len(recorder.read_recording(directory=recorder_obj.directory)) == 1
+
+
+def test_record_write_error(mock_xbmc_log, recorder_obj):
+    """Test errors writing an event, which the logging handler would only print, stop recording"""
+    recorder_obj.record(container='movies', index=1, kodi_id='tmdb_1')
+
+    with patch.object(recorder_obj._handler, 'shouldRollover', return_value=False), \
+            patch.object(recorder_obj._handler.stream, 'write', side_effect=OSError('no space left on device')):
+        recorder_obj.record(container='movies', index=2, kodi_id='tmdb_2')
+    recorder_obj.record(container='movies', index=3, kodi_id='tmdb_3')
+
+    assert 'no space left on device' in mock_xbmc_log.call_args.kwargs['msg']
+    assert recorder_obj._failed
+    assert len(recorder.read_recording(directory=recorder_obj.directory)) == 1
@@ -0,0 +1,141 @@
+# standard imports
+import threading
+from unittest.mock import MagicMock
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import scheduler
+
+
+@pytest.fixture(scope='function')
+def calls():
+    return []
+
+
+@pytest.fixture(scope='function')
+def scheduler_obj(calls):
+    """Return a LookupScheduler which records its lookups, with room for 3 lookups"""
+    return scheduler.LookupScheduler(handler=lambda kodi_id, db_type, lane: calls.append(kodi_id), max_size=3)
+
+
+def run_all(scheduler_obj):
+    while scheduler_obj.run_next():
+        pass
+
+
+def test_priority(scheduler_obj, calls):
+    """Test lookups run by lane, then oldest first"""
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.WARMUP)
+    scheduler_obj.submit(kodi_id='tmdb_2', db_type='movies', lane=scheduler.NEIGHBOR)
+    scheduler_obj.submit(kodi_id='tmdb_3', db_type='movies', lane=scheduler.NEIGHBOR)
+    run_all(scheduler_obj)
+    assert calls == ['tmdb_2', 'tmdb_3', 'tmdb_1']
+
+    scheduler_obj.submit(kodi_id='tmdb_4', db_type='movies', lane=scheduler.WARMUP)
+    scheduler_obj.submit(kodi_id='tmdb_5', db_type='movies', lane=scheduler.FOCUSED)
+    run_all(scheduler_obj)
+    assert calls[3:] == ['tmdb_5', 'tmdb_4']
+
+
+def test_submit_deduplicates(scheduler_obj, calls):
+    """Test a lookup is queued once, and moved to a higher priority lane"""
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.WARMUP)
+    scheduler_obj.submit(kodi_id='tmdb_2', db_type='movies', lane=scheduler.NEIGHBOR)
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.FOCUSED)
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.WARMUP)
+    assert scheduler_obj.size() == 2
+    assert scheduler_obj.pending(kodi_id='tmdb_1')
+
+    run_all(scheduler_obj)
+    assert calls == ['tmdb_1', 'tmdb_2']
+    assert not scheduler_obj.pending(kodi_id='tmdb_1')
+
+
+def test_submit_running(calls):
+    """Test a running lookup is not queued again"""
+    def handler(kodi_id, db_type, lane):
+        calls.append(kodi_id)
+        assert scheduler_obj.pending(kodi_id=kodi_id)
+        assert scheduler_obj.submit(kodi_id=kodi_id, db_type=db_type)
+
+    scheduler_obj = scheduler.LookupScheduler(handler=handler)
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies')
+    run_all(scheduler_obj)
+    assert calls == ['tmdb_1']
+
+
+def test_focus(scheduler_obj, calls):
+    """Test stale focused lookups are cancelled, and neighbor lookups are demoted"""
+    cancelled = scheduler.tasks.get(labels=dict(lane='focused', result='cancelled'))
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.FOCUSED)
+    scheduler_obj.submit(kodi_id='tmdb_2', db_type='movies', lane=scheduler.NEIGHBOR)
+
+    scheduler_obj.focus(kodi_id='tmdb_3')
+    scheduler_obj.submit(kodi_id='tmdb_3', db_type='movies', lane=scheduler.FOCUSED)
+    scheduler_obj.submit(kodi_id='tmdb_4', db_type='movies', lane=scheduler.NEIGHBOR)
+    run_all(scheduler_obj)
+
+    assert calls == ['tmdb_3', 'tmdb_4', 'tmdb_2']
+    assert scheduler.tasks.get(labels=dict(lane='focused', result='cancelled')) == cancelled + 1
+
+
+def test_focus_keeps_current(scheduler_obj, calls):
+    """Test the queued lookup of the focused item is kept"""
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies', lane=scheduler.FOCUSED)
+    scheduler_obj.focus(kodi_id='tmdb_1')
+    run_all(scheduler_obj)
+    assert calls == ['tmdb_1']
+
+
+def test_bounded(scheduler_obj, calls):
+    """Test a full queue evicts lower priority lookups, or rejects the lookup"""
+    for number in range(1, 4):
+        assert scheduler_obj.submit(kodi_id=f'tmdb_{number}', db_type='movies', lane=scheduler.WARMUP)
+    assert not scheduler_obj.accepting(lane=scheduler.WARMUP)
+    assert not scheduler_obj.submit(kodi_id='tmdb_4', db_type='movies', lane=scheduler.WARMUP)
+
+    assert scheduler_obj.accepting(lane=scheduler.NEIGHBOR)
+    assert scheduler_obj.submit(kodi_id='tmdb_5', db_type='movies', lane=scheduler.NEIGHBOR)
+    assert scheduler_obj.submit(kodi_id='tmdb_6', db_type='movies', lane=scheduler.FOCUSED)
+    assert scheduler_obj.size() == 3
+
+    run_all(scheduler_obj)
+    assert calls == ['tmdb_6', 'tmdb_5', 'tmdb_3']  # the oldest warmup lookups were evicted
+
+
+def test_run_next_error(mock_xbmc_log, calls):
+    """Test a failed lookup is logged and counted"""
+    failed = scheduler.tasks.get(labels=dict(lane='focused', result='failed'))
+    scheduler_obj = scheduler.LookupScheduler(handler=MagicMock(side_effect=ValueError('boom')))
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies')
+
+    assert scheduler_obj.run_next()
+    assert scheduler.tasks.get(labels=dict(lane='focused', result='failed')) == failed + 1
+    assert 'boom' in mock_xbmc_log.call_args.kwargs['msg']
+    assert not scheduler_obj.pending(kodi_id='tmdb_1')
+
+
+def test_work(calls):
+    """Test workers run lookups until Kodi requests an abort"""
+    done = threading.Event()
+    monitor = MagicMock()
+    monitor.abortRequested.return_value = False
+
+    def handler(kodi_id, db_type, lane):
+        calls.append(kodi_id)
+        done.set()
+
+    scheduler_obj = scheduler.LookupScheduler(handler=handler, monitor=monitor)
+    worker = threading.Thread(target=scheduler_obj.work)
+    worker.start()
+
+    scheduler_obj.submit(kodi_id='tmdb_1', db_type='movies')
+    assert done.wait(timeout=5)
+    assert scheduler_obj.running()
+
+    monitor.abortRequested.return_value = True
+    worker.join(timeout=5)
+    assert not scheduler_obj.running()
+    assert calls == ['tmdb_1']
@@ -0,0 +1,114 @@
+# standard imports
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import sources
+
+path = 'movies/themoviedb/1.json'
+
+
+@pytest.fixture(scope='function')
+def source(themerrdb_directory):
+    """Return a source reading the ThemerrDB directory"""
+    return sources.DirectorySource(root=str(themerrdb_directory))
+
+
+def test_themerrdb_http(themerrdb_server):
+    """Test HTTP URLs use the mirror pool"""
+    assert sources.themerrdb() is sources.http
+    status_code, item = sources.themerrdb().get(path=path)
+    assert status_code == 200
+    assert item['youtube_theme_url'].startswith('https://www.youtube.com/')
+
+    assert sources.themerrdb().get(path='movies/themoviedb/10001.json') == (404, None)
+
+
+def test_themerrdb_directory(themerrdb_directory):
+    """Test other values are read as a directory, which is kept"""
+    source = sources.themerrdb()
+    assert isinstance(source, sources.DirectorySource)
+    assert sources.themerrdb() is source
+    assert not source.remote
+
+
+@pytest.mark.parametrize('root, expected', [
+    ('/srv/ThemerrDB/', '/srv/ThemerrDB'),
+    ('file:///srv/Themerr%20DB', '/srv/Themerr DB'),
+    ('smb://nas/share/ThemerrDB/', 'smb://nas/share/ThemerrDB'),
+])
+def test_root(root, expected):
+    """Test the root of file URLs and Kodi paths"""
+    assert sources.DirectorySource(root=root).root == expected
+
+
+def test_get(source):
+    """Test items are read from the directory"""
+    status_code, item = source.get(path=path)
+    assert status_code == 200
+    assert item['id'] == '1'
+    assert source.get(path='movies/imdb/tt0000001.json')[0] == 200
+    assert source.get(path='movies/themoviedb/101.json') == (404, None)
+
+
+def test_get_cached(source):
+    """Test unchanged files are not read again"""
+    item = source.get(path=path)[1]
+
+    with patch('builtins.open', side_effect=AssertionError('read again')):
+        assert source.get(path=path)[1] is item
+
+
+def test_get_modified(source, themerrdb_directory):
+    """Test modified files are read again"""
+    source.get(path=path)
+
+    file = themerrdb_directory / path
+    file.write_text(json.dumps(dict(youtube_theme_url='https://www.youtube.com/watch?v=new')))
+    stat = os.stat(file)
+    os.utime(file, (stat.st_atime, stat.st_mtime + 1))
+
+    assert source.get(path=path)[1]['youtube_theme_url'] == 'https://www.youtube.com/watch?v=new'
+
+
+def test_get_invalid(source, themerrdb_directory):
+    """Test files which are not JSON have no data"""
+    (themerrdb_directory / path).write_text('<html>')
+    assert source.get(path=path) == (200, None)
+
+
+def test_get_max_size(themerrdb_directory):
+    """Test the oldest items are dropped from the cache"""
+    source = sources.DirectorySource(root=str(themerrdb_directory), max_size=2)
+    for number in range(1, 4):
+        source.get(path=f'movies/themoviedb/{number}.json')
+
+    assert list(source._items) == ['movies/themoviedb/2.json', 'movies/themoviedb/3.json']
+
+
+def test_get_unavailable(tmp_path):
+    """Test a missing directory raises an error, so it is recorded on the circuit breaker"""
+    source = sources.DirectorySource(root=str(tmp_path / 'unmounted'))
+    with pytest.raises(OSError):
+        source.get(path=path)
+
+
+def test_get_vfs():
+    """Test Kodi paths are read with xbmcvfs"""
+    file = MagicMock()
+    file.__enter__.return_value.read.return_value = json.dumps(dict(youtube_theme_url='url'))
+
+    with patch('xbmcvfs.exists', return_value=True), \
+            patch('xbmcvfs.Stat') as stat, \
+            patch('xbmcvfs.File', return_value=file) as vfs_file:
+        stat.return_value.st_mtime.return_value = 1
+        source = sources.DirectorySource(root='smb://nas/share/ThemerrDB')
+
+        assert source.get(path=path) == (200, dict(youtube_theme_url='url'))
+        assert source.get(path=path) == (200, dict(youtube_theme_url='url'))
+
+    vfs_file.assert_called_once_with(f'smb://nas/share/ThemerrDB/{path}')
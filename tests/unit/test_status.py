@@ -0,0 +1,53 @@
+# standard imports
+from threading import Thread
+
+# lib imports
+import pytest
+import requests
+
+# local imports
+from src.themerr import metrics
+from src.themerr import status
+
+
+@pytest.fixture(scope='function')
+def status_server():
+    """Start a status server on a free port"""
+    threads = [Thread(name='ThemerrIdle')]
+    server = status.StatusServer(port=0, threads=threads, host='127.0.0.1')
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_format_threads():
+    """Test format_threads method"""
+    alive = Thread(name='Alive')
+    alive.is_alive = lambda: True
+    dead = Thread(name='Dead')
+
+    text = status.format_threads(threads=[alive, dead])
+    assert '# TYPE themerr_thread_alive gauge' in text
+    assert 'themerr_thread_alive{thread="Alive"} 1' in text
+    assert 'themerr_thread_alive{thread="Dead"} 0' in text
+
+
+def test_metrics_endpoint(status_server):
+    """Test the metrics endpoint serves the registry in Prometheus format"""
+    metrics.registry.counter(name='status_test_total', description='Status test').inc()
+
+    response = requests.get(url=f'http://127.0.0.1:{status_server.server_port}/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'themerr_status_test_total 1.0' in response.text
+    assert 'themerr_thread_alive{thread="ThemerrIdle"} 0' in response.text
+
+
+def test_not_found(status_server):
+    """Test other paths are not served"""
+    response = requests.get(url=f'http://127.0.0.1:{status_server.server_port}/')
+    assert response.status_code == 404
@@ -0,0 +1,64 @@
+# standard imports
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import throttle
+
+
+@pytest.fixture(scope='function')
+def throttle_obj():
+    """Return a DwellThrottle with a 250ms lookup delay"""
+    with patch('src.themerr.settings.settings.lookup_delay', return_value=250):
+        yield throttle.DwellThrottle()
+
+
+def test_dwell_not_scrolling(throttle_obj):
+    """Test the dwell time is the lookup delay before a scroll is measured"""
+    assert throttle_obj.dwell() == 0.25
+    throttle_obj.focus_changed(at=0.0)
+    assert throttle_obj.dwell() == 0.25
+
+    assert not throttle_obj.ready(focused_at=0.0, now=0.2)
+    assert throttle_obj.ready(focused_at=0.0, now=0.25)
+
+
+def test_dwell_steady_scroll(throttle_obj):
+    """Test the dwell time grows with the time between focus changes"""
+    for at in (0.0, 0.4, 0.8, 1.2):
+        throttle_obj.focus_changed(at=at)
+
+    assert throttle_obj.interval == pytest.approx(0.4)
+    assert throttle_obj.dwell() == pytest.approx(0.6)
+    assert throttle.scroll_velocity.value() == pytest.approx(2.5)
+    assert not throttle_obj.ready(focused_at=1.2, now=1.6)
+
+
+def test_dwell_fast_scroll(throttle_obj):
+    """Test fast scrolls keep the lookup delay, as items are left before it passes"""
+    for at in (0.0, 0.05, 0.1):
+        throttle_obj.focus_changed(at=at)
+    assert throttle_obj.dwell() == 0.25
+
+
+def test_dwell_maximum(throttle_obj):
+    """Test the dwell time is limited, and a rest ends the scroll"""
+    throttle_obj.focus_changed(at=0.0)
+    throttle_obj.focus_changed(at=0.9)
+    assert throttle_obj.dwell() == 1.0
+
+    throttle_obj.focus_changed(at=5.0)
+    assert throttle_obj.interval is None
+    assert throttle_obj.dwell() == 0.25
+
+
+def test_dwell_disabled():
+    """Test a lookup delay of 0 looks up every item immediately"""
+    throttle_obj = throttle.DwellThrottle()
+    with patch('src.themerr.settings.settings.lookup_delay', return_value=0):
+        throttle_obj.focus_changed(at=0.0)
+        throttle_obj.focus_changed(at=0.1)
+        assert throttle_obj.dwell() == 0.0
+        assert throttle_obj.ready(focused_at=0.1, now=0.1)
@@ -0,0 +1,83 @@
+# standard imports
+import json
+from unittest.mock import patch
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import tracing
+
+
+@pytest.fixture(scope='function')
+def tracer_obj():
+    """Return a new Tracer object"""
+    return tracing.Tracer(size=3)
+
+
+def test_trace():
+    """Test Trace object"""
+    trace = tracing.Trace(kodi_id='tmdb_1')
+    assert 'focus' in trace.marks
+
+    trace.mark(name='play')
+    first = trace.marks['play']
+    trace.mark(name='play')  # only the first mark is kept
+    assert trace.marks['play'] == first
+
+    assert trace.duration(start='focus', end='play') >= 0
+    assert trace.duration(start='focus', end='av_started') is None
+
+
+def test_tracer_ring_buffer(tracer_obj):
+    """Test the tracer only keeps the most recent traces"""
+    for i in range(5):
+        tracer_obj.start(kodi_id=f'tmdb_{i}')
+
+    assert [trace.kodi_id for trace in tracer_obj.traces] == ['tmdb_2', 'tmdb_3', 'tmdb_4']
+
+
+def test_tracer_mark(tracer_obj):
+    """Test marks go to the most recent trace for the Kodi ID"""
+    older = tracer_obj.start(kodi_id='tmdb_1')
+    other = tracer_obj.start(kodi_id='tmdb_2')
+    newer = tracer_obj.start(kodi_id='tmdb_1')
+
+    tracer_obj.mark(kodi_id='tmdb_1', name='lookup_start')
+    tracer_obj.mark(kodi_id='tmdb_3', name='lookup_start')  # no trace, ignored
+
+    assert 'lookup_start' in newer.marks
+    assert 'lookup_start' not in older.marks
+    assert 'lookup_start' not in other.marks
+
+
+def test_tracer_report(tracer_obj):
+    """Test the report contains percentiles for each phase"""
+    trace = tracer_obj.start(kodi_id='tmdb_1')
+    trace.marks.update(focus=0.0, lookup_start=0.1, lookup_end=0.3, extract_start=3.0, extract_end=4.0, play=4.0,
+                       av_started=4.5)
+    cached = tracer_obj.start(kodi_id='tmdb_2')
+    cached.marks.update(focus=10.0, extract_start=13.0, extract_end=13.5, play=13.5, av_started=14.5)
+
+    report = tracer_obj.report()
+    assert set(report.keys()) == {phase[0] for phase in tracing.phases}
+    assert report['lookup']['count'] == 1
+    assert report['lookup']['p50'] == pytest.approx(0.2)
+    assert report['focus_to_audio']['count'] == 2
+    assert report['focus_to_audio']['max'] == pytest.approx(4.5)
+    assert report['play_to_audio']['p99'] == pytest.approx(1.0)
+
+
+def test_publish(tracer_obj):
+    """Test publishing and reading the report through the home window"""
+    with patch('xbmcgui.Window', spec=True) as mock_window:
+        tracing.publish()
+        name, data = mock_window.return_value.setProperty.call_args.args
+        assert name == tracing.PROPERTY_NAME
+        assert json.loads(data).keys() == tracing.tracer.report().keys()
+
+        mock_window.return_value.getProperty.return_value = data
+        assert tracing.read_published() == json.loads(data)
+
+        mock_window.return_value.getProperty.return_value = 'not json'
+        assert tracing.read_published() == {}
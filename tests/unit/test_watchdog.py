@@ -0,0 +1,92 @@
+# standard imports
+import threading
+import time
+from unittest.mock import patch
+
+# kodi imports
+import xbmc
+
+# lib imports
+import pytest
+
+# local imports
+from src.themerr import ratelimit
+from src.themerr import watchdog
+
+
+@pytest.fixture(scope='function')
+def watchdog_obj():
+    """Return a Watchdog object which logs one stack, and a 10ms threshold"""
+    with patch('src.themerr.settings.settings.slow_tick_threshold', return_value=10):
+        yield watchdog.Watchdog(
+            monitor=xbmc.Monitor(),
+            rate_limit=ratelimit.TokenBucket(rate=0, capacity=1),
+        )
+
+
+def slow_tick(watchdog_obj, started: threading.Event, release: threading.Event):
+    """Simulate a tick which blocks until released"""
+    watchdog_obj.tick_started()
+    started.set()
+    release.wait()
+    watchdog_obj.tick_finished()
+
+
+def run_slow_tick(watchdog_obj):
+    started = threading.Event()
+    release = threading.Event()
+    thread = threading.Thread(target=slow_tick, args=(watchdog_obj, started, release))
+    thread.start()
+    started.wait()
+    time.sleep(0.02)
+    return thread, release
+
+
+def test_check_no_tick(watchdog_obj):
+    """Test check method when no tick is running"""
+    assert watchdog_obj.check() is False
+
+
+def test_check_fast_tick(watchdog_obj):
+    """Test check method when the tick is within the threshold"""
+    watchdog_obj.tick_started()
+    assert watchdog_obj.check() is False
+    watchdog_obj.tick_finished()
+
+
+def test_check_slow_tick(mock_xbmc_log, watchdog_obj):
+    """Test check method logs the stack of a slow tick once"""
+    stalls = watchdog.stalls.total()
+    thread, release = run_slow_tick(watchdog_obj)
+
+    assert watchdog_obj.check() is True
+    assert watchdog_obj.check() is False  # already reported
+
+    release.set()
+    thread.join()
+
+    assert watchdog.stalls.total() == stalls + 1
+    message = mock_xbmc_log.call_args.kwargs['msg']
+    assert '[WARNING]' in message
+    assert 'slow_tick' in message
+    assert 'release.wait()' in message
+
+
+def test_check_rate_limited(mock_xbmc_log, watchdog_obj):
+    """Test slow ticks over the rate limit are counted but not logged"""
+    for _ in range(2):
+        thread, release = run_slow_tick(watchdog_obj)
+        assert watchdog_obj.check() is True
+        release.set()
+        thread.join()
+
+    assert mock_xbmc_log.call_count == 1
+    assert watchdog_obj.suppressed == 1
+
+
+def test_check_disabled(watchdog_obj):
+    """Test a threshold of 0 disables the check"""
+    watchdog_obj.tick_started()
+    with patch('src.themerr.settings.settings.slow_tick_threshold', return_value=0):
+        assert watchdog_obj.check() is False
+    watchdog_obj.tick_finished()
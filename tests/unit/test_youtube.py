@@ -1,7 +1,16 @@
+# standard imports
+import socket
+from typing import Optional
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError, URLError
+
 # lib imports
 import pytest
 
 # local imports
+from scripts.youtube_replay import load_corpus
+from src.themerr import circuit
+from src.themerr import ratelimit
 from src.themerr import youtube
 
 
@@ -24,3 +33,159 @@ def test_process_youtube_invalid(url):
     # test invalid urls
     audio_url = youtube.process_youtube(url=url)
     assert audio_url is None
+
+
+def audio_format(acodec: str, filesize: int, url: str) -> dict:
+    return dict(format=f'{url} - audio only (tiny)', acodec=acodec, filesize=filesize, url=url)
+
+
+@pytest.mark.parametrize('formats, expected', [
+    ([audio_format('opus', 200, 'opus'), audio_format('mp4a.40.2', 100, 'mp4a')], 'mp4a'),  # mp4a preferred
+    ([audio_format('mp4a.40.5', 50, 'small'), audio_format('mp4a.40.2', 100, 'large')], 'large'),
+    ([audio_format('opus', 100, 'opus')], 'opus'),
+    ([audio_format('vorbis', 100, 'vorbis')], None),
+    ([dict(format='18 - 640x360 (360p)', acodec='mp4a.40.2', filesize=500, url='video')], None),
+])
+def test_select_audio_url(formats, expected):
+    assert youtube.select_audio_url(result=dict(formats=formats)) == expected
+    assert youtube.select_audio_url(result=dict(entries=[dict(formats=formats)])) == expected
+
+
+@pytest.mark.parametrize('name', sorted(load_corpus()))
+def test_process_youtube_replay(youtube_corpus, youtube_replay, name):
+    """Test process_youtube against the recorded corpus"""
+    entry = youtube_corpus[name]
+    assert youtube.process_youtube(url=entry['url']) == entry['expected']
+    assert youtube_replay.calls == 1
+
+
+def test_process_youtube_replay_delay(youtube_corpus, youtube_replay):
+    """Test the replay delay is included in the extract latency"""
+    youtube_replay.delay = 0.05
+    count = youtube.extract_latency.count
+
+    youtube.process_youtube(url=youtube_corpus['video']['url'])
+
+    assert youtube.extract_latency.count == count + 1
+    assert max(youtube.extract_latency.samples) >= 0.05
+
+
+def test_process_youtube_cached(youtube_corpus, youtube_replay):
+    """Test extracted audio URLs are cached"""
+    entry = youtube_corpus['video']
+    assert youtube.process_youtube(url=entry['url']) == entry['expected']
+    assert youtube.process_youtube(url=entry['url']) == entry['expected']
+    assert youtube_replay.calls == 1
+
+
+def test_process_youtube_circuit_open(youtube_corpus, youtube_replay):
+    """Test YouTube is not requested while the circuit breaker is open, cached URLs are still returned"""
+    cached = youtube_corpus['video']
+    youtube.process_youtube(url=cached['url'])
+
+    url = youtube_corpus['opus_only']['url']
+    with patch.object(youtube_replay, 'extract_info', side_effect=OSError('network is unreachable')):
+        for _ in range(circuit.youtube.failure_threshold):
+            assert youtube.process_youtube(url=url) is None
+
+    assert circuit.youtube.state() == circuit.OPEN
+    failures = youtube.extract_failures.get(labels=dict(reason='circuit_open'))
+    assert youtube.process_youtube(url=url) is None
+    assert youtube.extract_failures.get(labels=dict(reason='circuit_open')) == failures + 1
+    assert youtube.process_youtube(url=cached['url']) == cached['expected']
+
+
+def test_process_youtube_circuit_open_no_token(youtube_corpus, youtube_replay):
+    """Test no rate limit token is waited for while the circuit breaker is open"""
+    for _ in range(circuit.youtube.failure_threshold):
+        circuit.youtube.failure()
+
+    with patch.object(ratelimit.youtube, 'acquire') as acquire:
+        assert youtube.process_youtube(url=youtube_corpus['video']['url']) is None
+
+    acquire.assert_not_called()
+    assert youtube_replay.calls == 0
+
+
+def test_replay_error(youtube_corpus, youtube_replay):
+    """Test the replay raises errors like YoutubeDL.extract_info, as a DownloadError wrapping the ExtractorError"""
+    with pytest.raises(youtube.youtube_dl.utils.DownloadError) as exc_info:
+        youtube.youtube_dl.YoutubeDL().extract_info(url=youtube_corpus['unavailable']['url'], download=False)
+
+    assert isinstance(exc_info.value.exc_info[1], youtube.youtube_dl.utils.ExtractorError)
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=notavideoid',  # recorded error
+    'https://www.youtube.com/watch?v=notrecorded',
+])
+def test_process_youtube_unavailable_video(youtube_replay, url):
+    """Test unavailable videos do not open the circuit breaker"""
+    attempts = circuit.youtube.failure_threshold + 1
+    failures = youtube.extract_failures.get(labels=dict(reason='youtube'))
+    for _ in range(attempts):
+        assert youtube.process_youtube(url=url) is None
+
+    assert circuit.youtube.state() == circuit.CLOSED
+    assert youtube.extract_failures.get(labels=dict(reason='youtube')) == failures + attempts
+
+
+def test_process_youtube_rate_limited(youtube_corpus, youtube_replay):
+    """Test extractions are skipped when the rate limit is reached"""
+    failures = youtube.extract_failures.get(labels=dict(reason='rate_limited'))
+
+    with patch('src.themerr.settings.settings.youtube_rate_limit', return_value=20), \
+            patch.object(ratelimit.youtube, 'max_wait', 0):
+        ratelimit.youtube.bucket.tokens = 0
+        assert youtube.process_youtube(url=youtube_corpus['video']['url']) is None
+
+    assert youtube_replay.calls == 0
+    assert youtube.extract_failures.get(labels=dict(reason='rate_limited')) == failures + 1
+
+
+def extraction_error(cause: Optional[Exception] = None) -> Exception:
+    """Get the DownloadError which YoutubeDL.extract_info raises for an ExtractorError raised while handling cause"""
+    try:
+        try:
+            if cause:
+                raise cause
+            raise youtube.youtube_dl.utils.ExtractorError('Video unavailable', expected=True)
+        except youtube.youtube_dl.utils.ExtractorError:
+            raise
+        except Exception as e:
+            raise youtube.youtube_dl.utils.ExtractorError(f'Unable to download webpage: {e}', cause=e)
+    except youtube.youtube_dl.utils.ExtractorError as e:
+        try:
+            youtube.youtube_dl.YoutubeDL(params=dict(logger=MagicMock())).report_error(str(e))
+        except youtube.youtube_dl.utils.DownloadError as error:
+            return error
+
+
+@pytest.mark.parametrize('cause, reason, state', [
+    (None, 'youtube', circuit.CLOSED),  # unavailable or private video
+    (HTTPError('https://www.youtube.com', 404, 'Not Found', {}, None), 'youtube', circuit.CLOSED),
+    (HTTPError('https://www.youtube.com', 429, 'Too Many Requests', {}, None), 'network', circuit.OPEN),
+    (URLError('network is unreachable'), 'network', circuit.OPEN),
+    (socket.timeout('timed out'), 'network', circuit.OPEN),
+    (ValueError('no formats'), 'unexpected', circuit.OPEN),
+])
+def test_process_youtube_error_cause(youtube_corpus, youtube_replay, cause, reason, state):
+    """Test extraction errors are recorded on the circuit breaker by their cause, not the wrapping DownloadError"""
+    error = extraction_error(cause=cause)
+    assert isinstance(error, youtube.youtube_dl.utils.DownloadError)
+    failures = youtube.extract_failures.get(labels=dict(reason=reason))
+
+    with patch.object(youtube_replay, 'extract_info', side_effect=error):
+        for _ in range(circuit.youtube.failure_threshold):
+            assert youtube.process_youtube(url=youtube_corpus['video']['url']) is None
+
+    assert circuit.youtube.state() == state
+    assert youtube.extract_failures.get(labels=dict(reason=reason)) == failures + circuit.youtube.failure_threshold
+
+
+def test_error_cause():
+    """Test the cause of a DownloadError is found through the ExtractorError"""
+    cause = URLError('network is unreachable')
+    assert youtube.error_cause(exc=extraction_error(cause=cause)) is cause
+    assert isinstance(youtube.error_cause(exc=extraction_error()), youtube.youtube_dl.utils.ExtractorError)
+    assert youtube.error_cause(exc=OSError('other')).args == ('other',)